@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import threading
+import ijson
+from ijson.common import ObjectBuilder
+
+# Compact (location, storageClass) -> tiered USD/GB-month index built from the AWS S3 offer file in one
+# streaming pass. Only the SKUs we care about are ever materialised, so building it needs a few MB
+# at most; the persisted index is a few KB and every later lookup is a dict access.
+
+INDEX_PATH = os.path.join("cache", "aws_s3_price_index.json")
+INDEX_VERSION = 2
+INDEX_MAX_AGE_SECONDS = 24 * 3600
+# Cost_Engine storage class -> name used by AWS (matched against storageClass or volumeType)
+AWS_STORAGE_CLASSES = {
+    "Standard": "Standard",
+    "Infrequent Access": "Standard - Infrequent Access",
+    "Archive": "Amazon Glacier"
+}
+INDEXED_STORAGE_CLASSES = tuple(AWS_STORAGE_CLASSES.values())
+
+
+class _IndexBuilder:
+    # Consumes ijson (prefix, event, value) events for products.* and terms.OnDemand.*
+    def __init__(self, storage_classes=INDEXED_STORAGE_CLASSES):
+        self.storage_classes = set(storage_classes)
+        self.skus = {}  # sku -> (location, storageClass)
+        self.prices = {}
+        self._builder = None
+        self._depth = 0
+        self._section = None
+        self._sku = None
+
+    def feed(self, prefix, event, value):
+        if self._builder is not None:
+            self._builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                self._depth += 1
+            elif event in ("end_map", "end_array"):
+                self._depth -= 1
+            if self._depth == 0:
+                self._finish(self._builder.value)
+                self._builder = None
+            return
+
+        if event != "map_key":
+            return
+        if prefix == "products" or (prefix == "terms.OnDemand" and value in self.skus):
+            self._section = prefix
+            self._sku = value
+            self._builder = ObjectBuilder()
+            self._depth = 0
+
+    def _finish(self, obj):
+        if self._section == "products":
+            if not isinstance(obj, dict) or obj.get("productFamily", "Storage") != "Storage":
+                return
+            attr = obj.get("attributes", {})
+            for field in ("storageClass", "volumeType"):
+                if attr.get(field) in self.storage_classes and attr.get("location"):
+                    self.skus[self._sku] = (attr["location"], attr[field])
+                    break
+            return
+
+        location, storage_class = self.skus[self._sku]
+        key = f"{location}|{storage_class}"
+        if key in self.prices or not obj:
+            return
+        price_dimensions = next(iter(obj.values())).get("priceDimensions", {})
+        tiers = []
+        for dimension in price_dimensions.values():
+            tiers.append((
+                float(dimension.get("beginRange", 0)),
+                float(dimension.get("endRange", "Inf")),
+                float(dimension["pricePerUnit"]["USD"])
+            ))
+        if tiers:
+            self.prices[key] = sorted(tiers)
+
+class AwsPriceIndex:
+    def __init__(self, path=INDEX_PATH, max_age=INDEX_MAX_AGE_SECONDS):
+        self.path = path
+        self.max_age = max_age
+        self._prices = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._prices is not None:
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._prices = data["prices"]
+                self._built_at = data["built_at"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def is_fresh(self):
+        with self._lock:
+            self._load()
+            return self._prices is not None and time.time() - self._built_at < self.max_age
+
+    def lookup_tiers(self, location, storage_class="Standard"):
+        with self._lock:
+            self._load()
+            if self._prices is None:
+                return None
+            return self._prices.get(f"{location}|{storage_class}")
+
+    def lookup(self, location, storage_class="Standard"):
+        tiers = self.lookup_tiers(location, storage_class)
+        return tiers[0][2] if tiers else None
+
+    def lookup_schedule(self, location):
+        # -> {Cost_Engine storage class: tiers} for every class AWS lists at this location
+        schedule = {}
+        for engine_class, aws_class in AWS_STORAGE_CLASSES.items():
+            tiers = self.lookup_tiers(location, aws_class)
+            if tiers:
+                schedule[engine_class] = [tuple(t) for t in tiers]
+        return schedule or None
+
+    def _save(self, prices):
+        built_at = time.time()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "built_at": built_at, "prices": prices}, f)
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            self._prices = prices
+            self._built_at = built_at
+
+    def build_from_file(self, fp):
+        builder = _IndexBuilder()
+        for prefix, event, value in ijson.parse(fp):
+            builder.feed(prefix, event, value)
+        self._save(builder.prices)
+        return builder.prices
+
+    async def build_from_stream(self, stream):
+        # `stream` is any object with an async read(n), e.g. aiohttp's response.content
+        builder = _IndexBuilder()
+        async for prefix, event, value in ijson.parse_async(stream):
+            builder.feed(prefix, event, value)
+        self._save(builder.prices)
+        return builder.prices
+
+
+AWS_PRICE_INDEX = AwsPriceIndex()
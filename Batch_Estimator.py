@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+# Headless batch estimation for cron jobs: no Streamlit, no LLM stack, no sentence-transformers.
+#   python Batch_Estimator.py manifest.csv -o estimates.csv --retention 120 --effort Medium
+from Cost_Engine import (
+    AVG_PAGE_SIZE_KB,
+    OCR_COST_PER_PAGE,
+    SCANNING_COST_PER_PAGE,
+    FALLBACK_STORAGE_PRICES,
+    MANPOWER_MULTIPLIERS,
+    PROVIDERS,
+    pages_to_size_gb,
+    estimate_scenarios
+)
+
+DEFAULT_CHUNK_ROWS = 10000
+
+
+class _PathUpload:
+    # Lets PDF_Ingestion treat a file on disk like an uploaded file
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+
+    def getvalue(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+def read_manifest(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Streams the manifest in fixed-size chunks so memory stays bounded on very large files
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_rows)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_rows)
+    for chunk in reader:
+        chunk.columns = [c.strip().lower() for c in chunk.columns]
+        yield chunk
+
+def resolve_pdf_rows(chunk, manifest_dir):
+    # Fill in pages/size for rows that only reference a PDF path
+    if "path" not in chunk:
+        return chunk
+    if "pages" not in chunk:
+        chunk["pages"] = np.nan
+    if "size_kb" not in chunk:
+        chunk["size_kb"] = np.nan
+
+    needs_pdf = chunk["pages"].isna() & chunk["path"].notna()
+    if not needs_pdf.any():
+        return chunk
+
+    from PDF_Ingestion import ingest_pdfs  # only pulls in PyMuPDF when PDFs are referenced
+
+    paths = [p if os.path.isabs(p) else os.path.join(manifest_dir, p) for p in chunk.loc[needs_pdf, "path"]]
+    results = ingest_pdfs([_PathUpload(p) for p in paths], save_dir=None)
+    for idx, path, result in zip(chunk.index[needs_pdf], paths, results):
+        if "error" in result:
+            print(f"warning: skipping {path}: {result['error']}", file=sys.stderr)
+            continue
+        chunk.at[idx, "pages"] = result["pages"]
+        chunk.at[idx, "size_kb"] = result["analysis"]["predicted_kb"]
+    return chunk.dropna(subset=["pages"])
+
+def _row_label(chunk, idx):
+    for column in ("id", "path"):
+        if column in chunk and pd.notna(chunk.at[idx, column]):
+            return str(chunk.at[idx, column])
+    return f"row {idx}"
+
+def validate_rows(chunk, multipliers):
+    # Drops rows that can't be estimated (no page count, unknown effort) with a warning each,
+    # instead of letting one bad row abort the batch halfway through the output file
+    pages = pd.to_numeric(chunk["pages"], errors="coerce")
+    bad = pages.isna() | (pages < 0)
+    for idx in chunk.index[bad]:
+        print(f"warning: skipping {_row_label(chunk, idx)}: missing or invalid pages", file=sys.stderr)
+    chunk = chunk.loc[~bad].assign(pages=pages[~bad])
+
+    if "effort" in chunk:
+        # Case-insensitive match against the known levels ("medium" -> "Medium"); blanks use --effort
+        levels = {label.lower(): label for label in multipliers}
+        given = chunk["effort"].astype("string").str.strip()
+        effort = given.str.lower().map(levels)
+        unknown = given.notna() & effort.isna()
+        for idx in chunk.index[unknown]:
+            print(f"warning: skipping {_row_label(chunk, idx)}: unknown effort {given[idx]!r} "
+                  f"(expected one of {', '.join(multipliers)})", file=sys.stderr)
+        chunk = chunk.loc[~unknown].assign(effort=effort[~unknown].astype(object))
+    return chunk
+
+def estimate_chunk(chunk, args, storage_prices, multipliers):
+    n = len(chunk)
+    pages = chunk["pages"].to_numpy(dtype=np.float64)
+    if "size_gb" in chunk:
+        size_gb = chunk["size_gb"].to_numpy(dtype=np.float64)
+    elif "size_kb" in chunk:
+        size_gb = (chunk["size_kb"].to_numpy(dtype=np.float64) / 1024) / 1024
+    else:
+        size_gb = np.full(n, np.nan)
+    size_gb = np.where(np.isnan(size_gb), pages_to_size_gb(pages, args.page_size_kb), size_gb)
+
+    if "id" in chunk:
+        ids = chunk["id"].astype(str).to_numpy()
+    elif "path" in chunk:
+        ids = chunk["path"].astype(str).to_numpy()
+    else:
+        ids = chunk.index.astype(str).to_numpy()
+
+    # Fixed dtypes keep every output chunk on the same Parquet schema
+    retention = chunk["retention"].fillna(args.retention).to_numpy(dtype=np.float64) if "retention" in chunk else np.full(n, float(args.retention))
+    effort = chunk["effort"].fillna(args.effort).astype(str).to_numpy() if "effort" in chunk else np.full(n, args.effort)
+
+    # One row per (document, provider)
+    k = len(args.providers)
+    scenarios = pd.DataFrame({
+        "Document": np.repeat(ids, k),
+        "Pages": np.repeat(pages, k),
+        "Size (GB)": np.repeat(size_gb, k),
+        "Provider": np.tile(args.providers, n),
+        "Retention (mo)": np.repeat(retention, k),
+        "Effort": np.repeat(effort, k)
+    })
+    return estimate_scenarios(
+        scenarios,
+        storage_prices=storage_prices,
+        manpower_multipliers=multipliers,
+        ocr_cost=args.ocr_cost,
+        scanning_cost=args.scanning_cost
+    )
+
+class ResultWriter:
+    # Appends result chunks to CSV or Parquet without keeping earlier chunks around
+    def __init__(self, path):
+        self.path = path
+        self.is_parquet = path.lower().endswith(".parquet")
+        self._parquet_writer = None
+        self._wrote_header = False
+        self.rows = 0
+
+    def write(self, df):
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            # Text columns of a zero-row frame are inferred as null; keep them strings
+            table = table.cast(pa.schema(
+                [f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in table.schema], metadata=table.schema.metadata
+            ))
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a" if self._wrote_header else "w", header=not self._wrote_header, index=False)
+            self._wrote_header = True
+        self.rows += len(df)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+def parse_key_values(items, cast=float):
+    values = {}
+    for item in items or []:
+        key, _, value = item.partition("=")
+        values[key.strip()] = cast(value)
+    return values
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Estimate digitization costs for a manifest of documents.")
+    parser.add_argument("manifest", help="CSV or JSONL with columns pages, size_kb/size_gb, path, id, retention, effort")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.csv or .parquet)")
+    parser.add_argument("--providers", nargs="+", default=PROVIDERS, choices=PROVIDERS)
+    parser.add_argument("--retention", type=int, default=12, help="Default retention period in months")
+    parser.add_argument("--effort", default="Medium", choices=list(MANPOWER_MULTIPLIERS))
+    parser.add_argument("--ocr-cost", type=float, default=OCR_COST_PER_PAGE)
+    parser.add_argument("--scanning-cost", type=float, default=SCANNING_COST_PER_PAGE)
+    parser.add_argument("--page-size-kb", type=float, default=AVG_PAGE_SIZE_KB, help="Used when a row has no size")
+    parser.add_argument("--price", action="append", metavar="PROVIDER=USD_PER_GB",
+                        help="Override the storage price for a provider (repeatable)")
+    parser.add_argument("--multiplier", action="append", metavar="EFFORT=RATE",
+                        help="Override a manpower multiplier (repeatable)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    storage_prices = dict(FALLBACK_STORAGE_PRICES, **parse_key_values(args.price))
+    multipliers = dict(MANPOWER_MULTIPLIERS, **parse_key_values(args.multiplier))
+    manifest_dir = os.path.dirname(os.path.abspath(args.manifest))
+
+    writer = ResultWriter(args.output)
+    documents = 0
+    try:
+        for chunk in read_manifest(args.manifest, args.chunk_rows):
+            chunk = resolve_pdf_rows(chunk, manifest_dir)
+            if "pages" not in chunk:
+                parser.error("manifest needs a 'pages' or 'path' column")
+            chunk = validate_rows(chunk, multipliers)
+            if chunk.empty:
+                continue
+            writer.write(estimate_chunk(chunk, args, storage_prices, multipliers))
+            documents += len(chunk)
+        if writer.rows == 0:
+            # Empty manifest or every row skipped: still leave the output the summary points to,
+            # with just the header (CSV) or the schema (Parquet)
+            writer.write(estimate_chunk(pd.DataFrame({"pages": []}), args, storage_prices, multipliers))
+    finally:
+        writer.close()
+
+    print(json.dumps({"documents": documents, "rows_written": writer.rows, "output": args.output}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+import numpy as np
+import pandas as pd
+
+# Pure cost calculations (no Streamlit) shared by the UI, batch jobs and scenario sweeps.
+# Every input may be a scalar or an array; arrays are broadcast against each other.
+
+AVG_PAGE_SIZE_KB = 350
+OCR_COST_PER_PAGE = 0.001
+SCANNING_COST_PER_PAGE = 0.002
+SOFTWARE_LICENSE_COSTS = {
+    "Amazon S3": 50,
+    "Google Cloud Storage": 40,
+    "Microsoft Azure": 40
+}
+MANPOWER_MULTIPLIERS = {"Low": 0.03, "Medium": 0.05, "High": 0.08}
+FALLBACK_STORAGE_PRICES = {"Amazon S3": 0.023, "Google Cloud Storage": 0.020, "Microsoft Azure": 0.020}
+
+PROVIDERS = ["Amazon S3", "Google Cloud Storage", "Microsoft Azure"]
+EFFORT_LEVELS = ["Low", "Medium", "High"]
+COST_COLUMNS = ["Storage ($)", "OCR ($)", "Scanning ($)", "Manpower ($)", "License ($)"]
+
+# Tiered price schedules: (begin GB, end GB, $ per GB-month) per storage class. Published list prices,
+# used for any class/provider the live pricing snapshot does not cover.
+STORAGE_CLASSES = ["Standard", "Infrequent Access", "Archive"]
+INF = float("inf")
+DEFAULT_PRICE_SCHEDULES = {
+    "Amazon S3": {
+        "Standard": [(0, 51200, 0.023), (51200, 512000, 0.022), (512000, INF, 0.021)],
+        "Infrequent Access": [(0, INF, 0.0125)],
+        "Archive": [(0, INF, 0.0036)]
+    },
+    "Google Cloud Storage": {
+        "Standard": [(0, INF, 0.020)],
+        "Infrequent Access": [(0, INF, 0.010)],
+        "Archive": [(0, INF, 0.0012)]
+    },
+    "Microsoft Azure": {
+        "Standard": [(0, 51200, 0.020), (51200, 512000, 0.0192), (512000, INF, 0.0184)],
+        "Infrequent Access": [(0, INF, 0.010)],
+        "Archive": [(0, INF, 0.002)]
+    }
+}
+
+
+def pages_to_size_gb(pages, page_size_kb=AVG_PAGE_SIZE_KB):
+    return (np.asarray(pages, dtype=np.float64) * page_size_kb / 1024) / 1024
+
+def lookup(keys, table):
+    # Vectorized dict lookup: map an array of labels (e.g. providers) to their numeric values
+    labels = list(table)
+    codes = pd.Categorical(np.asarray(keys).ravel(), categories=labels).codes
+    if (codes < 0).any():
+        unknown = set(np.asarray(keys).ravel()[codes < 0].tolist())
+        raise KeyError(f"Unknown keys: {sorted(unknown)}")
+    values = np.array([table[k] for k in labels], dtype=np.float64)
+    return values[codes].reshape(np.shape(keys))
+
+# ----------------- Tiered storage & lifecycle --------------------
+def flat_schedule(price):
+    return [(0, INF, float(price))]
+
+def resolve_schedules(provider, live_schedule=None, standard_price=None):
+    # Defaults, overlaid with whatever classes live pricing returned, and an explicit Standard price last
+    schedules = dict(DEFAULT_PRICE_SCHEDULES[provider])
+    schedules.update(live_schedule or {})
+    if standard_price is not None:
+        schedules["Standard"] = flat_schedule(standard_price)
+    return schedules
+
+def build_lifecycle(infrequent_after=0, archive_after=0):
+    # Ages (months since ingestion) at which data moves class; 0 means the transition is not used
+    if 0 < archive_after <= infrequent_after:
+        raise ValueError("Infrequent Access transition must come before the Archive transition")
+    lifecycle = {0: "Standard"}
+    if infrequent_after > 0:
+        lifecycle[int(infrequent_after)] = "Infrequent Access"
+    if archive_after > 0:
+        lifecycle[int(archive_after)] = "Archive"
+    return sorted(lifecycle.items())
+
+def tiered_monthly_cost(volume_gb, tiers):
+    tiers = np.asarray(tiers, dtype=np.float64)
+    begins, ends, prices = tiers[:, 0], tiers[:, 1], tiers[:, 2]
+    volume = np.asarray(volume_gb, dtype=np.float64)[..., None]
+    return (np.clip(volume - begins, 0, ends - begins) * prices).sum(axis=-1)
+
+def project_storage_costs(size_gb, retention_period, schedules, lifecycle=None, monthly_ingest_gb=0.0, return_monthly=False):
+    # Month-by-month storage cost for each scenario. The initial archive lands in month 0 and
+    # `monthly_ingest_gb` arrives every month after; each monthly cohort ages through the lifecycle
+    # classes independently. Volume per class comes from differences of the cumulative stored
+    # volume, so the whole (scenarios x months) grid is computed without Python loops.
+    size_gb, retention_period, monthly_ingest_gb = [
+        np.atleast_1d(a) for a in np.broadcast_arrays(
+            *[np.asarray(x, dtype=np.float64) for x in (size_gb, retention_period, monthly_ingest_gb)]
+        )
+    ]
+    lifecycle = sorted(lifecycle or [(0, "Standard")])
+    months = np.arange(int(retention_period.max()) if retention_period.size else 0)
+
+    def stored_by(age_offset):
+        # Cumulative GB ingested up to month (m - age_offset); nothing before month 0
+        k = (months - age_offset)[None, :]
+        return np.where(k >= 0, size_gb[:, None] + monthly_ingest_gb[:, None] * np.maximum(k, 0), 0.0)
+
+    monthly = np.zeros((size_gb.size, months.size))
+    for i, (start_age, storage_class) in enumerate(lifecycle):
+        volume = stored_by(start_age)
+        if i + 1 < len(lifecycle):
+            volume = volume - stored_by(lifecycle[i + 1][0])
+        monthly += tiered_monthly_cost(volume, schedules[storage_class])
+    monthly *= months[None, :] < retention_period[:, None]
+
+    totals = monthly.sum(axis=1)
+    return (totals, monthly) if return_monthly else totals
+
+def estimate_costs(pages, size_gb, storage_price, retention_period, manpower_rate,
+                   ocr_cost=OCR_COST_PER_PAGE, scanning_cost=SCANNING_COST_PER_PAGE, license_cost=0.0, storage_total=None):
+    # storage_total (e.g. from project_storage_costs) replaces the flat size x price x months figure
+    if storage_total is None:
+        storage_total = np.asarray(size_gb, dtype=np.float64) * np.asarray(storage_price, dtype=np.float64) * np.asarray(retention_period, dtype=np.float64)
+    pages, retention_period, manpower_rate, ocr_cost, scanning_cost, license_cost, storage_total = np.broadcast_arrays(
+        *[np.asarray(x, dtype=np.float64) for x in
+          (pages, retention_period, manpower_rate, ocr_cost, scanning_cost, license_cost, storage_total)]
+    )
+
+    ocr_total = pages * ocr_cost
+    scanning_total = pages * scanning_cost
+    manpower_total = pages * manpower_rate
+    subtotal = storage_total + ocr_total + manpower_total + scanning_total
+
+    return pd.DataFrame({
+        "Storage ($)": storage_total.ravel(),
+        "OCR ($)": ocr_total.ravel(),
+        "Scanning ($)": scanning_total.ravel(),
+        "Manpower ($)": manpower_total.ravel(),
+        "License ($)": license_cost.ravel(),
+        "Subtotal ($)": subtotal.ravel(),
+        "Total ($)": (subtotal + license_cost).ravel()
+    })
+
+def estimate_scenarios(scenarios, storage_prices=None, manpower_multipliers=None, license_costs=None,
+                       ocr_cost=OCR_COST_PER_PAGE, scanning_cost=SCANNING_COST_PER_PAGE,
+                       price_schedules=None, lifecycle=None, monthly_ingest_gb=0.0):
+    # `scenarios` is a DataFrame (or dict of columns) with Pages, Provider, Retention (mo), Effort and
+    # optionally Size (GB). Prices/rates per provider and effort level come from the lookup tables.
+    # With `price_schedules` ({provider: {class: tiers}}) storage is projected with tiers and lifecycle.
+    scenarios = pd.DataFrame(scenarios)
+    storage_prices = storage_prices or FALLBACK_STORAGE_PRICES
+    manpower_multipliers = manpower_multipliers or MANPOWER_MULTIPLIERS
+    license_costs = license_costs or SOFTWARE_LICENSE_COSTS
+
+    pages = scenarios["Pages"].to_numpy(dtype=np.float64)
+    if "Size (GB)" in scenarios:
+        size_gb = scenarios["Size (GB)"].to_numpy(dtype=np.float64)
+    else:
+        size_gb = pages_to_size_gb(pages)
+    providers = scenarios["Provider"].to_numpy()
+    retention_period = scenarios["Retention (mo)"].to_numpy(dtype=np.float64)
+
+    storage_total = None
+    if price_schedules is not None:
+        storage_total = np.zeros(len(scenarios))
+        ingest = np.broadcast_to(np.asarray(monthly_ingest_gb, dtype=np.float64), storage_total.shape)
+        for provider in pd.unique(providers):
+            mask = providers == provider
+            storage_total[mask] = project_storage_costs(
+                size_gb[mask], retention_period[mask], price_schedules[provider], lifecycle, ingest[mask]
+            )
+
+    costs = estimate_costs(
+        pages=pages,
+        size_gb=size_gb,
+        storage_price=lookup(providers, storage_prices),
+        retention_period=retention_period,
+        manpower_rate=lookup(scenarios["Effort"].to_numpy(), manpower_multipliers),
+        ocr_cost=scenarios["OCR Cost"].to_numpy(dtype=np.float64) if "OCR Cost" in scenarios else ocr_cost,
+        scanning_cost=scenarios["Scanning Cost"].to_numpy(dtype=np.float64) if "Scanning Cost" in scenarios else scanning_cost,
+        license_cost=lookup(providers, license_costs),
+        storage_total=storage_total
+    )
+    costs.index = scenarios.index
+    return pd.concat([scenarios, costs], axis=1)
+
+def sweep_scenarios(pages, retention_periods, efforts=EFFORT_LEVELS, providers=PROVIDERS, **kwargs):
+    # Full cartesian product of the given axes, estimated in one vectorized pass
+    grid = pd.MultiIndex.from_product(
+        [np.asarray(pages), np.asarray(retention_periods), list(efforts), list(providers)],
+        names=["Pages", "Retention (mo)", "Effort", "Provider"]
+    ).to_frame(index=False)
+    return estimate_scenarios(grid, **kwargs)
+
+# ----------------- Monte Carlo --------------------
+# Uncertain inputs are given as distribution specs, e.g. {"dist": "triangular", "low": 250, "mode": 350,
+# "high": 500}; a plain number is a fixed value. Samples are drawn in fixed blocks of MC_BLOCK_SAMPLES,
+# each from its own SeedSequence child; chunks (the unit of work, run one after another) are whole
+# blocks, so results depend on the seed and sample count only -- not on chunk size. A simulation
+# runs inside one background job worker (see Job_Queue), so it never starts processes of its own.
+MC_DEFAULT_SAMPLES = 100000
+MC_MAX_SAMPLES = 1000000
+MC_BLOCK_SAMPLES = 5000
+MC_CHUNK_SAMPLES = 25000  # bounds the (samples x months) grid of the storage projection; rounded to whole blocks
+MC_PERCENTILES = (10, 50, 90)
+MC_HISTOGRAM_BINS = 60
+DISTRIBUTIONS = ["Fixed", "Triangular", "Uniform", "Normal", "Lognormal"]
+
+
+def distribution_spec(dist, low, mode, high):
+    # Low / most likely / high, the way estimates are usually given, for any supported distribution
+    dist = dist.lower()
+    if dist == "fixed" or low == high:
+        return {"dist": "fixed", "value": float(mode)}
+    if dist == "triangular":
+        return {"dist": "triangular", "low": float(low), "mode": float(mode), "high": float(high)}
+    if dist == "uniform":
+        return {"dist": "uniform", "low": float(low), "high": float(high)}
+    if dist == "normal":
+        return {"dist": "normal", "mean": float(mode), "sd": (float(high) - float(low)) / 4}  # low..high ~ 95%
+    if dist == "lognormal":
+        if low <= 0 or mode <= 0:
+            raise ValueError("Lognormal needs Low and Most likely above 0")
+        return {"dist": "lognormal", "median": float(mode), "sigma": float(np.log(high / low)) / 4}
+    raise ValueError(f"Unknown distribution: {dist}")
+
+def describe_distribution(spec):
+    if not isinstance(spec, dict) or spec["dist"] == "fixed":
+        return f"Fixed at {spec['value'] if isinstance(spec, dict) else spec:g}"
+    params = ", ".join(f"{k} {v:g}" for k, v in spec.items() if k != "dist")
+    return f"{spec['dist'].capitalize()} ({params})"
+
+def draw_samples(spec, size, rng):
+    if not isinstance(spec, dict):
+        return np.full(size, float(spec))
+    dist = spec["dist"]
+    if dist == "fixed":
+        return np.full(size, float(spec["value"]))
+    if dist == "triangular":
+        return rng.triangular(spec["low"], spec["mode"], spec["high"], size)
+    if dist == "uniform":
+        return rng.uniform(spec["low"], spec["high"], size)
+    if dist == "normal":
+        return rng.normal(spec["mean"], spec["sd"], size)
+    if dist == "lognormal":
+        return rng.lognormal(np.log(spec["median"]), spec["sigma"], size)
+    raise ValueError(f"Unknown distribution: {dist}")
+
+def _draw_block(size, seed, distributions):
+    # One block's inputs, always drawn in the same order from the block's own generator
+    rng = np.random.default_rng(seed)
+    pages = draw_samples(distributions["pages"], size, rng)
+    page_size_kb = draw_samples(distributions.get("page_size_kb", AVG_PAGE_SIZE_KB), size, rng)
+    manpower_rate = draw_samples(distributions["manpower_rate"], size, rng)
+    return pages, page_size_kb, manpower_rate
+
+def _simulate_chunk(block_sizes, block_seeds, distributions, providers, retention_period, storage, license_costs,
+                    ocr_cost, scanning_cost, lifecycle, monthly_ingest_gb):
+    # -> (samples, providers) totals for one chunk (a run of whole blocks)
+    blocks = [_draw_block(size, seed, distributions) for size, seed in zip(block_sizes, block_seeds)]
+    pages, page_size_kb, manpower_rate = [np.concatenate(parts) for parts in zip(*blocks)]
+    size = pages.size
+    pages = np.maximum(np.rint(pages), 0)
+    page_size_kb = np.maximum(page_size_kb, 0)
+    manpower_rate = np.maximum(manpower_rate, 0)
+    size_gb = pages_to_size_gb(pages, page_size_kb)
+
+    storage_total = np.empty((size, len(providers)))
+    for j, provider in enumerate(providers):
+        if isinstance(storage[provider], dict):
+            storage_total[:, j] = project_storage_costs(size_gb, retention_period, storage[provider], lifecycle, monthly_ingest_gb)
+        else:
+            storage_total[:, j] = size_gb * storage[provider] * retention_period
+
+    # Every provider for every sample in one call: (size, 1) inputs against (1, providers) prices
+    costs = estimate_costs(
+        pages=pages[:, None],
+        size_gb=size_gb[:, None],
+        storage_price=0.0,
+        retention_period=retention_period,
+        manpower_rate=manpower_rate[:, None],
+        ocr_cost=ocr_cost,
+        scanning_cost=scanning_cost,
+        license_cost=np.array([license_costs[p] for p in providers])[None, :],
+        storage_total=storage_total
+    )
+    return costs["Total ($)"].to_numpy().reshape(size, len(providers))
+
+def simulate_costs(distributions, retention_period, providers=PROVIDERS, samples=MC_DEFAULT_SAMPLES,
+                   price_schedules=None, storage_prices=None, license_costs=None,
+                   ocr_cost=OCR_COST_PER_PAGE, scanning_cost=SCANNING_COST_PER_PAGE, lifecycle=None,
+                   monthly_ingest_gb=0.0, seed=None, chunk_samples=MC_CHUNK_SAMPLES, progress=None):
+    # distributions: {"pages": spec, "page_size_kb": spec, "manpower_rate": spec}. Storage uses
+    # price_schedules ({provider: {class: tiers}}, tiered + lifecycle) when given, else flat prices.
+    # progress(fraction) is called as chunks finish.
+    # -> (summary per provider with Mean/P10/P50/P90, histogram of totals per provider)
+    providers = list(providers)
+    storage_prices = storage_prices or FALLBACK_STORAGE_PRICES
+    storage = {p: price_schedules[p] if price_schedules is not None else storage_prices[p] for p in providers}
+    license_costs = license_costs or SOFTWARE_LICENSE_COSTS
+    block_sizes = [min(MC_BLOCK_SAMPLES, samples - start) for start in range(0, samples, MC_BLOCK_SAMPLES)]
+    block_seeds = np.random.SeedSequence(seed).spawn(len(block_sizes))
+    per_chunk = max(1, chunk_samples // MC_BLOCK_SAMPLES)
+    chunks = [(block_sizes[i:i + per_chunk], block_seeds[i:i + per_chunk]) for i in range(0, len(block_sizes), per_chunk)]
+    args = (distributions, providers, retention_period, storage, license_costs, ocr_cost, scanning_cost,
+            lifecycle, monthly_ingest_gb)
+
+    results = []
+    for sizes, seeds in chunks:
+        results.append(_simulate_chunk(sizes, seeds, *args))
+        if progress is not None:
+            progress(len(results) / len(chunks))
+    totals = np.concatenate(results)
+
+    percentiles = np.percentile(totals, MC_PERCENTILES, axis=0)
+    summary = pd.DataFrame({
+        "Provider": providers,
+        "Mean ($)": totals.mean(axis=0),
+        **{f"P{p} ($)": percentiles[i] for i, p in enumerate(MC_PERCENTILES)},
+        "Std ($)": totals.std(axis=0)
+    })
+
+    # Shared bins so the providers' distributions overlay on one axis
+    edges = np.histogram_bin_edges(totals, bins=MC_HISTOGRAM_BINS)
+    counts = np.stack([np.histogram(totals[:, j], bins=edges)[0] for j in range(len(providers))])
+    histogram = pd.DataFrame({
+        "Provider": np.repeat(providers, len(edges) - 1),
+        "Total ($)": np.tile((edges[:-1] + edges[1:]) / 2, len(providers)),
+        "Bin Start ($)": np.tile(edges[:-1], len(providers)),
+        "Bin End ($)": np.tile(edges[1:], len(providers)),
+        "Share": (counts / samples).ravel()
+    })
+    return summary, histogram
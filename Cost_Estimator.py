@@ -1,21 +1,40 @@
-import os
-import requests
+import time
+import uuid
 import pandas as pd
 import streamlit as st
-import fitz  # PyMuPDF
 from datetime import datetime
+from PDF_Ingestion import iter_ingest
+from Ingestion_Cache import INGESTION_CACHE
+from Pricing_Snapshot import PRICING_SNAPSHOTS
+from History_Store import HISTORY_STORE
+from Job_Queue import JOB_QUEUE, poll_job
+from Page_Size_Model import SCAN_COLOUR_MODES, SCAN_DPI_OPTIONS, OCR_TEXT_LAYER_KB, scan_page_kb
+
+
+from Cost_Engine import (
+    AVG_PAGE_SIZE_KB,
+    OCR_COST_PER_PAGE,
+    SCANNING_COST_PER_PAGE,
+    SOFTWARE_LICENSE_COSTS,
+    MANPOWER_MULTIPLIERS,
+    FALLBACK_STORAGE_PRICES,
+    PROVIDERS,
+    estimate_costs,
+    build_lifecycle,
+    resolve_schedules,
+    project_storage_costs,
+    DISTRIBUTIONS,
+    MC_DEFAULT_SAMPLES,
+    MC_MAX_SAMPLES,
+    distribution_spec,
+    describe_distribution
+)
 
 
 # Constants
-AVG_PAGE_SIZE_KB = 350
-OCR_COST_PER_PAGE = 0.001
-SCANNING_COST_PER_PAGE = 0.002
-SOFTWARE_LICENSE_COSTS = {
-    "Amazon S3": 50,
-    "Google Cloud Storage": 40,
-    "Microsoft Azure": 40
-}
-manpower_multiplier = {"Low": 0.03, "Medium": 0.05, "High": 0.08}
+manpower_multiplier = dict(MANPOWER_MULTIPLIERS)  # tweaked in place by the custom pricing sliders
+
+FILE_SUMMARY_COLUMNS = ["File Name", "Size (KB)", "Pages", "Predicted Size (KB)", "OCR Pages", "Scan Profile"]
 
 AWS_REGIONS = [
     "US East (N. Virginia)", "US West (Oregon)", "EU (Ireland)", "Asia Pacific (Singapore)"
@@ -23,17 +42,14 @@ AWS_REGIONS = [
 AZURE_REGIONS = ["eastus", "westeurope", "southeastasia", "australiaeast"]
 GCP_REGIONS = ["us", "eu", "asia"]
 
-def format_metadata(value):
-    return value.strip().title() if value else "N/A"
-
-def format_creation_date(date_str):
-    if date_str and date_str.startswith("D:"):
-        try:
-            date_str = date_str[2:].split("+")[0]
-            return datetime.strptime(date_str, "%Y%m%d%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            return "Invalid Date Format"
-    return "N/A"
+def file_summary_row(result):
+    analysis = result["analysis"]
+    if analysis["dpi"]:
+        profile = f"{analysis['dpi']} DPI {analysis['colour']}"
+    else:
+        profile = "Digital" if analysis["text_share"] else "Unknown"
+    return [result["name"], f"{result['size_kb']:.2f}", result["pages"], f"{analysis['predicted_kb']:.2f}",
+            analysis["ocr_pages"], profile]
 
 def handle_file_input():
     st.markdown("<div class='section-header'>📥 Select Input Method:</div>", unsafe_allow_html=True)
@@ -41,6 +57,8 @@ def handle_file_input():
 
     total_pages = 0
     total_size_kb = 0
+    raw_size_kb = 0
+    ocr_pages = 0
     file_info = []
     pdf_metadata_dict = {}
     uploaded_filenames = set()
@@ -51,46 +69,67 @@ def handle_file_input():
 
 
         if uploaded_files:
+            unique_files = []
             for uploaded_file in uploaded_files:
                 if uploaded_file.name in uploaded_filenames:
                     st.warning(f"⚠️ File '{uploaded_file.name}' is already uploaded and will be skipped.")
                     continue
 
                 uploaded_filenames.add(uploaded_file.name)
-                upload_path = os.path.join("uploads", uploaded_file.name)
-                with open(upload_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-
-                size_kb = os.path.getsize(upload_path) / 1024
-                total_size_kb += size_kb
-
-                with fitz.open(upload_path) as doc:
-                    pages = len(doc)
-                    total_pages += pages
-                    meta = doc.metadata
+                unique_files.append(uploaded_file)
 
-                    pdf_metadata_dict[uploaded_file.name] = {
-                        "Title": format_metadata(meta.get('title', 'N/A')),
-                        "Author": format_metadata(meta.get('author', 'N/A')),
-                        "Creation Date": format_creation_date(meta.get('creationDate', 'N/A')),
-                        "Subject": format_metadata(meta.get('subject', 'N/A'))
-                    }
+            st.markdown("<div class='section-header'>📂 Uploaded File Summary</div>", unsafe_allow_html=True)
+            progress_bar = st.progress(0.0)
+            summary_placeholder = st.empty()
+
+            # Parse in parallel and refresh the summary table as files complete
+            results = [None] * len(unique_files)
+            done = 0
+            last_refresh = 0.0
+            for index, result in iter_ingest(unique_files):
+                results[index] = result
+                done += 1
+                progress_bar.progress(done / len(unique_files), text=f"Processed {done}/{len(unique_files)} PDFs")
+                if time.monotonic() - last_refresh > 0.5 and done < len(unique_files):
+                    last_refresh = time.monotonic()
+                    partial = [file_summary_row(r) for r in results if r and "error" not in r]
+                    with summary_placeholder.container():
+                        display_clean_table(pd.DataFrame(partial, columns=FILE_SUMMARY_COLUMNS))
+            progress_bar.empty()
+
+            for result in results:
+                if "error" in result:
+                    st.error(f"❌ Could not read '{result['name']}': {result['error']}")
+                    continue
 
-                file_info.append([uploaded_file.name, f"{size_kb:.2f}", pages])
+                # Storage is sized on the predicted digitized footprint (file + OCR text layer), not the raw upload
+                raw_size_kb += result["size_kb"]
+                total_size_kb += result["analysis"]["predicted_kb"]
+                total_pages += result["pages"]
+                ocr_pages += result["analysis"]["ocr_pages"]
+                pdf_metadata_dict[result["name"]] = result["metadata"]
+                file_info.append(file_summary_row(result))
 
             size_gb = (total_size_kb / 1024) / 1024
             #st.write(f"📏 DEBUG: total_pages={total_pages}, total_size_kb={total_size_kb}, size_gb={size_gb}")
 
-            st.markdown("<div class='section-header'>📂 Uploaded File Summary</div>", unsafe_allow_html=True)
-            uploaded_file_df = pd.DataFrame(file_info, columns=["File Name", "Size (KB)", "Pages"])
+            uploaded_file_df = pd.DataFrame(file_info, columns=FILE_SUMMARY_COLUMNS)
             df = uploaded_file_df.reset_index(drop=True)
             df.index = [''] * len(df)  # Set empty index
-            display_clean_table(df)
+            with summary_placeholder.container():
+                display_clean_table(df)
+
+            cache_stats = INGESTION_CACHE.get_stats()
+            st.caption(
+                f"🗃️ Ingestion cache: {cache_stats['hits']} hits "
+                f"({cache_stats['memory_hits']} memory, {cache_stats['disk_hits']} disk), {cache_stats['misses']} misses"
+            )
 
             st.markdown("<div class='section-header'>📊 Combined File Details</div>", unsafe_allow_html=True)
             combined_file_df = pd.DataFrame({
-                "Property": ["Total Pages", "Total Size (KB)", "Total Size (GB)", "Type"],
-                "Value": [str(total_pages), f"{total_size_kb:.2f}", f"{size_gb:.2f}", "PDF"]
+                "Property": ["Total Pages", "Pages Needing OCR", "Uploaded Size (KB)", "Predicted Digitized Size (KB)",
+                             "Predicted Digitized Size (GB)", "Type"],
+                "Value": [str(total_pages), str(ocr_pages), f"{raw_size_kb:.2f}", f"{total_size_kb:.2f}", f"{size_gb:.2f}", "PDF"]
             })
             df = combined_file_df.reset_index(drop=True)
             df.index = [''] * len(df)  # Set empty index
@@ -109,13 +148,24 @@ def handle_file_input():
 
     elif option == "Enter Manually":
         total_pages = st.number_input("Enter Total Number of Pages:", min_value=1, step=1)
-        total_size_kb = total_pages * AVG_PAGE_SIZE_KB
+        st.markdown("<div class='section-header'>Page Size Model:</div>", unsafe_allow_html=True)
+        size_model = st.radio("", [f"Average ({AVG_PAGE_SIZE_KB} KB/page)", "Scan Profile"], horizontal=True,
+                              key="page_size_model", label_visibility="collapsed")
+        if size_model == "Scan Profile":
+            col1, col2 = st.columns(2)
+            dpi = col1.selectbox("Scan Resolution (DPI)", SCAN_DPI_OPTIONS, index=SCAN_DPI_OPTIONS.index(300))
+            colour_mode = col2.selectbox("Colour Mode", list(SCAN_COLOUR_MODES), index=1)
+            # Paper scans all get OCR, so each page carries a text layer as well
+            page_size_kb = scan_page_kb(dpi, colour_mode) + OCR_TEXT_LAYER_KB
+        else:
+            page_size_kb = AVG_PAGE_SIZE_KB
+        total_size_kb = total_pages * page_size_kb
         size_gb = (total_size_kb / 1024) / 1024
 
         st.subheader(" 📂 Manual Entry Details")
         manual_df = pd.DataFrame({
-            "Property": ["Total Pages", "Estimated Total Size (GB)", "Type"],
-            "Value": [str(total_pages), f"{size_gb:.2f}", "Manual"]
+            "Property": ["Total Pages", "Size per Page (KB)", "Estimated Total Size (GB)", "Type"],
+            "Value": [str(total_pages), f"{page_size_kb:.1f}", f"{size_gb:.2f}", "Manual"]
         })
         df = manual_df.reset_index(drop=True)
         df.index = [''] * len(df)  # Set empty index
@@ -123,52 +173,19 @@ def handle_file_input():
 
     return total_pages, total_size_kb
 
-# Cloud API pricing
-@st.cache_data(ttl=3600)
+# Cloud API pricing (shared on-disk snapshot, refreshed concurrently by Pricing_Service)
 def get_gcp_storage_price(region_code="us"):
-    try:
-        url = "https://cloudpricingcalculator.appspot.com/static/data/pricelist.json"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        return float(data["CP-STORAGE-MULTI-REGIONAL"][region_code]["USD"])
-    except:
-        return None
+    return PRICING_SNAPSHOTS.get_price("Google Cloud Storage", region_code)[0]
 
-@st.cache_data(ttl=3600)
 def get_aws_storage_price(region_name="US East (N. Virginia)"):
-    try:
-        url = "https://pricing.us-east-1.amazonaws.com/offers/v1.0/aws/AmazonS3/current/index.json"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        terms = data.get("terms", {}).get("OnDemand", {})
-        products = data.get("products", {})
-
-        for sku, product in products.items():
-            attr = product.get("attributes", {})
-            if attr.get("storageClass") == "Standard" and attr.get("location") == region_name:
-                sku_terms = terms.get(sku, {})
-                if sku_terms:
-                    price_dimensions = next(iter(sku_terms.values()))
-                    price_per_gb = list(price_dimensions["priceDimensions"].values())[0]["pricePerUnit"]["USD"]
-                    return float(price_per_gb)
-    except:
-        return None
+    return PRICING_SNAPSHOTS.get_price("Amazon S3", region_name)[0]
 
-@st.cache_data(ttl=3600)
 def get_azure_storage_price(region_code="eastus"):
-    try:
-        url = (
-            f"https://prices.azure.com/api/retail/prices"
-            f"?$filter=serviceName eq 'Storage' and armRegionName eq '{region_code}'"
-            f" and skuName eq 'Hot LRS' and meterName eq 'Data Stored'"
-        )
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        items = data.get("Items", [])
-        if items:
-            return float(items[0]["retailPrice"])
-    except:
-        return None
+    return PRICING_SNAPSHOTS.get_price("Microsoft Azure", region_code)[0]
+
+def get_storage_prices(targets):
+    # targets: (provider, region) pairs -> {(provider, region): price or None}
+    return {target: price for target, (price, _) in PRICING_SNAPSHOTS.get_prices(targets).items()}
 
 
 def cost_estimation_ui(total_pages, size_gb):
@@ -181,22 +198,20 @@ def cost_estimation_ui(total_pages, size_gb):
     if storage_provider == "Amazon S3":
         st.markdown("<div class='section-header'>Select AWS Region</div>", unsafe_allow_html=True)
         region = st.selectbox("", AWS_REGIONS,label_visibility="collapsed")
-        STORAGE_COST_PER_GB = get_aws_storage_price(region)
     elif storage_provider == "Google Cloud Storage":
         st.markdown("<div class='section-header'>Select GCP Region</div>", unsafe_allow_html=True)
         region = st.selectbox("", GCP_REGIONS,label_visibility="collapsed")
-        STORAGE_COST_PER_GB = get_gcp_storage_price(region)
     elif storage_provider == "Microsoft Azure":
         st.markdown("<div class='section-header'>Select Azure Region</div>", unsafe_allow_html=True)
         region = st.selectbox("", AZURE_REGIONS,label_visibility="collapsed")
-        STORAGE_COST_PER_GB = get_azure_storage_price(region)
+    STORAGE_COST_PER_GB, snapshot_time = PRICING_SNAPSHOTS.get_price(storage_provider, region)
 
     if STORAGE_COST_PER_GB is not None:
-        st.success(f"Live Pricing for {storage_provider}: ${STORAGE_COST_PER_GB:.2f} per GB/month")
+        snapshot_label = datetime.fromtimestamp(snapshot_time).strftime("%Y-%m-%d %H:%M")
+        st.success(f"Live Pricing for {storage_provider}: ${STORAGE_COST_PER_GB:.2f} per GB/month (snapshot {snapshot_label})")
     else:
-        fallback = {"Amazon S3": 0.023, "Google Cloud Storage": 0.020, "Microsoft Azure": 0.020}
         st.warning("⚠️ Using fallback storage rate.")
-        STORAGE_COST_PER_GB = fallback[storage_provider]
+        STORAGE_COST_PER_GB = FALLBACK_STORAGE_PRICES[storage_provider]
 
     # Define license cost and other inputs
     license_cost = SOFTWARE_LICENSE_COSTS[storage_provider]
@@ -206,6 +221,23 @@ def cost_estimation_ui(total_pages, size_gb):
     st.markdown("<div class='section-header'>Select Manpower Effort Level</div>", unsafe_allow_html=True)
     manpower_effort = st.selectbox("", ["Low", "Medium", "High"],label_visibility="collapsed")
 
+    # Tiered pricing & lifecycle
+    use_lifecycle = st.checkbox("📦 Apply Tiered Pricing & Storage Lifecycle")
+    lifecycle = None
+    monthly_ingest_gb = 0.0
+    if use_lifecycle:
+        st.markdown("<div class='section-header'>Move to Infrequent Access after (months, 0 = never):</div>", unsafe_allow_html=True)
+        infrequent_after = st.number_input("", min_value=0, value=3, step=1, key="infrequent_after", label_visibility="collapsed")
+        st.markdown("<div class='section-header'>Move to Archive after (months, 0 = never):</div>", unsafe_allow_html=True)
+        archive_after = st.number_input("", min_value=0, value=12, step=1, key="archive_after", label_visibility="collapsed")
+        st.markdown("<div class='section-header'>Additional Data Ingested per Month (GB):</div>", unsafe_allow_html=True)
+        monthly_ingest_gb = st.number_input("", min_value=0.0, value=0.0, step=1.0, key="monthly_ingest_gb", label_visibility="collapsed")
+        if 0 < archive_after <= infrequent_after:
+            st.warning("⚠️ Data reaches Archive before Infrequent Access, so the Infrequent Access step is skipped. "
+                       "Set it below the Archive month to use both.")
+            infrequent_after = 0
+        lifecycle = build_lifecycle(infrequent_after, archive_after)
+
     # Custom Pricing
     use_custom = st.checkbox("🔧 Enable Custom Pricing")
     if use_custom:
@@ -226,34 +258,67 @@ def cost_estimation_ui(total_pages, size_gb):
         ocr_cost = OCR_COST_PER_PAGE
         scanning_cost = SCANNING_COST_PER_PAGE
 
+    # Monte Carlo: uncertain page count, page size and manpower rate instead of single guesses
+    with st.expander("🎲 Uncertainty Analysis (Monte Carlo)"):
+        use_monte_carlo = st.checkbox("Simulate uncertain inputs", key="mc_enabled")
+        if use_monte_carlo:
+            st.markdown("<div class='section-header'>Number of Samples:</div>", unsafe_allow_html=True)
+            mc_samples = st.number_input("", min_value=10000, max_value=MC_MAX_SAMPLES, value=MC_DEFAULT_SAMPLES, step=10000,
+                                         key="mc_samples", label_visibility="collapsed")
+            page_size_kb = size_gb * 1024 * 1024 / total_pages if total_pages else AVG_PAGE_SIZE_KB
+            rate = manpower_multiplier[manpower_effort]
+            mc_distributions = {
+                "pages": distribution_input("Page Count", "mc_pages", total_pages * 0.8, total_pages, total_pages * 1.3, 1.0),
+                "page_size_kb": distribution_input("Page Size (KB)", "mc_page_size", page_size_kb * 0.7, page_size_kb, page_size_kb * 1.5, 1.0),
+                "manpower_rate": distribution_input("Manpower Rate ($/page)", "mc_rate", rate * 0.7, rate, rate * 1.4, 0.001)
+            }
+
     # Perform Cost Estimation
     if st.button("🚀 Estimate Cost"):
-        storage_cost = size_gb * STORAGE_COST_PER_GB * retention_period
-        ocr_total = total_pages * ocr_cost
-        manpower_total = total_pages * manpower_multiplier[manpower_effort]
-        scanning_total = total_pages * scanning_cost
-        subtotal = storage_cost + ocr_total + manpower_total + scanning_total
-        final_total = subtotal + license_cost
+        # Same tiered model as the multi-provider comparison, so a provider shows one storage total.
+        # A custom or fallback rate replaces the Standard schedule, as in provider_schedules.
+        live_schedule, _ = PRICING_SNAPSHOTS.get_schedule(storage_provider, region)
+        schedules = resolve_schedules(
+            storage_provider, live_schedule, standard_price=STORAGE_COST_PER_GB if use_custom or not live_schedule else None
+        )
+        storage_total = project_storage_costs(size_gb, retention_period, schedules, lifecycle, monthly_ingest_gb)[0]
+        st.session_state["storage_model"] = {
+            "provider": storage_provider, "schedules": schedules, "lifecycle": lifecycle, "monthly_ingest_gb": monthly_ingest_gb
+        }
+
+        estimate = estimate_costs(
+            pages=total_pages,
+            size_gb=size_gb,
+            storage_price=STORAGE_COST_PER_GB,
+            retention_period=retention_period,
+            manpower_rate=manpower_multiplier[manpower_effort],
+            ocr_cost=ocr_cost,
+            scanning_cost=scanning_cost,
+            license_cost=license_cost,
+            storage_total=storage_total
+        ).iloc[0]
+        storage_cost = estimate["Storage ($)"]
+        ocr_total = estimate["OCR ($)"]
+        manpower_total = estimate["Manpower ($)"]
+        scanning_total = estimate["Scanning ($)"]
+        subtotal = estimate["Subtotal ($)"]
+        final_total = estimate["Total ($)"]
 
         st.markdown("<div class='section-header'>💰 Cost Breakdown</div>", unsafe_allow_html=True)
         cost_df = pd.DataFrame({
             "Cost Component": ["Storage", "OCR Processing", "Manpower", "Scanning", "Total Estimated"],
-            "Amount ($)": [f"{storage_cost:.2f}", f"{ocr_total:.2f}", f"{manpower_total:.2f}", f"{scanning_total:.2f}", f"{subtotal:.2f}"]
+            "Amount ($)": [round(float(v), 2) for v in (storage_cost, ocr_total, manpower_total, scanning_total, subtotal)]
         })
 
         st.session_state["cost_df"] = cost_df
         st.markdown(f"🔐 **Software License Cost:** ${license_cost:.2f}")
-        display_clean_table(cost_df)
+        # Amounts stay numeric for history and charts; only the displayed copy is formatted
+        display_clean_table(cost_df.assign(**{"Amount ($)": cost_df["Amount ($)"].map("{:.2f}".format)}))
         st.session_state["cost_df"] = cost_df
 
-        # ✅ Save to master history (all-time, across sessions)
-        history_dir = "history"
-        os.makedirs(history_dir, exist_ok=True)
-
         # Add timestamp for tracking
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        # Append to master_history.csv
         entry_with_time = {
             "Timestamp": timestamp,
             "Pages": total_pages,
@@ -278,23 +343,17 @@ def cost_estimation_ui(total_pages, size_gb):
         if current_entry not in st.session_state.history:
             st.session_state.history.append(current_entry)
 
-        # ✅ Save to CSV file
-        history_df = pd.DataFrame(st.session_state.history)
-        os.makedirs("history", exist_ok=True)
-        history_df.to_csv(os.path.join("history", "session_history.csv"), index=False)
-
-        history_path = os.path.join(history_dir, "master_history.csv")
-        history_df = pd.DataFrame([entry_with_time])
-        history_df.to_csv(history_path, mode="a", header=not os.path.exists(history_path), index=False)
-
-        # Append to master_cost_breakdown.csv
-        if cost_df is not None:
-            cost_df["Provider"] = storage_provider
-            cost_df["Timestamp"] = timestamp
-            cost_path = os.path.join(history_dir, "master_cost_breakdown.csv")
-            cost_df.to_csv(cost_path, mode="a", header=not os.path.exists(cost_path), index=False)
-
+        # ✅ Save to master history (all-time, across sessions) in one atomic insert
+        if "session_id" not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
+        HISTORY_STORE.record_estimate(
+            entry_with_time,
+            zip(cost_df["Cost Component"], cost_df["Amount ($)"]),
+            session_id=st.session_state.session_id
+        )
 
+        # The selected provider's custom license cost applies to the comparison and the simulation too
+        license_costs = dict(SOFTWARE_LICENSE_COSTS, **{storage_provider: license_cost})
         multi_provider_results = calculate_all_provider_costs(
             total_pages=total_pages,
             size_gb=size_gb,
@@ -303,46 +362,132 @@ def cost_estimation_ui(total_pages, size_gb):
             ocr_cost=ocr_cost,
             scanning_cost=scanning_cost,
             manpower_multiplier=manpower_multiplier,
-            software_license_costs=SOFTWARE_LICENSE_COSTS,
-            fallback_prices={"Amazon S3": 0.023, "Google Cloud Storage": 0.020, "Microsoft Azure": 0.020}
+            software_license_costs=license_costs,
+            fallback_prices=FALLBACK_STORAGE_PRICES,
+            lifecycle=lifecycle,
+            monthly_ingest_gb=monthly_ingest_gb,
+            selected=(storage_provider, schedules)
         )
 
         # Store in session for later use (visualization/reporting)
         st.session_state["multi_provider_comparison"] = multi_provider_results
 
+        # The simulation runs as a background job, so a large run doesn't block the script
+        st.session_state.pop("monte_carlo_job", None)
+        if use_monte_carlo and None in mc_distributions.values():
+            st.warning("⚠️ Monte Carlo skipped: fix the uncertainty inputs above.")
+        elif use_monte_carlo:
+            simulation = {
+                "distributions": mc_distributions,
+                "retention_period": retention_period,
+                "samples": int(mc_samples),
+                "price_schedules": dict(provider_schedules(FALLBACK_STORAGE_PRICES), **{storage_provider: schedules}),
+                "license_costs": license_costs,
+                "ocr_cost": ocr_cost,
+                "scanning_cost": scanning_cost,
+                "lifecycle": lifecycle,
+                "monthly_ingest_gb": monthly_ingest_gb
+            }
+            st.session_state["monte_carlo_job"] = {
+                "job": JOB_QUEUE.submit("monte_carlo", {"simulation": simulation}, session_id=st.session_state.session_id),
+                "samples": int(mc_samples),
+                "retention": retention_period,
+                "inputs": {
+                    "Page Count": describe_distribution(mc_distributions["pages"]),
+                    "Page Size (KB)": describe_distribution(mc_distributions["page_size_kb"]),
+                    "Manpower Rate ($/page)": describe_distribution(mc_distributions["manpower_rate"])
+                }
+            }
+        show_monte_carlo()
 
         return current_entry
 
-def calculate_all_provider_costs(total_pages, size_gb, retention_period, manpower_effort, ocr_cost, scanning_cost, manpower_multiplier, software_license_costs, fallback_prices):
-    provider_costs = []
-
-    for provider in ["Amazon S3", "Google Cloud Storage", "Microsoft Azure"]:
-        if provider == "Amazon S3":
-            storage_price = get_aws_storage_price("US East (N. Virginia)") or fallback_prices["Amazon S3"]
-        elif provider == "Google Cloud Storage":
-            storage_price = get_gcp_storage_price("us") or fallback_prices["Google Cloud Storage"]
-        elif provider == "Microsoft Azure":
-            storage_price = get_azure_storage_price("eastus") or fallback_prices["Microsoft Azure"]
-
-        storage_cost = size_gb * storage_price * retention_period
-        ocr_total = total_pages * ocr_cost
-        scanning_total = total_pages * scanning_cost
-        manpower_total = total_pages * manpower_multiplier[manpower_effort]
-        license_cost = software_license_costs[provider]
-        total = storage_cost + ocr_total + scanning_total + manpower_total + license_cost
-
-        provider_costs.append({
-            "Provider": provider,
-            "Storage ($)": round(storage_cost, 2),
-            "OCR ($)": round(ocr_total, 2),
-            "Scanning ($)": round(scanning_total, 2),
-            "Manpower ($)": round(manpower_total, 2),
-            "License ($)": round(license_cost, 2),
-            "Total ($)": round(total, 2)
-        })
+    show_monte_carlo()
+
+def show_monte_carlo():
+    # Polls the submitted simulation; its result becomes st.session_state["monte_carlo"] for charts/reports
+    pending = st.session_state.get("monte_carlo_job")
+    if pending is None:
+        return
+    st.markdown("<div class='section-header'>🎲 Cost Uncertainty (P10 / P50 / P90)</div>", unsafe_allow_html=True)
+
+    def render(result):
+        monte_carlo = st.session_state.get("monte_carlo")
+        if monte_carlo is None or monte_carlo["run_id"] != pending["job"]:
+            monte_carlo = {
+                "run_id": pending["job"],
+                "samples": pending["samples"],
+                "retention": pending["retention"],
+                "inputs": pending["inputs"],
+                "summary": pd.DataFrame(result["summary"]),
+                "histogram": pd.DataFrame(result["histogram"])
+            }
+            st.session_state["monte_carlo"] = monte_carlo
+        display_clean_table(monte_carlo["summary"].round(2))
+        st.caption(f"{pending['samples']:,} samples over a {pending['retention']}-month retention. "
+                   "P10/P90: 10% of simulated outcomes fall below/above.")
+
+    poll_job(pending["job"], render)
+
+def provider_schedules(fallback_prices):
+    # Price schedules per provider at its default region: live where the snapshot has one, else fallback
+    default_regions = (
+        ("Amazon S3", "US East (N. Virginia)"),
+        ("Google Cloud Storage", "us"),
+        ("Microsoft Azure", "eastus")
+    )
+    live_schedules = PRICING_SNAPSHOTS.get_prices(default_regions, with_schedule=True)
+    schedules = {}
+    for provider, region in default_regions:
+        live_schedule = live_schedules[(provider, region)][0]
+        fallback = None if live_schedule else fallback_prices[provider]
+        schedules[provider] = resolve_schedules(provider, live_schedule, standard_price=fallback)
+    return schedules
+
+def distribution_input(label, key, low, mode, high, step):
+    # Distribution picker + low / most likely / high inputs -> Cost_Engine distribution spec
+    st.markdown(f"<div class='section-header'>{label}:</div>", unsafe_allow_html=True)
+    cols = st.columns(4)
+    dist = cols[0].selectbox("Distribution", DISTRIBUTIONS, index=1, key=f"{key}_dist")
+    low = cols[1].number_input("Low", min_value=0.0, value=float(low), step=step, key=f"{key}_low")
+    mode = cols[2].number_input("Most likely", min_value=0.0, value=float(mode), step=step, key=f"{key}_mode")
+    high = cols[3].number_input("High", min_value=0.0, value=float(high), step=step, key=f"{key}_high")
+    if not low <= mode <= high:
+        st.warning(f"⚠️ {label}: expected Low ≤ Most likely ≤ High; the range was widened to include the most likely value.")
+    try:
+        return distribution_spec(dist, min(low, mode), mode, max(high, mode))
+    except ValueError as e:
+        st.warning(f"⚠️ {label}: {e}.")
+        return None
+
+def calculate_all_provider_costs(total_pages, size_gb, retention_period, manpower_effort, ocr_cost, scanning_cost, manpower_multiplier, software_license_costs, fallback_prices, lifecycle=None, monthly_ingest_gb=0.0, selected=None):
+    # Compare providers on their tiered schedules (and lifecycle, if one is set). `selected` is the
+    # (provider, schedules) the estimate used -- its region and any custom rate -- so that row matches it.
+    schedules = provider_schedules(fallback_prices)
+    if selected is not None:
+        schedules[selected[0]] = selected[1]
+    storage_totals = [
+        project_storage_costs(size_gb, retention_period, schedules[provider], lifecycle, monthly_ingest_gb)[0]
+        for provider in PROVIDERS
+    ]
+
+    # One vectorized pass over all providers
+    costs = estimate_costs(
+        pages=total_pages,
+        size_gb=size_gb,
+        storage_price=0.0,
+        retention_period=retention_period,
+        manpower_rate=manpower_multiplier[manpower_effort],
+        ocr_cost=ocr_cost,
+        scanning_cost=scanning_cost,
+        license_cost=[software_license_costs[p] for p in PROVIDERS],
+        storage_total=storage_totals
+    )
+    costs = costs.drop(columns=["Subtotal ($)"]).round(2)
+    costs.insert(0, "Provider", PROVIDERS)
+
+    return costs.to_dict(orient="records")
 
-    return provider_costs
-    
 def get_recommended_provider(results_df: pd.DataFrame):
     if results_df.empty:
         st.warning("No provider results available for recommendation.")
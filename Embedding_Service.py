@@ -0,0 +1,198 @@
+import os
+import time
+import queue
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+import numpy as np
+
+# Shared embedding service. Requests from every session are queued, coalesced for a few
+# milliseconds, deduplicated (within the batch and against recently embedded chunks, so the same
+# boilerplate page in twenty reports is embedded once), sorted by length and cut into batches whose
+# padded size fits a token budget. Batches run on worker processes that each own a model and a
+# fixed share of the cores; on small hosts they run in-process instead.
+
+COALESCE_SECONDS = 0.005
+MAX_BATCH_TOKENS = 16384  # batch size x longest text, roughly what one forward pass pads to
+MAX_BATCH_SIZE = 256
+MAX_SEQ_TOKENS = 256
+CHARS_PER_TOKEN = 4
+VECTOR_CACHE_ENTRIES = 20000
+
+_worker_model = None
+
+
+def _set_threads(threads):
+    # Worker processes only: these are process-wide settings
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+def _worker_init(model_name, threads):
+    # Each worker owns `threads` cores so workers don't oversubscribe the CPU between them
+    global _worker_model
+    _set_threads(threads)
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name)
+
+def _worker_encode(texts):
+    vectors = _worker_model.encode(texts, batch_size=len(texts), convert_to_numpy=True, normalize_embeddings=True)
+    return np.asarray(vectors, dtype=np.float32)
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    return min(4, cores // 4)  # 0 on small hosts: embed in-process
+
+def text_key(text):
+    return hashlib.sha1(text.encode("utf-8", "surrogatepass")).digest()
+
+def plan_batches(texts, max_batch_tokens=MAX_BATCH_TOKENS, max_batch_size=MAX_BATCH_SIZE):
+    # -> lists of indices into texts; similar lengths share a batch so little is wasted on padding
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    batches, current, longest = [], [], 0
+    for i in order:
+        tokens = min(MAX_SEQ_TOKENS, max(1, len(texts[i]) // CHARS_PER_TOKEN))
+        if current and (len(current) >= max_batch_size or max(longest, tokens) * (len(current) + 1) > max_batch_tokens):
+            batches.append(current)
+            current, longest = [], 0
+        current.append(i)
+        longest = max(longest, tokens)
+    if current:
+        batches.append(current)
+    return batches
+
+class EmbeddingService:
+    def __init__(self, model_name, workers=None, threads_per_worker=None, cache_entries=VECTOR_CACHE_ENTRIES):
+        self.model_name = model_name
+        self.workers = default_workers() if workers is None else workers
+        cores = os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or max(1, cores // max(1, self.workers))
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()  # text key -> vector
+        self._queue = queue.Queue()
+        self._pool = None
+        self._model = None
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        self._stats = {"requests": 0, "texts": 0, "embedded": 0, "deduplicated": 0, "batches": 0, "encode_seconds": 0.0}
+
+    # ----------------- Public API --------------------
+    def embed(self, texts):
+        # Blocking: -> (len(texts), dim) float32, L2-normalised
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        future = Future()
+        self._ensure_dispatcher()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_vectors"] = len(self._cache)
+        stats["chunks_per_second"] = stats["embedded"] / stats["encode_seconds"] if stats["encode_seconds"] else 0.0
+        return stats
+
+    # ----------------- Dispatch --------------------
+    def _ensure_dispatcher(self):
+        with self._lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._run, name="embedding-dispatcher", daemon=True)
+                self._dispatcher.start()
+
+    def _run(self):
+        while True:
+            requests = [self._queue.get()]
+            deadline = time.monotonic() + COALESCE_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    requests.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._serve(requests)
+            except Exception as e:
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _serve(self, requests):
+        keys = [[text_key(t) for t in texts] for texts, _ in requests]
+        vectors = {}
+        todo = {}
+        with self._lock:
+            for (texts, _), request_keys in zip(requests, keys):
+                for text, key in zip(texts, request_keys):
+                    cached = self._cache.get(key)
+                    if cached is not None:
+                        self._cache.move_to_end(key)
+                        vectors[key] = cached
+                    else:
+                        todo.setdefault(key, text)
+            total = sum(len(k) for k in keys)
+            self._stats["requests"] += len(requests)
+            self._stats["texts"] += total
+            self._stats["deduplicated"] += total - len(todo)
+
+        if todo:
+            todo_keys, todo_texts = list(todo), list(todo.values())
+            started = time.perf_counter()
+            batches = plan_batches(todo_texts)
+            for batch, result in zip(batches, self._encode_batches([[todo_texts[i] for i in b] for b in batches])):
+                for i, vector in zip(batch, result):
+                    vectors[todo_keys[i]] = vector
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                for key in todo_keys:
+                    self._cache[key] = vectors[key]
+                while len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+                self._stats["embedded"] += len(todo_keys)
+                self._stats["batches"] += len(batches)
+                self._stats["encode_seconds"] += elapsed
+
+        for (_, future), request_keys in zip(requests, keys):
+            future.set_result(np.stack([vectors[k] for k in request_keys]))
+
+    def _encode_batches(self, batches):
+        if self.workers <= 0:
+            if self._model is None:
+                # Thread settings are process-wide, so in-process mode keeps the server's own
+                # (shared with every session and the summarizer); only spawned workers set them
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name)
+            return [
+                np.asarray(self._model.encode(b, batch_size=len(b), convert_to_numpy=True, normalize_embeddings=True), dtype=np.float32)
+                for b in batches
+            ]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_worker_init,
+                initargs=(self.model_name, self.threads_per_worker)
+            )
+        # Every worker gets batches at once; results come back in batch order
+        return list(self._pool.map(_worker_encode, batches))
+
+
+def langchain_embeddings(service):
+    # LangChain Embeddings adapter so FAISS/RetrievalQA embed through the shared service
+    from langchain_core.embeddings import Embeddings
+
+    class ServiceEmbeddings(Embeddings):
+        def embed_documents(self, texts):
+            return service.embed(texts).tolist()
+
+        def embed_query(self, text):
+            return service.embed([text])[0].tolist()
+
+    return ServiceEmbeddings()
@@ -0,0 +1,363 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+import numpy as np
+from Model_Registry import SENTENCE_MODEL_NAME
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+# Persistent chunk embeddings for the Project Assistant. Everything per chunk is append-only:
+# L2-normalised float32 rows in vectors.f32 (memory-mapped for queries), one JSON line per chunk
+# snippet in chunks.jsonl and that line's byte offset in chunks.idx. meta.json only holds per-file
+# fingerprints and row ranges, so a sync writes in proportion to what changed, not to the corpus.
+# Syncing against uploads/ only embeds new or changed files and tombstones removed ones, so a query
+# embeds nothing but the query itself. Larger corpora are searched through a faiss HNSW index when
+# faiss is installed; it is extended with the new rows on each sync and saved next to the vectors,
+# so other processes load it instead of rebuilding it. Everything else uses an exact matrix product.
+
+STORE_DIR = os.path.join("cache", "embeddings")
+STORE_VERSION = 3  # bump when chunking, snippets or the file layout change; older stores are rebuilt
+ANN_MIN_ROWS = 4096  # below this an exact scan is already sub-millisecond
+HNSW_NEIGHBOURS = 32
+HNSW_EF_SEARCH = 64
+COMPACT_DEAD_FRACTION = 0.3
+SNIPPET_CHARS = 500
+COPY_ROWS = 8192
+
+
+def top_k_indices(scores, k):
+    # O(n) selection of the k best, then a sort of just those k
+    k = min(k, scores.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+def _fingerprint(path):
+    try:
+        st_info = os.stat(path)
+    except OSError:
+        return None
+    return [st_info.st_mtime_ns, st_info.st_size]
+
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def live_mask(meta):
+    # Rows of files still in the store; anything else is a tombstone awaiting compaction
+    live = np.zeros(meta["rows"], dtype=bool)
+    for info in meta["files"].values():
+        live[info["rows"][0]:info["rows"][1]] = True
+    return live
+
+class EmbeddingStore:
+    def __init__(self, store_dir=STORE_DIR, model_name=None, ann_min_rows=ANN_MIN_ROWS):
+        self.store_dir = store_dir
+        self.model_name = model_name
+        self.ann_min_rows = ann_min_rows
+        self._lock = threading.RLock()
+        self._meta = None
+        self._live = None
+        self._vectors = None
+        self._offsets = None
+        self._ann = None
+        self._meta_mtime = None
+
+    # ----------------- Files --------------------
+    def _file(self, name):
+        return os.path.join(self.store_dir, name)
+
+    def _ann_file(self, version):
+        return self._file(f"ann-{version}.faiss")
+
+    @contextmanager
+    def _file_lock(self):
+        # One writer across processes sharing cache/
+        os.makedirs(self.store_dir, exist_ok=True)
+        with open(self._file("store.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _empty_meta(self, dim=None):
+        return {"version": STORE_VERSION, "model": self.model_name, "dim": dim, "corpus_version": 0,
+                "rows": 0, "snippet_bytes": 0, "files": {}, "ann_rows": 0, "ann_version": None}
+
+    def _size(self, name):
+        try:
+            return os.stat(self._file(name)).st_size
+        except OSError:
+            return 0
+
+    def _load(self):
+        # (Re)reads meta.json when another process changed it; vectors and snippets are remapped alongside
+        path = self._file("meta.json")
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._meta is not None and mtime == self._meta_mtime:
+            return
+        meta = None
+        if mtime is not None:
+            try:
+                with open(path, "r") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = None
+        if meta is None or meta.get("version") != STORE_VERSION or meta.get("model") != self.model_name:
+            meta = self._empty_meta()
+        elif (self._size("vectors.f32") < meta["rows"] * (meta["dim"] or 0) * 4
+              or self._size("chunks.idx") < meta["rows"] * 8 or self._size("chunks.jsonl") < meta["snippet_bytes"]):
+            # Files were rewritten (or lost) under this metadata; start over rather than misread rows
+            meta = self._empty_meta()
+        self._set_meta(meta, mtime)
+
+    def _set_meta(self, meta, mtime):
+        self._meta = meta
+        self._meta_mtime = mtime
+        self._live = live_mask(meta)
+        self._vectors = None
+        self._offsets = None
+        self._ann = None
+
+    def _save_meta(self, meta):
+        path = self._file("meta.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+        self._set_meta(meta, os.stat(path).st_mtime_ns)
+
+    def _matrix(self):
+        if self._vectors is None:
+            rows, dim = self._meta["rows"], self._meta["dim"]
+            if not rows or not dim:
+                self._vectors = np.empty((0, dim or 0), dtype=np.float32)
+            else:
+                self._vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(rows, dim))
+        return self._vectors
+
+    def _chunk(self, row):
+        if self._offsets is None:
+            self._offsets = np.memmap(self._file("chunks.idx"), dtype=np.int64, mode="r", shape=(self._meta["rows"],))
+        with open(self._file("chunks.jsonl"), "rb") as f:
+            f.seek(int(self._offsets[row]))
+            filename, page, text = json.loads(f.readline())
+        return {"filename": filename, "page": page, "text": text}
+
+    # ----------------- Sync --------------------
+    def sync(self, files, chunk_source, embed_fn):
+        # files: {filename: path}; chunk_source({filename: path}) yields (filename, chunk dicts with
+        # filename/page/text) per file, e.g. Text_Extraction.iter_file_chunks, so each file is embedded
+        # as soon as it is extracted; embed_fn(texts) -> (n, dim) array. Returns True when anything changed.
+        with self._lock:
+            # Fast path for the common case (nothing uploaded or removed): no writer lock, no copy
+            self._load()
+            current = {f: info["fingerprint"] for f, info in self._meta["files"].items()}
+            if current == {f: _fingerprint(p) for f, p in files.items()}:
+                return False
+
+        with self._lock, self._file_lock():
+            self._meta_mtime = None  # always re-read under the writer lock
+            self._load()
+            meta = json.loads(json.dumps(self._meta))  # per-file entries only, so this copy stays small
+
+            wanted = {}
+            for filename, path in files.items():
+                fingerprint = _fingerprint(path)
+                if fingerprint is not None:
+                    wanted[filename] = (path, fingerprint)
+
+            stale = [f for f, info in meta["files"].items() if f not in wanted or info["fingerprint"] != wanted[f][1]]
+            for filename in stale:
+                del meta["files"][filename]  # its rows become tombstones
+            changed = bool(stale)
+
+            with open(self._file("vectors.f32"), "a+b") as vectors_file, \
+                    open(self._file("chunks.jsonl"), "a+b") as chunks_file, \
+                    open(self._file("chunks.idx"), "a+b") as offsets_file:
+                # Drop anything a crashed writer appended without recording it in meta.json
+                vectors_file.truncate(meta["rows"] * (meta["dim"] or 0) * 4)
+                chunks_file.truncate(meta["snippet_bytes"])
+                offsets_file.truncate(meta["rows"] * 8)
+                todo = {f: path for f, (path, _) in wanted.items() if f not in meta["files"]}
+                for filename, chunks in chunk_source(todo):
+                    fingerprint = wanted[filename][1]
+                    chunks = [c for c in chunks if c["text"].strip()]
+                    start = meta["rows"]
+                    if chunks:
+                        vectors = normalize_rows(embed_fn([c["text"] for c in chunks]))
+                        if meta["dim"] is None:
+                            meta["dim"] = int(vectors.shape[1])
+                        vectors_file.write(np.ascontiguousarray(vectors).tobytes())
+                        lines = [
+                            (json.dumps([c["filename"], c["page"], c["text"][:SNIPPET_CHARS]]) + "\n").encode("utf-8")
+                            for c in chunks
+                        ]
+                        offsets = meta["snippet_bytes"] + np.concatenate([[0], np.cumsum([len(l) for l in lines[:-1]])])
+                        chunks_file.write(b"".join(lines))
+                        offsets_file.write(offsets.astype(np.int64).tobytes())
+                        meta["snippet_bytes"] += sum(len(l) for l in lines)
+                        meta["rows"] += len(chunks)
+                    meta["files"][filename] = {"fingerprint": fingerprint, "rows": [start, meta["rows"]]}
+                    changed = True
+
+            if not changed:
+                return False
+            meta["corpus_version"] += 1
+            live = live_mask(meta)
+            if live.size and 1 - live.mean() > COMPACT_DEAD_FRACTION:
+                meta = self._compact(meta, live)
+                live = live_mask(meta)
+            self._update_ann(meta, live)
+            previous_ann = self._meta.get("ann_version")
+            self._save_meta(meta)
+            if previous_ann is not None and previous_ann != meta["ann_version"]:
+                try:
+                    os.remove(self._ann_file(previous_ann))
+                except OSError:
+                    pass
+            return True
+
+    def _compact(self, meta, live):
+        # Rewrites the row files with only live rows and renumbers the per-file ranges
+        keep = np.flatnonzero(live)
+        old_vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(live.size, meta["dim"]))
+        old_offsets = np.array(np.memmap(self._file("chunks.idx"), dtype=np.int64, mode="r", shape=(live.size,)))
+        ends = np.append(old_offsets[1:], meta["snippet_bytes"])
+        suffix = f".{os.getpid()}.tmp"
+        with open(self._file("vectors.f32" + suffix), "wb") as vectors_file, \
+                open(self._file("chunks.jsonl" + suffix), "wb") as chunks_file, \
+                open(self._file("chunks.jsonl"), "rb") as old_chunks:
+            for start in range(0, keep.size, COPY_ROWS):
+                rows = keep[start:start + COPY_ROWS]
+                vectors_file.write(np.ascontiguousarray(old_vectors[rows]).tobytes())
+                for row in rows:
+                    old_chunks.seek(int(old_offsets[row]))
+                    chunks_file.write(old_chunks.read(int(ends[row] - old_offsets[row])))
+        del old_vectors
+        lengths = ends[keep] - old_offsets[keep]
+        offsets = np.concatenate([[0], np.cumsum(lengths[:-1])]) if keep.size else np.empty(0)
+        offsets.astype(np.int64).tofile(self._file("chunks.idx" + suffix))
+        for name in ("vectors.f32", "chunks.jsonl", "chunks.idx"):
+            os.replace(self._file(name + suffix), self._file(name))
+
+        before = np.concatenate([[0], np.cumsum(live)])  # live rows ahead of each old row = its new row
+        for info in meta["files"].values():
+            first, last = info["rows"]
+            info["rows"] = [int(before[first]), int(before[first]) + last - first]
+        meta["rows"] = int(keep.size)
+        meta["snippet_bytes"] = int(lengths.sum())
+        meta["ann_rows"], meta["ann_version"] = 0, None  # row ids changed; the ANN index starts over
+        return meta
+
+    # ----------------- ANN --------------------
+    def _new_ann(self, dim):
+        import faiss
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_NEIGHBOURS, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+        return faiss.IndexIDMap(hnsw)  # ids are store rows; tombstones are filtered out at query time
+
+    def _read_ann(self, meta):
+        import faiss
+        if meta.get("ann_version") is None:
+            return None
+        try:
+            return faiss.read_index(self._ann_file(meta["ann_version"]))
+        except RuntimeError:
+            return None
+
+    def _add_ann_rows(self, index, vectors, live, first_row):
+        rows = np.flatnonzero(live[first_row:]) + first_row
+        for start in range(0, rows.size, COPY_ROWS):
+            ids = rows[start:start + COPY_ROWS]
+            index.add_with_ids(np.ascontiguousarray(vectors[ids]), ids.astype(np.int64))
+
+    def _update_ann(self, meta, live):
+        # Writer side: extend the saved HNSW index with the rows appended since it was written
+        if live.sum() < self.ann_min_rows:
+            return
+        try:
+            import faiss
+        except ImportError:
+            return
+        index = self._read_ann(meta) if meta["ann_rows"] else None
+        first_row = meta["ann_rows"] if index is not None else 0
+        if index is None:
+            index = self._new_ann(meta["dim"])
+        vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(meta["rows"], meta["dim"]))
+        self._add_ann_rows(index, vectors, live, first_row)
+        del vectors
+        version = meta["corpus_version"]
+        tmp_path = self._ann_file(version) + f".{os.getpid()}.tmp"
+        faiss.write_index(index, tmp_path)
+        os.replace(tmp_path, self._ann_file(version))
+        meta["ann_rows"], meta["ann_version"] = meta["rows"], version
+
+    def _ann_index(self):
+        # Reader side: the saved index, topped up in memory if it lags the vectors (e.g. written
+        # by a process without faiss); built from scratch only when there is none
+        if self._ann is None:
+            try:
+                import faiss  # noqa: F401
+            except ImportError:
+                return None
+            index = self._read_ann(self._meta)
+            first_row = self._meta["ann_rows"] if index is not None else 0
+            if index is None:
+                index = self._new_ann(self._meta["dim"])
+            self._add_ann_rows(index, self._matrix(), self._live, first_row)
+            self._ann = index
+        return self._ann
+
+    # ----------------- Search --------------------
+    def search(self, query_vector, top_k=3):
+        # -> [(chunk dict, score)] best first; query_vector is the embedded query
+        with self._lock:
+            self._load()
+            live_rows = np.flatnonzero(self._live)
+            if live_rows.size == 0:
+                return []
+            query = normalize_rows(np.atleast_2d(query_vector))
+
+            ann = self._ann_index() if live_rows.size >= self.ann_min_rows else None
+            if ann is not None:
+                import faiss
+                # Only live rows may be returned; the bitmap must outlive the search call
+                bitmap = np.packbits(self._live, bitorder="little")
+                params = faiss.SearchParametersHNSW(sel=faiss.IDSelectorBitmap(bitmap.size, faiss.swig_ptr(bitmap)))
+                params.efSearch = HNSW_EF_SEARCH
+                scores, ids = ann.search(query, top_k, params=params)
+                hits = [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0]
+            else:
+                vectors = self._matrix()
+                scores = vectors[live_rows] @ query[0] if live_rows.size < vectors.shape[0] else vectors @ query[0]
+                best = top_k_indices(scores, top_k)
+                rows = live_rows[best] if live_rows.size < vectors.shape[0] else best
+                hits = [(int(r), float(scores[b])) for r, b in zip(rows, best)]
+
+            return [(self._chunk(r), score) for r, score in hits]
+
+    def corpus_version(self):
+        with self._lock:
+            self._load()
+            return self._meta["corpus_version"]
+
+    def stats(self):
+        with self._lock:
+            self._load()
+            return {"files": len(self._meta["files"]), "chunks": int(self._live.sum()),
+                    "corpus_version": self._meta["corpus_version"]}
+
+EMBEDDING_STORE = EmbeddingStore(model_name=SENTENCE_MODEL_NAME)
@@ -0,0 +1,307 @@
+import os
+import json
+import argparse
+from contextlib import contextmanager
+import pandas as pd
+from History_Store import HISTORY_STORE, HISTORY_COLUMNS, COST_COLUMNS
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+# Columnar copy of the estimate history for analytics: Parquet files partitioned by month and
+# provider (history/parquet/<table>/month=YYYY-MM/provider=.../part-*.parquet) with real numeric and
+# timestamp types. SQLite stays the system of record; sync() appends the rows past a per-table id
+# watermark, so each row is converted once. Readers get column projection, partition pruning on
+# provider/month and row-group pushdown on the remaining filters from pyarrow.dataset. The history
+# reports and exports stream from here; the Visualizer keeps its SQLite rollups.
+# Part files are named by the id range they hold. A sync that crashed after writing a chunk but
+# before moving the watermark, or a compaction that crashed before removing its inputs, leaves files
+# whose ids are past the watermark or covered by another file; the next sync removes them first.
+
+ARCHIVE_DIR = os.path.join("history", "parquet")
+ARCHIVE_VERSION = 1
+SYNC_CHUNK_ROWS = 100000
+COMPACT_MIN_FILES = 8  # small files a partition may collect before they are merged
+EXPORT_BATCH_ROWS = 50000
+
+# Arrow types per table; everything the SQLite store holds, plus the partition key
+TABLE_SCHEMAS = {
+    "estimates": {
+        "id": "int64", "timestamp": "timestamp[s]", "session_id": "string", "pages": "int64",
+        "size_gb": "float64", "provider": "string", "retention": "int64", "total": "float64"
+    },
+    "cost_breakdown": {
+        "id": "int64", "estimate_id": "int64", "timestamp": "timestamp[s]", "provider": "string",
+        "component": "string", "amount": "float64"
+    }
+}
+# Public column names, as HistoryStore returns them
+TABLE_LABELS = {"estimates": HISTORY_COLUMNS, "cost_breakdown": COST_COLUMNS}
+
+
+def _part_range(name):
+    # "part-000000000001-000000000420-0.parquet" -> (1, 420)
+    _, first, last, _ = name.split("-", 3)
+    return int(first), int(last)
+
+def _arrow_schema(table):
+    import pyarrow as pa
+    types = {"int64": pa.int64(), "float64": pa.float64(), "string": pa.string(), "timestamp[s]": pa.timestamp("s")}
+    fields = [pa.field(name, types[kind]) for name, kind in TABLE_SCHEMAS[table].items()]
+    return pa.schema(fields + [pa.field("month", pa.string())])
+
+class HistoryArchive:
+    def __init__(self, root=ARCHIVE_DIR, store=HISTORY_STORE):
+        self.root = root
+        self.store = store
+
+    # ----------------- Sync --------------------
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, "archive.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_state(self):
+        try:
+            with open(os.path.join(self.root, "state.json")) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {"version": ARCHIVE_VERSION, "watermarks": {}}
+        if state.get("version") != ARCHIVE_VERSION:
+            return {"version": ARCHIVE_VERSION, "watermarks": {}}
+        return state
+
+    def _write_state(self, state):
+        path = os.path.join(self.root, "state.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _prepare(chunk):
+        chunk = chunk.copy()
+        chunk["timestamp"] = pd.to_datetime(chunk["timestamp"], errors="coerce")
+        chunk["month"] = chunk["timestamp"].dt.strftime("%Y-%m").fillna("unknown")
+        return chunk
+
+    def sync(self, chunk_rows=SYNC_CHUNK_ROWS):
+        # -> {table: rows appended}; the watermark moves after each chunk, so an interrupted sync resumes
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        appended = {}
+        with self._locked():
+            state = self._read_state()
+            for table in TABLE_SCHEMAS:
+                appended[table] = 0
+                touched = set()
+                last_id = state["watermarks"].get(table, 0)
+                self._recover(table, last_id)
+                for chunk in self.store.iter_new_rows(table, last_id, chunk_rows):
+                    first_id, last_id = int(chunk["id"].iloc[0]), int(chunk["id"].iloc[-1])
+                    chunk = self._prepare(chunk)
+                    arrow_table = pa.Table.from_pandas(chunk, schema=_arrow_schema(table), preserve_index=False)
+                    # Named by id range; whatever a crashed run wrote past the watermark was removed above
+                    ds.write_dataset(
+                        arrow_table, os.path.join(self.root, table), format="parquet",
+                        partitioning=ds.partitioning(arrow_table.select(["month", "provider"]).schema, flavor="hive"),
+                        basename_template=f"part-{first_id:012d}-{last_id:012d}-{{i}}.parquet",
+                        existing_data_behavior="overwrite_or_ignore"
+                    )
+                    touched.update(chunk[["month", "provider"]].drop_duplicates().itertuples(index=False, name=None))
+                    state["watermarks"][table] = last_id
+                    self._write_state(state)
+                    appended[table] += len(chunk)
+                for month, provider in touched:
+                    self._compact_partition(table, month, provider)
+        return appended
+
+    def _recover(self, table, watermark):
+        # Removes what an interrupted sync or compaction left behind: part files with rows past the
+        # watermark (the retry writes them again), files whose id range another file covers (inputs
+        # of a finished compaction) and compaction staging files
+        removed = 0
+        for directory, _, names in os.walk(os.path.join(self.root, table)):
+            parts = {name: _part_range(name) for name in names if name.startswith("part-") and name.endswith(".parquet")}
+            doomed = {name for name, (first, _) in parts.items() if first > watermark}
+            kept = [(first, last, name) for name, (first, last) in parts.items() if name not in doomed]
+            for first, last, name in kept:
+                if any(other != name and f <= first and last <= l for f, l, other in kept):
+                    doomed.add(name)
+            doomed.update(name for name in names if name.startswith(".compact-"))
+            for name in doomed:
+                os.remove(os.path.join(directory, name))
+            removed += len(doomed)
+        return removed
+
+    def _partition_dir(self, table, month, provider):
+        import pyarrow.dataset as ds
+        import pyarrow as pa
+        # Same (URI-escaped) directory names write_dataset produced
+        partitioning = ds.partitioning(pa.schema([("month", pa.string()), ("provider", pa.string())]), flavor="hive")
+        expression = (ds.field("month") == month) & (ds.field("provider") == provider)
+        return os.path.join(self.root, table, partitioning.format(expression)[0])
+
+    def _compact_partition(self, table, month, provider):
+        # Merges a partition's small append files into one, keeping id order
+        import pyarrow.parquet as pq
+
+        directory = self._partition_dir(table, month, provider)
+        try:
+            parts = sorted(name for name in os.listdir(directory) if name.startswith("part-") and name.endswith(".parquet"))
+        except OSError:
+            return False
+        if len(parts) < COMPACT_MIN_FILES:
+            return False
+        merged = pq.ParquetFile(os.path.join(directory, parts[0])).schema_arrow
+        first_id, last_id = parts[0].split("-")[1], parts[-1].split("-")[2]
+        target = os.path.join(directory, f"part-{first_id}-{last_id}-c.parquet")
+        staging = os.path.join(directory, f".compact-{first_id}-{last_id}.tmp")  # dot prefix: invisible to readers
+        with pq.ParquetWriter(staging, merged) as writer:
+            for name in parts:
+                writer.write_table(pq.read_table(os.path.join(directory, name)))
+        os.replace(staging, target)
+        for name in parts:
+            if os.path.join(directory, name) != target:
+                os.remove(os.path.join(directory, name))
+        return True
+
+    # ----------------- Reads --------------------
+    def _filter(self, providers=None, start=None, end=None, page_range=None, cost_range=None, table="estimates"):
+        import pyarrow.dataset as ds
+
+        clauses = []
+        if providers is not None:
+            clauses.append(ds.field("provider").isin(list(providers)))
+        if start is not None:
+            start = pd.Timestamp(start)
+            clauses.append(ds.field("month") >= start.strftime("%Y-%m"))
+            clauses.append(ds.field("timestamp") >= start.to_pydatetime())
+        if end is not None:
+            end = pd.Timestamp(end)
+            clauses.append(ds.field("month") <= end.strftime("%Y-%m"))
+            clauses.append(ds.field("timestamp") <= end.to_pydatetime())
+        if page_range is not None and table == "estimates":
+            clauses.append((ds.field("pages") >= page_range[0]) & (ds.field("pages") <= page_range[1]))
+        if cost_range is not None and table == "estimates":
+            clauses.append((ds.field("total") >= cost_range[0]) & (ds.field("total") <= cost_range[1]))
+        expression = None
+        for clause in clauses:
+            expression = clause if expression is None else expression & clause
+        return expression
+
+    def _dataset(self, table):
+        import pyarrow.dataset as ds
+        import pyarrow as pa
+
+        directory = os.path.join(self.root, table)
+        if not os.path.isdir(directory):
+            return None
+        return ds.dataset(
+            directory, format="parquet", schema=_arrow_schema(table),
+            partitioning=ds.partitioning(pa.schema([("month", pa.string()), ("provider", pa.string())]), flavor="hive")
+        )
+
+    def _iter(self, table, expression, batch_rows, sync):
+        # Streams a table's matching rows, labelled like HistoryStore returns them, in id (insertion,
+        # i.e. chronological) order. Partitions are per month and provider and their id ranges overlap,
+        # so the fragments are merged: each keeps one batch buffered, and rows up to the smallest last
+        # id still buffered by an unfinished fragment can't be preceded by anything left to read.
+        # Timestamps are rendered as the text SQLite stores.
+        import pyarrow.dataset as ds
+
+        if sync:
+            self.sync()
+        dataset = self._dataset(table)
+        if dataset is None:
+            return
+        labels = TABLE_LABELS[table]
+        columns = list(labels) + ["id"]
+        streams = [
+            iter(ds.Scanner.from_fragment(fragment, schema=dataset.schema, columns=columns, filter=expression,
+                                          batch_size=batch_rows).to_batches())
+            for fragment in dataset.get_fragments(filter=expression)
+        ]
+        buffers = [None] * len(streams)
+        last_id = 0  # highest id yielded; also skips rows a racing compaction exposed twice
+        while True:
+            for i, stream in enumerate(streams):
+                while stream is not None and (buffers[i] is None or buffers[i].empty):
+                    batch = next(stream, None)
+                    if batch is None:
+                        streams[i] = stream = None
+                    else:
+                        buffers[i] = batch.to_pandas()
+            if all(buffer is None or buffer.empty for buffer in buffers):
+                return
+            bound = min((int(buffers[i]["id"].iloc[-1]) for i, stream in enumerate(streams) if stream is not None),
+                        default=None)
+            ready = []
+            for i, buffer in enumerate(buffers):
+                if buffer is None or buffer.empty:
+                    continue
+                if bound is None:  # every fragment is read to the end
+                    ready.append(buffer)
+                    buffers[i] = None
+                else:
+                    take = buffer["id"] <= bound
+                    ready.append(buffer[take])
+                    buffers[i] = buffer[~take]
+            chunk = pd.concat(ready).sort_values("id", kind="stable").drop_duplicates("id")
+            chunk = chunk[chunk["id"] > last_id]
+            if chunk.empty:
+                continue
+            last_id = int(chunk["id"].iloc[-1])
+            chunk["timestamp"] = chunk["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S").fillna("")
+            yield chunk.drop(columns=["id"]).rename(columns=labels).reset_index(drop=True)
+
+    def iter_history(self, providers=None, page_range=None, cost_range=None, start=None, end=None,
+                     batch_rows=EXPORT_BATCH_ROWS, sync=True):
+        # HISTORY_COLUMNS-labelled chunks for reports and exports, like HistoryStore.iter_history but
+        # reading only matching partitions and row groups
+        expression = self._filter(providers, start, end, page_range, cost_range)
+        return self._iter("estimates", expression, batch_rows, sync)
+
+    def iter_cost_breakdown(self, providers=None, start=None, end=None, batch_rows=EXPORT_BATCH_ROWS, sync=True):
+        # COST_COLUMNS-labelled chunks, for the cost report and its CSV export
+        expression = self._filter(providers, start, end, table="cost_breakdown")
+        return self._iter("cost_breakdown", expression, batch_rows, sync)
+
+    def get_stats(self):
+        state = self._read_state()
+        stats = {"watermarks": state["watermarks"]}
+        for table in TABLE_SCHEMAS:
+            files = size = 0
+            for directory, _, names in os.walk(os.path.join(self.root, table)):
+                for name in names:
+                    if name.endswith(".parquet"):
+                        files += 1
+                        size += os.path.getsize(os.path.join(directory, name))
+            stats[table] = {"files": files, "bytes": size}
+        return stats
+
+
+HISTORY_ARCHIVE = HistoryArchive()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync the SQLite estimate history into the Parquet archive.")
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    args = parser.parse_args(argv)
+    archive = HistoryArchive(args.root)
+    appended = archive.sync()
+    print(f"Appended {appended['estimates']} estimates and {appended['cost_breakdown']} cost rows")
+    print(json.dumps(archive.get_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+from contextlib import contextmanager
+
+# Estimate history in SQLite (WAL mode), replacing the append-only CSVs under history/.
+# Inserts are atomic, concurrent sessions can't interleave partial rows, and the Reports
+# filters run as indexed SQL instead of pandas masks over the whole file. Small rollup tables are
+# maintained alongside every insert so charts never read row-level history.
+
+HISTORY_DIR = "history"
+HISTORY_DB_PATH = os.path.join(HISTORY_DIR, "history.db")
+MASTER_HISTORY_CSV = os.path.join(HISTORY_DIR, "master_history.csv")
+MASTER_COST_CSV = os.path.join(HISTORY_DIR, "master_cost_breakdown.csv")
+SCHEMA_VERSION = 3
+TREND_MAX_POINTS = 200
+PAGE_SIZE = 100
+EXPORT_CHUNK_ROWS = 50000
+
+# store column -> column name the UI/reports have always used
+HISTORY_COLUMNS = {
+    "timestamp": "Timestamp",
+    "pages": "Pages",
+    "size_gb": "Size (GB)",
+    "provider": "Provider",
+    "retention": "Retention (mo)",
+    "total": "Total ($)"
+}
+COST_COLUMNS = {
+    "component": "Cost Component",
+    "amount": "Amount ($)",
+    "provider": "Provider",
+    "timestamp": "Timestamp"
+}
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB_PATH):
+        self.path = path
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        self._ensure_schema()
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_schema(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                    CREATE TABLE IF NOT EXISTS estimates (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp TEXT NOT NULL,
+                        session_id TEXT,
+                        pages INTEGER NOT NULL,
+                        size_gb REAL NOT NULL,
+                        provider TEXT NOT NULL,
+                        retention INTEGER NOT NULL,
+                        total REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_estimates_timestamp ON estimates (timestamp);
+                    CREATE INDEX IF NOT EXISTS idx_estimates_provider ON estimates (provider);
+                    CREATE INDEX IF NOT EXISTS idx_estimates_pages ON estimates (pages);
+                    CREATE INDEX IF NOT EXISTS idx_estimates_total ON estimates (total);
+                    CREATE TABLE IF NOT EXISTS cost_breakdown (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        estimate_id INTEGER REFERENCES estimates (id),
+                        timestamp TEXT NOT NULL,
+                        provider TEXT NOT NULL,
+                        component TEXT NOT NULL,
+                        amount REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_cost_timestamp ON cost_breakdown (timestamp);
+                    CREATE INDEX IF NOT EXISTS idx_cost_provider ON cost_breakdown (provider);
+                    CREATE TABLE IF NOT EXISTS history_stats (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        row_count INTEGER NOT NULL,
+                        min_pages INTEGER,
+                        max_pages INTEGER,
+                        min_total REAL,
+                        max_total REAL
+                    );
+                    CREATE TABLE IF NOT EXISTS provider_stats (provider TEXT PRIMARY KEY, row_count INTEGER NOT NULL);
+                    CREATE TABLE IF NOT EXISTS rollup_component (
+                        provider TEXT NOT NULL,
+                        component TEXT NOT NULL,
+                        row_count INTEGER NOT NULL,
+                        amount_sum REAL NOT NULL,
+                        PRIMARY KEY (provider, component)
+                    );
+                    CREATE TABLE IF NOT EXISTS rollup_provider (
+                        provider TEXT PRIMARY KEY,
+                        estimates INTEGER NOT NULL,
+                        total_sum REAL NOT NULL,
+                        pages_sum INTEGER NOT NULL,
+                        size_sum REAL NOT NULL,
+                        retention_sum INTEGER NOT NULL
+                    );
+                    CREATE TABLE IF NOT EXISTS rollup_daily (
+                        day TEXT NOT NULL,
+                        provider TEXT NOT NULL,
+                        estimates INTEGER NOT NULL,
+                        total_sum REAL NOT NULL,
+                        pages_sum INTEGER NOT NULL,
+                        size_sum REAL NOT NULL,
+                        PRIMARY KEY (day, provider)
+                    );
+                """)
+                # IMMEDIATE takes the write lock up front so two processes can't both migrate
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    stored = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+                    self._migrate_from_csv(conn)
+                    # Older databases have no rollups yet; fresh or migrated ones have no stats row
+                    if (stored is None or int(stored[0]) < SCHEMA_VERSION
+                            or conn.execute("SELECT 1 FROM history_stats").fetchone() is None):
+                        self._rebuild_aggregates(conn)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            finally:
+                conn.close()
+            self._initialized = True
+
+    def _migrate_from_csv(self, conn, history_csv=MASTER_HISTORY_CSV, cost_csv=MASTER_COST_CSV):
+        # One-time import of the legacy CSV history, inside the schema transaction
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'csv_migrated'").fetchone():
+            return
+
+        if os.path.exists(history_csv):
+            for chunk in pd.read_csv(history_csv, chunksize=50000):
+                conn.executemany(
+                    "INSERT INTO estimates (timestamp, pages, size_gb, provider, retention, total) VALUES (?, ?, ?, ?, ?, ?)",
+                    chunk[list(HISTORY_COLUMNS.values())].astype(object).itertuples(index=False, name=None)
+                )
+
+        if os.path.exists(cost_csv):
+            for chunk in pd.read_csv(cost_csv, chunksize=50000):
+                conn.executemany(
+                    "INSERT INTO cost_breakdown (estimate_id, timestamp, provider, component, amount)"
+                    " VALUES ((SELECT id FROM estimates e WHERE e.timestamp = ? AND e.provider = ? LIMIT 1), ?, ?, ?, ?)",
+                    (
+                        (ts, provider, ts, provider, component, float(amount))
+                        for component, amount, provider, ts in chunk[list(COST_COLUMNS.values())].itertuples(index=False, name=None)
+                    )
+                )
+
+        conn.execute("INSERT INTO meta VALUES ('csv_migrated', datetime('now'))")
+
+    def _rebuild_aggregates(self, conn):
+        # Full recompute of stats and rollups; after this, record_estimate keeps them current
+        for table in ("history_stats", "provider_stats", "rollup_component", "rollup_provider", "rollup_daily"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute(
+            "INSERT INTO history_stats SELECT 1, COUNT(*), MIN(pages), MAX(pages), MIN(total), MAX(total) FROM estimates"
+        )
+        conn.execute("INSERT INTO provider_stats SELECT provider, COUNT(*) FROM estimates GROUP BY provider")
+        conn.execute(
+            "INSERT INTO rollup_component SELECT provider, component, COUNT(*), SUM(amount) FROM cost_breakdown"
+            " GROUP BY provider, component"
+        )
+        conn.execute(
+            "INSERT INTO rollup_provider SELECT provider, COUNT(*), SUM(total), SUM(pages), SUM(size_gb), SUM(retention)"
+            " FROM estimates GROUP BY provider"
+        )
+        conn.execute(
+            "INSERT INTO rollup_daily SELECT substr(timestamp, 1, 10), provider, COUNT(*), SUM(total), SUM(pages), SUM(size_gb)"
+            " FROM estimates GROUP BY substr(timestamp, 1, 10), provider"
+        )
+
+    def _update_rollups(self, conn, entry, cost_rows):
+        pages, size_gb, total = int(entry["Pages"]), float(entry["Size (GB)"]), float(entry["Total ($)"])
+        conn.execute(
+            "INSERT INTO rollup_provider VALUES (?, 1, ?, ?, ?, ?) ON CONFLICT (provider) DO UPDATE SET"
+            " estimates = estimates + 1, total_sum = total_sum + excluded.total_sum,"
+            " pages_sum = pages_sum + excluded.pages_sum, size_sum = size_sum + excluded.size_sum,"
+            " retention_sum = retention_sum + excluded.retention_sum",
+            (entry["Provider"], total, pages, size_gb, int(entry["Retention (mo)"]))
+        )
+        conn.execute(
+            "INSERT INTO rollup_daily VALUES (?, ?, 1, ?, ?, ?) ON CONFLICT (day, provider) DO UPDATE SET"
+            " estimates = estimates + 1, total_sum = total_sum + excluded.total_sum,"
+            " pages_sum = pages_sum + excluded.pages_sum, size_sum = size_sum + excluded.size_sum",
+            (entry["Timestamp"][:10], entry["Provider"], total, pages, size_gb)
+        )
+        conn.executemany(
+            "INSERT INTO rollup_component VALUES (?, ?, 1, ?) ON CONFLICT (provider, component) DO UPDATE SET"
+            " row_count = row_count + 1, amount_sum = amount_sum + excluded.amount_sum",
+            [(entry["Provider"], component, amount) for component, amount in cost_rows]
+        )
+
+    # ----------------- Writes --------------------
+    def record_estimate(self, entry, cost_rows, session_id=None):
+        # entry: dict keyed by HISTORY_COLUMNS labels; cost_rows: iterable of (component, amount)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO estimates (timestamp, session_id, pages, size_gb, provider, retention, total)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry["Timestamp"], session_id, int(entry["Pages"]), float(entry["Size (GB)"]),
+                    entry["Provider"], int(entry["Retention (mo)"]), float(entry["Total ($)"])
+                )
+            )
+            estimate_id = cursor.lastrowid
+            # Keep the slider statistics current so the Reports page never has to scan for them
+            conn.execute(
+                "UPDATE history_stats SET row_count = row_count + 1,"
+                " min_pages = MIN(COALESCE(min_pages, :pages), :pages), max_pages = MAX(COALESCE(max_pages, :pages), :pages),"
+                " min_total = MIN(COALESCE(min_total, :total), :total), max_total = MAX(COALESCE(max_total, :total), :total)"
+                " WHERE id = 1",
+                {"pages": int(entry["Pages"]), "total": float(entry["Total ($)"])}
+            )
+            conn.execute(
+                "INSERT INTO provider_stats VALUES (?, 1) ON CONFLICT (provider) DO UPDATE SET row_count = row_count + 1",
+                (entry["Provider"],)
+            )
+            cost_rows = [(component, float(amount)) for component, amount in cost_rows]
+            conn.executemany(
+                "INSERT INTO cost_breakdown (estimate_id, timestamp, provider, component, amount) VALUES (?, ?, ?, ?, ?)",
+                [(estimate_id, entry["Timestamp"], entry["Provider"], component, amount) for component, amount in cost_rows]
+            )
+            self._update_rollups(conn, entry, cost_rows)
+        return estimate_id
+
+    # ----------------- Reads --------------------
+    @staticmethod
+    def _history_filters(providers=None, page_range=None, cost_range=None, session_id=None):
+        clauses, params = [], []
+        if providers is not None:
+            providers = list(providers)
+            if not providers:
+                return "0", []
+            clauses.append(f"provider IN ({', '.join('?' * len(providers))})")
+            params.extend(providers)
+        if page_range is not None:
+            clauses.append("pages BETWEEN ? AND ?")
+            params.extend(page_range)
+        if cost_range is not None:
+            clauses.append("total BETWEEN ? AND ?")
+            params.extend(cost_range)
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        return " AND ".join(clauses) or "1", params
+
+    def count_history(self, providers=None, page_range=None, cost_range=None, session_id=None):
+        where, params = self._history_filters(providers, page_range, cost_range, session_id)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM estimates WHERE {where}", params).fetchone()[0]
+
+    def query_history_page(self, page=0, page_size=PAGE_SIZE, providers=None, page_range=None, cost_range=None, session_id=None):
+        # One window of the filtered rows, for st.dataframe
+        where, params = self._history_filters(providers, page_range, cost_range, session_id)
+        columns = ", ".join(f'{col} AS "{label}"' for col, label in HISTORY_COLUMNS.items())
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                f"SELECT {columns} FROM estimates WHERE {where} ORDER BY id LIMIT ? OFFSET ?",
+                conn, params=params + [page_size, page * page_size]
+            )
+
+    def iter_history(self, chunk_rows=EXPORT_CHUNK_ROWS, providers=None, page_range=None, cost_range=None, session_id=None):
+        # Streams the filtered rows in id order; keyset pagination keeps every chunk an index range scan
+        where, params = self._history_filters(providers, page_range, cost_range, session_id)
+        columns = ", ".join(f'{col} AS "{label}"' for col, label in HISTORY_COLUMNS.items())
+        last_id = 0
+        while True:
+            with self._connect() as conn:
+                chunk = pd.read_sql_query(
+                    f"SELECT id, {columns} FROM estimates WHERE {where} AND id > ? ORDER BY id LIMIT ?",
+                    conn, params=params + [last_id, chunk_rows]
+                )
+            if chunk.empty:
+                return
+            last_id = int(chunk["id"].iloc[-1])
+            yield chunk.drop(columns=["id"])
+            if len(chunk) < chunk_rows:
+                return
+
+    def iter_new_rows(self, table, after_id=0, chunk_rows=EXPORT_CHUNK_ROWS):
+        # Raw rows (store column names, with id) past a watermark, for History_Archive
+        if table not in ("estimates", "cost_breakdown"):
+            raise ValueError(f"Unknown history table: {table}")
+        while True:
+            with self._connect() as conn:
+                chunk = pd.read_sql_query(
+                    f"SELECT * FROM {table} WHERE id > ? ORDER BY id LIMIT ?", conn, params=[after_id, chunk_rows]
+                )
+            if chunk.empty:
+                return
+            after_id = int(chunk["id"].iloc[-1])
+            yield chunk
+            if len(chunk) < chunk_rows:
+                return
+
+    def column_stats(self):
+        # Precomputed row count, slider bounds and providers, maintained on every insert
+        with self._connect() as conn:
+            row = conn.execute("SELECT row_count, min_pages, max_pages, min_total, max_total FROM history_stats").fetchone()
+            providers = [r[0] for r in conn.execute("SELECT provider FROM provider_stats WHERE row_count > 0 ORDER BY provider")]
+        row_count, min_pages, max_pages, min_total, max_total = row or (0, None, None, None, None)
+        return {
+            "rows": row_count,
+            "pages": (min_pages, max_pages),
+            "total": (min_total, max_total),
+            "providers": providers
+        }
+
+    def query_cost_breakdown(self, providers=None):
+        where, params = self._history_filters(providers)
+        columns = ", ".join(f'{col} AS "{label}"' for col, label in COST_COLUMNS.items())
+        with self._connect() as conn:
+            return pd.read_sql_query(f"SELECT {columns} FROM cost_breakdown WHERE {where} ORDER BY id", conn, params=params)
+
+    # ----------------- Rollups (chart inputs) --------------------
+    def component_rollup(self, providers=None):
+        where, params = self._history_filters(providers)
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                'SELECT component AS "Cost Component", SUM(amount_sum) AS "Amount ($)", SUM(row_count) AS "Entries"'
+                f" FROM rollup_component WHERE {where} GROUP BY component ORDER BY component",
+                conn, params=params
+            )
+
+    def provider_rollup(self):
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                'SELECT provider AS "Provider", estimates AS "Estimates", total_sum AS "Total ($)",'
+                ' total_sum / estimates AS "Average Total ($)", pages_sum AS "Pages",'
+                ' CAST(retention_sum AS REAL) / estimates AS "Average Retention (mo)"'
+                " FROM rollup_provider WHERE estimates > 0 ORDER BY provider",
+                conn
+            )
+
+    def trend_series(self, max_points=TREND_MAX_POINTS):
+        # Daily totals; long histories are merged into equal runs of days so at most max_points come back
+        with self._connect() as conn:
+            daily = pd.read_sql_query(
+                'SELECT day AS "Date", SUM(estimates) AS "Estimates", SUM(pages_sum) AS "Pages",'
+                ' SUM(size_sum) AS "Size (GB)", SUM(total_sum) AS "Total ($)"'
+                " FROM rollup_daily GROUP BY day ORDER BY day",
+                conn
+            )
+        daily["Date"] = pd.to_datetime(daily["Date"], errors="coerce")
+        if len(daily) <= max_points:
+            return daily
+        days_per_point = -(-len(daily) // max_points)
+        return daily.groupby(daily.index // days_per_point).agg({
+            "Date": "first", "Estimates": "sum", "Pages": "sum", "Size (GB)": "sum", "Total ($)": "sum"
+        }).reset_index(drop=True)
+
+    def data_version(self):
+        # Changes with every recorded estimate; rows are only ever appended, so the newest ids identify the contents
+        with self._connect() as conn:
+            estimates = conn.execute("SELECT MAX(id) FROM estimates").fetchone()[0] or 0
+            costs = conn.execute("SELECT MAX(id) FROM cost_breakdown").fetchone()[0] or 0
+        return f"{estimates}:{costs}"
+
+    def has_cost_breakdown(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM cost_breakdown LIMIT 1").fetchone() is not None
+
+
+HISTORY_STORE = HistoryStore()
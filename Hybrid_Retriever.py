@@ -0,0 +1,241 @@
+import os
+import re
+import json
+import math
+import hashlib
+import threading
+from collections import Counter, defaultdict
+import numpy as np
+from Embedding_Store import SNIPPET_CHARS
+
+# Retrieval for the Project Assistant: an in-memory BM25 inverted index over the PDF chunks and the
+# project_info.json fields, fused (reciprocal rank fusion) with the vector search in Embedding_Store.
+# Queries the lexical index answers confidently -- exact terms such as invoice numbers or provider
+# names -- return without touching the embedding model; only low-confidence queries embed.
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+LEXICAL_CONFIDENCE = 0.7  # share of the query's idf weight the best lexical hit must cover
+RRF_K = 60
+CANDIDATES_PER_SIDE = 20
+PROJECT_INFO_SOURCE = "project_info"
+
+# Words that used to route questions to a project_info section; indexed with that section
+PROJECT_FIELD_ALIASES = {
+    "description": "about project what is this project overview",
+    "features": "key features functionality",
+    "working": "how does it work usage workflow",
+    "target_users": "target users who is this for audience",
+    "tech_stack": "tech stack technologies libraries",
+    "modules": "modules architecture components",
+    "future_scope": "future scope next roadmap plans"
+}
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me of on or show tell that the this "
+    "to was what when where which who why will with you your about".split()
+)
+_TERM_RE = re.compile(r"[a-z0-9]+(?:[-_/.][a-z0-9]+)*")
+_PART_RE = re.compile(r"[-_/.]")
+
+
+def _normalize(term):
+    # Cheap plural folding so "feature" finds "features"; identifiers with digits are kept verbatim
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss") and term.isalpha():
+        return term[:-1]
+    return term
+
+def tokenize(text):
+    terms = []
+    for match in _TERM_RE.finditer(text.lower()):
+        term = match.group()
+        if term in STOPWORDS:
+            continue
+        terms.append(_normalize(term))
+        if not term.isalnum():
+            # "INV-2024-0042" is findable whole and by its parts
+            terms.extend(_normalize(part) for part in _PART_RE.split(term) if part and part not in STOPWORDS)
+    return terms
+
+def _field_text(value):
+    if isinstance(value, dict):
+        return "\n".join(f"{k}: {v}" for k, v in value.items())
+    if isinstance(value, list):
+        return "\n".join(str(v) for v in value)
+    return str(value)
+
+class BM25Index:
+    # Postings are term -> {doc id: term frequency}; documents are added and removed per group
+    # (one group per PDF, one for project_info) so updates never rebuild the whole index.
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)
+        self.docs = {}
+        self.doc_lengths = {}
+        self.groups = defaultdict(list)
+        self.total_length = 0
+        self._next_id = 0
+
+    def add(self, group, docs):
+        for doc in docs:
+            doc_id = self._next_id
+            self._next_id += 1
+            counts = Counter(tokenize(doc["index_text"] if "index_text" in doc else doc["text"]))
+            for term, tf in counts.items():
+                self.postings[term][doc_id] = tf
+            length = sum(counts.values())
+            self.docs[doc_id] = doc
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+            self.groups[group].append((doc_id, tuple(counts)))
+
+    def remove(self, group):
+        for doc_id, terms in self.groups.pop(group, []):
+            for term in terms:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            del self.docs[doc_id]
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.docs) - df + 0.5) / (df + 0.5))
+
+    def search(self, query, top_k=CANDIDATES_PER_SIDE):
+        # -> ([(doc id, score)] best first, confidence of the best hit in [0, 1])
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.docs:
+            return [], 0.0
+        avg_length = self.total_length / len(self.docs) or 1.0
+        weights = {term: self.idf(term) for term in terms}
+        scores = defaultdict(float)
+        for term in terms:
+            for doc_id, tf in self.postings.get(term, {}).items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += weights[term] * tf * (self.k1 + 1) / norm
+        if not scores:
+            return [], 0.0
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        best = ranked[0][0]
+        matched = sum(w for term, w in weights.items() if best in self.postings.get(term, {}))
+        return ranked, matched / (sum(weights.values()) or 1.0)
+
+class HybridRetriever:
+    def __init__(self, embedding_store, lexical_confidence=LEXICAL_CONFIDENCE):
+        self.embedding_store = embedding_store
+        self.lexical_confidence = lexical_confidence
+        self.index = BM25Index()
+        self._file_fingerprints = {}
+        self._project_info_hash = None
+        self._project_vectors = None  # (fields, matrix) embedded on the first vector query
+        self._lock = threading.RLock()
+        self._stats = {"queries": 0, "lexical_only": 0, "hybrid": 0}
+
+    # ----------------- Indexing --------------------
+    def sync(self, files, chunk_source, project_info):
+        # files: {filename: path}; chunk_source as for Embedding_Store.sync. Only changed groups are touched.
+        with self._lock:
+            info_hash = hashlib.sha256(json.dumps(project_info, sort_keys=True).encode("utf-8")).hexdigest()
+            if info_hash != self._project_info_hash:
+                self.index.remove(PROJECT_INFO_SOURCE)
+                self.index.add(PROJECT_INFO_SOURCE, [
+                    {"source": PROJECT_INFO_SOURCE, "field": field, "text": _field_text(value),
+                     "index_text": f"{PROJECT_FIELD_ALIASES.get(field, field.replace('_', ' '))}\n{_field_text(value)}"}
+                    for field, value in project_info.items() if field in PROJECT_FIELD_ALIASES
+                ])
+                self._project_info_hash = info_hash
+                self._project_vectors = None
+
+            fingerprints = {f: _fingerprint(path) for f, path in files.items()}
+            for filename in [f for f in self._file_fingerprints if fingerprints.get(f) != self._file_fingerprints[f]]:
+                self.index.remove(filename)
+                del self._file_fingerprints[filename]
+            todo = {f: files[f] for f, fp in fingerprints.items() if fp is not None and f not in self._file_fingerprints}
+            for filename, chunks in chunk_source(todo):
+                self.index.add(filename, [dict(chunk, source="pdf") for chunk in chunks if chunk["text"].strip()])
+                self._file_fingerprints[filename] = fingerprints[filename]
+
+    # ----------------- Querying --------------------
+    def params(self, top_k):
+        # Everything that shapes the hits, for cache keys
+        return {"top_k": top_k, "lexical_confidence": self.lexical_confidence, "candidates": CANDIDATES_PER_SIDE,
+                "rrf_k": RRF_K, "bm25": [self.index.k1, self.index.b]}
+
+    def _project_field_scores(self, query_vector, embed_fn):
+        if self._project_vectors is None:
+            docs = self.index.groups.get(PROJECT_INFO_SOURCE, [])
+            fields = [self.index.docs[doc_id] for doc_id, _ in docs]
+            matrix = np.asarray(embed_fn([d["index_text"] for d in fields]), dtype=np.float32) if fields else None
+            self._project_vectors = (fields, matrix)
+        fields, matrix = self._project_vectors
+        if matrix is None:
+            return []
+        return list(zip(fields, (matrix @ query_vector).tolist()))
+
+    def search(self, query, embed_fn, top_k=3, sync_embeddings=None, cache=None, cache_scope=None):
+        # embed_fn(texts) -> normalised vectors; sync_embeddings() brings the vector store up to
+        # date and is only called when the query actually needs the vector side. With a
+        # Query_Cache, repeated and near-duplicate questions return the earlier hits.
+        if cache is not None:
+            cached = cache.get(query, cache_scope)
+            if cached is not None:
+                return cached
+        with self._lock:
+            self._stats["queries"] += 1
+            ranked, confidence = self.index.search(query)
+            lexical = [self.index.docs[doc_id] for doc_id, _ in ranked]
+            if lexical and confidence >= self.lexical_confidence:
+                self._stats["lexical_only"] += 1
+                hits = [dict(doc, score=score, via="lexical") for doc, (_, score) in zip(lexical, ranked)][:top_k]
+                if cache is not None:
+                    cache.put(query, cache_scope, hits)
+                return hits
+
+            query_vector = np.asarray(embed_fn([query])[0], dtype=np.float32)
+            if cache is not None:
+                cached = cache.get_similar(query_vector, cache_scope)
+                if cached is not None:
+                    return cached
+            self._stats["hybrid"] += 1
+            if sync_embeddings is not None:
+                sync_embeddings()
+            semantic = [dict(chunk, source="pdf", score=score)
+                        for chunk, score in self.embedding_store.search(query_vector, CANDIDATES_PER_SIDE)]
+            semantic.extend(dict(doc, score=score) for doc, score in self._project_field_scores(query_vector, embed_fn))
+            semantic.sort(key=lambda doc: doc["score"], reverse=True)
+
+            fused = {}
+            for results in (lexical, semantic):
+                for rank, doc in enumerate(results):
+                    key = _doc_key(doc)
+                    entry = fused.setdefault(key, dict(doc, score=0.0, via="hybrid"))
+                    entry["score"] += 1.0 / (RRF_K + rank + 1)
+            hits = sorted(fused.values(), key=lambda doc: doc["score"], reverse=True)[:top_k]
+            if cache is not None:
+                cache.put(query, cache_scope, hits, query_vector)
+            return hits
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["documents"] = len(self.index.docs)
+        stats["terms"] = len(self.index.postings)
+        return stats
+
+
+def _doc_key(doc):
+    # Embedding_Store keeps only a snippet of each chunk, so PDF chunks are matched on that prefix
+    if doc["source"] == PROJECT_INFO_SOURCE:
+        return (PROJECT_INFO_SOURCE, doc["field"])
+    return (doc["filename"], doc["page"], doc["text"][:SNIPPET_CHARS])
+
+def _fingerprint(path):
+    try:
+        st_info = os.stat(path)
+    except OSError:
+        return None
+    return (st_info.st_mtime_ns, st_info.st_size)
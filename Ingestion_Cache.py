@@ -0,0 +1,125 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+CACHE_DIR = os.path.join("cache", "ingestion")
+CACHE_VERSION = 3  # bump when the cached fields or their formatting change
+MAX_MEMORY_ENTRIES = 2048
+
+
+def content_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+class IngestionCache:
+    # Per-file PDF facts keyed by content hash: in-memory LRU in front of one JSON file per document
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._saved = OrderedDict()  # saved upload path -> {"fingerprint": [mtime_ns, size], "key": ...}
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry
+
+        try:
+            with open(self._path(key), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+
+        with self._lock:
+            if entry is None or entry.get("version") != CACHE_VERSION:
+                self._stats["misses"] += 1
+                return None
+            self._remember(key, entry)
+            self._stats["disk_hits"] += 1
+            return entry
+
+    def put(self, key, entry):
+        entry = dict(entry, version=CACHE_VERSION)
+        entry.pop("name", None)  # names are per upload, the content is what we cache
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._remember(key, entry)
+
+    # ----------------- Saved uploads --------------------
+    # Content key of each copy written to uploads/, recorded with the file's (mtime_ns, size), so a
+    # rerun can tell an unchanged copy from a revised one without reading and hashing it again.
+    def _saved_path(self, path):
+        name = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, "saved", name[:2], f"{name}.json")
+
+    def saved_key(self, path):
+        # -> content key recorded for `path`, or None if it was never recorded or the file changed since
+        try:
+            st_info = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._saved.get(path)
+        if entry is None:
+            try:
+                with open(self._saved_path(path), "r") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+        if entry.get("fingerprint") != [st_info.st_mtime_ns, st_info.st_size]:
+            return None
+        with self._lock:
+            self._saved[path] = entry
+            self._saved.move_to_end(path)
+            while len(self._saved) > self.max_entries:
+                self._saved.popitem(last=False)
+        return entry["key"]
+
+    def record_saved(self, path, key):
+        st_info = os.stat(path)
+        entry = {"fingerprint": [st_info.st_mtime_ns, st_info.st_size], "key": key}
+        record = self._saved_path(path)
+        os.makedirs(os.path.dirname(record), exist_ok=True)
+        tmp_path = f"{record}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, record)
+        with self._lock:
+            self._saved[path] = entry
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            for k in self._stats:
+                self._stats[k] = 0
+
+
+INGESTION_CACHE = IngestionCache()
@@ -0,0 +1,352 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import importlib
+import threading
+import functools
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Background jobs (summaries, indexing, reports) for the Streamlit app. Jobs are rows in a SQLite
+# table and run on one fixed-size process pool per server, so every session shares the same worker
+# budget. The script only submits and polls: a rerun or a closed tab doesn't lose the work, and an
+# identical job that is already queued or running is reused instead of started again. Each row
+# records the server process and pool that own it; a job whose pool died (a crashed worker breaks
+# the whole pool) is marked failed and no longer matched, and the next submit starts a new pool.
+
+JOBS_DB_PATH = os.path.join("cache", "jobs.db")
+JOB_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+PROGRESS_WRITE_INTERVAL = 0.5
+FINISHED_JOB_RETENTION_SECONDS = 7 * 24 * 3600
+
+# kind -> "module:function"; resolved inside the worker so only names cross the process boundary.
+# Each function takes its params as keyword arguments plus `progress(fraction, message)`.
+JOB_HANDLERS = {
+    "summarize": "Job_Queue:_summarize_job",
+    "index": "Job_Queue:_index_job",
+    "cost_report": "Job_Queue:_cost_report_job",
+    "history_report": "Job_Queue:_history_report_job",
+    "filtered_pdf": "Job_Queue:_filtered_pdf_job",
+    "monte_carlo": "Job_Queue:_monte_carlo_job"
+}
+ACTIVE_STATUSES = ("queued", "running")
+
+
+@contextmanager
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+# ----------------- Worker side --------------------
+def _run_job(db_path, job_id, handler_name, params):
+    module_name, function_name = handler_name.split(":")
+    handler = getattr(importlib.import_module(module_name), function_name)
+    last_write = [0.0]
+
+    def progress(fraction, message=""):
+        now = time.monotonic()
+        if now - last_write[0] < PROGRESS_WRITE_INTERVAL and fraction < 1:
+            return
+        last_write[0] = now
+        with _connect(db_path) as conn:
+            conn.execute("UPDATE jobs SET progress = ?, message = ? WHERE id = ?", (float(fraction), message, job_id))
+
+    with _connect(db_path) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'running', started_at = ?, worker_pid = ? WHERE id = ?",
+            (time.time(), os.getpid(), job_id)
+        )
+    try:
+        result = handler(progress=progress, **params)
+    except Exception as e:
+        with _connect(db_path) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (f"{type(e).__name__}: {e}", time.time(), job_id)
+            )
+        return
+    with _connect(db_path) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'done', progress = 1, result = ?, finished_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id)
+        )
+
+def _summarize_job(filename, progress):
+    from Summarize_PDF import summarize_pdf
+    summary = summarize_pdf(filename, progress=lambda stage, done, total: progress(done / total, f"{stage}: {done}/{total}"))
+    return {"summary": summary}
+
+def _index_job(progress):
+    from project_knowledge import index_uploads
+    return {"files": index_uploads(progress=progress)}
+
+def _cost_report_job(progress):
+    from History_Store import HISTORY_STORE
+    from History_Archive import HISTORY_ARCHIVE
+    from Report_Artifacts import REPORT_ARTIFACTS
+    from Reports_Generator import generate_cost_report_pdf
+    progress(0.1, "Loading cost breakdown")
+    path = REPORT_ARTIFACTS.get_or_create(
+        "cost_report", lambda save_path: generate_cost_report_pdf(HISTORY_ARCHIVE.iter_cost_breakdown(), save_path),
+        data_version=HISTORY_STORE.data_version()
+    )
+    return {"path": path}
+
+def _history_report_job(progress):
+    from History_Store import HISTORY_STORE
+    from History_Archive import HISTORY_ARCHIVE
+    from Report_Artifacts import REPORT_ARTIFACTS
+    from Reports_Generator import generate_history_report_pdf
+    progress(0.1, "Writing history report")
+    path = REPORT_ARTIFACTS.get_or_create(
+        "history_report", lambda save_path: generate_history_report_pdf(HISTORY_ARCHIVE.iter_history(), save_path),
+        data_version=HISTORY_STORE.data_version()
+    )
+    return {"path": path}
+
+def _monte_carlo_job(simulation, progress):
+    from Cost_Engine import simulate_costs
+    progress(0.0, "Simulating scenarios")
+    summary, histogram = simulate_costs(
+        progress=lambda fraction: progress(fraction, f"Simulating scenarios: {fraction:.0%}"), **simulation
+    )
+    return {"summary": summary.to_dict(orient="list"), "histogram": histogram.to_dict(orient="list")}
+
+def _filtered_pdf_job(filters, progress):
+    from History_Store import HISTORY_STORE
+    from History_Archive import HISTORY_ARCHIVE
+    from Report_Artifacts import REPORT_ARTIFACTS
+    from Reports_Generator import export_filtered_data_to_pdf
+    progress(0.1, "Writing filtered export")
+    path = REPORT_ARTIFACTS.get_or_create(
+        "filtered_export", lambda save_path: export_filtered_data_to_pdf(HISTORY_ARCHIVE.iter_history(**filters), save_path=save_path),
+        params=filters, data_version=HISTORY_STORE.data_version()
+    )
+    return {"path": path}
+
+# ----------------- Server side --------------------
+class JobQueue:
+    def __init__(self, path=JOBS_DB_PATH, workers=JOB_WORKERS):
+        self.path = path
+        self.workers = workers
+        self._pool = None
+        self._pool_id = None
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _ensure_ready(self):
+        with self._lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with _connect(self.path) as conn:
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        id TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        params TEXT NOT NULL,
+                        dedupe_key TEXT NOT NULL,
+                        session_id TEXT,
+                        status TEXT NOT NULL,
+                        progress REAL NOT NULL DEFAULT 0,
+                        message TEXT,
+                        result TEXT,
+                        error TEXT,
+                        owner_pid INTEGER,
+                        pool_id TEXT,
+                        worker_pid INTEGER,
+                        created_at REAL NOT NULL,
+                        started_at REAL,
+                        finished_at REAL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key, status);
+                """)
+                # Tables created before pools were tracked per job
+                if "pool_id" not in [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN pool_id TEXT")
+                conn.execute(
+                    "DELETE FROM jobs WHERE status NOT IN ('queued', 'running') AND finished_at < ?",
+                    (time.time() - FINISHED_JOB_RETENTION_SECONDS,)
+                )
+                orphans = [
+                    row for row in conn.execute("SELECT * FROM jobs WHERE status IN ('queued', 'running')")
+                    if row["owner_pid"] is None or (row["owner_pid"] != os.getpid() and not _pid_alive(row["owner_pid"]))
+                ]
+            self._initialized = True
+        # Jobs whose server process died are picked up again by this one
+        for row in orphans:
+            self._start(row["id"], row["kind"], json.loads(row["params"]))
+
+    def _get_pool(self):
+        # -> (pool, pool id)
+        with self._lock:
+            if self._pool is None:
+                # spawn keeps workers clear of the Streamlit server threads
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+                self._pool_id = uuid.uuid4().hex
+            return self._pool, self._pool_id
+
+    def _reset_pool(self, pool):
+        # The pool is broken (a worker died) or shut down: the next submit gets a fresh one
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self._pool_id = None
+        pool.shutdown(wait=False)
+
+    def _owner_alive(self, row):
+        # Whether the process and pool recorded on an active row can still finish it
+        if row["owner_pid"] == os.getpid():
+            with self._lock:
+                return row["pool_id"] is not None and row["pool_id"] == self._pool_id
+        return row["owner_pid"] is not None and _pid_alive(row["owner_pid"])
+
+    def _mark_failed(self, job_id, error):
+        with _connect(self.path) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+                (error, time.time(), job_id)
+            )
+
+    def _job_done(self, job_id, pool, future):
+        # Runs when the pool is done with a job. _run_job records handler errors itself; this catches
+        # everything else (a dead worker, a failing status write, an unserialisable result)
+        if future.cancelled():
+            self._mark_failed(job_id, "Cancelled")
+            return
+        error = future.exception()
+        if error is None:
+            return
+        if isinstance(error, BrokenProcessPool):
+            self._reset_pool(pool)
+        self._mark_failed(job_id, f"{type(error).__name__}: {error}")
+
+    def _dispatch(self, job_id, kind, params, pool, pool_id):
+        # pool/pool_id are already recorded on the row; one retry on a fresh pool if this one broke
+        for attempt in range(2):
+            try:
+                future = pool.submit(_run_job, self.path, job_id, JOB_HANDLERS[kind], params)
+            except RuntimeError as e:  # BrokenProcessPool, or shut down by a concurrent reset
+                self._reset_pool(pool)
+                if attempt:
+                    self._mark_failed(job_id, f"{type(e).__name__}: {e}")
+                    return
+                pool, pool_id = self._get_pool()
+                with _connect(self.path) as conn:
+                    conn.execute("UPDATE jobs SET pool_id = ? WHERE id = ?", (pool_id, job_id))
+                continue
+            future.add_done_callback(functools.partial(self._job_done, job_id, pool))
+            return
+
+    def _start(self, job_id, kind, params):
+        pool, pool_id = self._get_pool()
+        with _connect(self.path) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', owner_pid = ?, pool_id = ?, progress = 0, message = NULL WHERE id = ?",
+                (os.getpid(), pool_id, job_id)
+            )
+        self._dispatch(job_id, kind, params, pool, pool_id)
+
+    def submit(self, kind, params=None, session_id=None):
+        # -> job id; an identical job that is queued or running is shared rather than repeated
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self._ensure_ready()
+        params = params or {}
+        encoded = json.dumps(params, sort_keys=True)
+        dedupe_key = hashlib.sha256(f"{kind}|{encoded}".encode("utf-8")).hexdigest()
+        pool, pool_id = self._get_pool()
+        with _connect(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            active = conn.execute(
+                "SELECT id, owner_pid, pool_id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running') ORDER BY created_at",
+                (dedupe_key,)
+            ).fetchall()
+            for row in active:
+                if self._owner_alive(row):
+                    return row["id"]
+                # Nothing will ever finish it; fail it so it stops matching
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                    ("Abandoned: the worker pool running it is gone", time.time(), row["id"])
+                )
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, dedupe_key, session_id, status, owner_pid, pool_id, created_at)"
+                " VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, encoded, dedupe_key, session_id, os.getpid(), pool_id, time.time())
+            )
+        self._dispatch(job_id, kind, params, pool, pool_id)
+        return job_id
+
+    def get(self, job_id):
+        # -> dict with status, progress, message, result, error; None for unknown ids
+        self._ensure_ready()
+        with _connect(self.path) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def list_jobs(self, session_id=None, limit=20):
+        self._ensure_ready()
+        with _connect(self.path) as conn:
+            if session_id is None:
+                rows = conn.execute("SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT id FROM jobs WHERE session_id = ? ORDER BY created_at DESC LIMIT ?", (session_id, limit)
+                ).fetchall()
+        return [self.get(row["id"]) for row in rows]
+
+
+JOB_QUEUE = JobQueue()
+
+
+# ----------------- UI polling --------------------
+def poll_job(job_id, render_result, interval=1.0):
+    # Shows progress while the job runs (re-polling every `interval` s without rerunning the page),
+    # then hands the result dict to render_result
+    import streamlit as st
+
+    job = JOB_QUEUE.get(job_id)
+    if job is None:
+        st.warning("⚠️ This job is no longer available.")
+        return
+
+    @st.fragment(run_every=interval if job["status"] in ACTIVE_STATUSES else None)
+    def show():
+        current = JOB_QUEUE.get(job_id)
+        if current["status"] in ACTIVE_STATUSES:
+            st.progress(min(1.0, current["progress"]), text=current["message"] or f"{current['status'].capitalize()}...")
+        elif job["status"] in ACTIVE_STATUSES:
+            st.rerun()  # finished since the page ran; a full rerun stops the polling
+        elif current["status"] == "failed":
+            st.error(f"An error occurred: {current['error']}")
+        else:
+            render_result(current["result"])
+
+    show()
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Hierarchical (map-reduce) summarization: every chunk is summarized, then the partial summaries
+# are merged in groups, level by level, until one summary remains. LLM calls run on a bounded
+# thread pool and every intermediate summary is cached on disk, so a re-run or a run that failed
+# halfway only pays for the calls that never completed.
+#
+# `llm` is a LangChain LLM (anything with .invoke) or a plain callable prompt -> text, so a local
+# fake such as `lambda prompt: prompt[:200]` can stand in for the hosted model.
+
+SUMMARY_CACHE_DIR = os.path.join("cache", "summaries")
+MAX_CONCURRENT_CALLS = 4
+REDUCE_FAN_IN = 8  # partial summaries merged per reduce call
+MAX_REDUCE_CHARS = 6000  # keeps each reduce prompt inside the model's context window
+MAX_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 1.0
+
+MAP_PROMPT = (
+    "Summarize the following section of the document \"{title}\" in a few sentences. "
+    "Keep names, figures and conclusions.\n\n{text}\n\nSummary:"
+)
+REDUCE_PROMPT = (
+    "The following are summaries of consecutive sections of the document \"{title}\". "
+    "Combine them into one coherent summary without repeating points.\n\n{text}\n\nCombined summary:"
+)
+
+
+def _call_llm(llm, prompt):
+    result = llm.invoke(prompt) if hasattr(llm, "invoke") else llm(prompt)
+    return str(getattr(result, "content", result)).strip()
+
+def _model_id(llm):
+    return getattr(llm, "repo_id", None) or getattr(llm, "model_name", None) or type(llm).__name__
+
+class MapReduceSummarizer:
+    def __init__(self, llm, cache_dir=SUMMARY_CACHE_DIR, max_workers=MAX_CONCURRENT_CALLS,
+                 fan_in=REDUCE_FAN_IN, max_reduce_chars=MAX_REDUCE_CHARS, retries=MAX_RETRIES, model_id=None):
+        self.llm = llm
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.fan_in = fan_in
+        self.max_reduce_chars = max_reduce_chars
+        self.retries = retries
+        self.model_id = model_id or _model_id(llm)
+        self._stats = {"llm_calls": 0, "cache_hits": 0}
+        self._lock = threading.Lock()
+
+    # ----------------- Cache --------------------
+    def _path(self, prompt):
+        key = hashlib.sha256(f"{self.model_id}|{prompt}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _cached(self, prompt):
+        try:
+            with open(self._path(prompt), "r") as f:
+                return json.load(f)["summary"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store(self, prompt, summary):
+        path = self._path(prompt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"model": self.model_id, "summary": summary}, f)
+        os.replace(tmp_path, path)
+
+    def _summarize(self, prompt):
+        summary = self._cached(prompt)
+        if summary is not None:
+            with self._lock:
+                self._stats["cache_hits"] += 1
+            return summary
+        for attempt in range(self.retries + 1):
+            try:
+                with self._lock:
+                    self._stats["llm_calls"] += 1
+                summary = _call_llm(self.llm, prompt)
+                break
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(RETRY_BACKOFF_SECONDS * (2 ** attempt))
+        self._store(prompt, summary)
+        return summary
+
+    # ----------------- Pipeline --------------------
+    def _run_level(self, prompts, stage, progress):
+        # All prompts of one level run concurrently; failures are collected so the successful
+        # summaries still reach the cache before the error is raised
+        results = [None] * len(prompts)
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._summarize, prompt): i for i, prompt in enumerate(prompts)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    errors.append(e)
+                if progress is not None:
+                    progress(stage, done, len(prompts))
+        if errors:
+            raise RuntimeError(
+                f"{len(errors)} of {len(prompts)} {stage} calls failed; completed summaries are cached, "
+                f"re-run to resume. First error: {errors[0]}"
+            )
+        return results
+
+    def _group(self, summaries):
+        groups, current, size = [], [], 0
+        for summary in summaries:
+            if current and (len(current) >= self.fan_in or size + len(summary) > self.max_reduce_chars):
+                groups.append(current)
+                current, size = [], 0
+            current.append(summary)
+            size += len(summary)
+        if current:
+            groups.append(current)
+        return groups
+
+    def summarize(self, texts, title="the document", progress=None):
+        # texts: chunk strings in document order; progress(stage, done, total) is optional
+        texts = [t for t in texts if t and t.strip()]
+        if not texts:
+            raise ValueError("Nothing to summarize")
+
+        summaries = self._run_level([MAP_PROMPT.format(title=title, text=t) for t in texts], "map", progress)
+        level = 0
+        while len(summaries) > 1:
+            level += 1
+            groups = self._group(summaries)
+            if len(groups) == len(summaries):
+                # Each summary alone fills a prompt; merge pairwise so the tree still shrinks
+                groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+            prompts = [REDUCE_PROMPT.format(title=title, text="\n\n".join(group)) for group in groups]
+            summaries = self._run_level(prompts, f"reduce {level}", progress)
+        return summaries[0]
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats)
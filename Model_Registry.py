@@ -0,0 +1,82 @@
+import threading
+
+# Process-wide, load-once home for the heavy ML models. Nothing here imports torch, transformers or
+# LangChain until a model is first requested, so pages that never use the Summarize/Assistant
+# features start without paying for them. Every Streamlit session in the process shares one copy.
+
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+LLM_REPO_ID = "mistralai/Mistral-7B-Instruct-v0.3"
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._factories = {}
+        self._models = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def register(self, name, factory):
+        with self._lock:
+            self._factories[name] = factory
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            if name not in self._factories:
+                raise KeyError(f"No model registered under '{name}'")
+            load_lock = self._load_locks[name]
+        # Per-model lock: concurrent sessions wait for one load instead of each loading a copy
+        with load_lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._factories[name]()
+                self._models[name] = model
+        return model
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def loaded(self):
+        return sorted(self._models)
+
+
+# ----------------- Factories (imports stay inside) --------------------
+def _load_sentence_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(SENTENCE_MODEL_NAME)
+
+def _load_assistant_embedder():
+    from Embedding_Service import EmbeddingService
+    return EmbeddingService(SENTENCE_MODEL_NAME)
+
+def _load_document_embedder():
+    from Embedding_Service import EmbeddingService
+    return EmbeddingService(EMBEDDING_MODEL_NAME)
+
+def _load_hf_embeddings():
+    # LangChain-facing view of the shared document embedder
+    from Embedding_Service import langchain_embeddings
+    return langchain_embeddings(MODEL_REGISTRY.get("document_embedder"))
+
+def _load_summary_llm():
+    from dotenv import load_dotenv
+    from langchain_huggingface import HuggingFaceEndpoint
+    load_dotenv()
+    return HuggingFaceEndpoint(
+        repo_id=LLM_REPO_ID,
+        task="text-generation",
+        temperature=0.5,
+        max_new_tokens=512
+    )
+
+
+MODEL_REGISTRY = ModelRegistry()
+MODEL_REGISTRY.register("sentence_model", _load_sentence_model)
+MODEL_REGISTRY.register("assistant_embedder", _load_assistant_embedder)
+MODEL_REGISTRY.register("document_embedder", _load_document_embedder)
+MODEL_REGISTRY.register("hf_embeddings", _load_hf_embeddings)
+MODEL_REGISTRY.register("summary_llm", _load_summary_llm)
@@ -0,0 +1,158 @@
+import os
+import multiprocessing
+import fitz  # PyMuPDF
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from Ingestion_Cache import INGESTION_CACHE, content_key
+from Page_Size_Model import analyze_document, raw_analysis
+
+UPLOADS_FOLDER = "uploads"
+PARALLEL_THRESHOLD = 4  # below this many files the pool start-up costs more than it saves
+
+_POOL = None
+_POOL_WORKERS = max(1, os.cpu_count() or 1)
+
+
+def format_metadata(value):
+    return value.strip().title() if value else "N/A"
+
+def format_creation_date(date_str):
+    if date_str and date_str.startswith("D:"):
+        try:
+            date_str = date_str[2:].split("+")[0]
+            return datetime.strptime(date_str, "%Y%m%d%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return "Invalid Date Format"
+    return "N/A"
+
+def inspect_pdf(name, data):
+    # Opens the PDF straight from memory, no temp file needed
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        pages = len(doc)
+        meta = doc.metadata or {}
+        # Seeded by file size so the same file always samples the same pages. A page the sampler
+        # can't read shouldn't fail the whole file: fall back to its raw size.
+        try:
+            analysis = analyze_document(doc, len(data) / 1024, seed=len(data))
+        except Exception:
+            analysis = raw_analysis(len(data) / 1024)
+
+    return {
+        "name": name,
+        "size_kb": len(data) / 1024,
+        "pages": pages,
+        "analysis": analysis,
+        "metadata": {
+            "Title": format_metadata(meta.get('title', 'N/A')),
+            "Author": format_metadata(meta.get('author', 'N/A')),
+            "Creation Date": format_creation_date(meta.get('creationDate', 'N/A')),
+            "Subject": format_metadata(meta.get('subject', 'N/A'))
+        }
+    }
+
+def _file_key(path):
+    try:
+        with open(path, "rb") as f:
+            return content_key(f.read())
+    except OSError:
+        return None
+
+def save_upload(name, data, save_dir=UPLOADS_FOLDER, key=None, cache=INGESTION_CACHE):
+    # Summarize/Assistant read from uploads/, so keep a copy there, but skip identical rewrites on reruns.
+    # Same name and size isn't enough (a revised PDF can match both), so the contents are compared --
+    # against the key recorded when the copy was written; only copies without one are read and hashed.
+    path = os.path.join(save_dir, name)
+    key = key or content_key(data)
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        saved = cache.saved_key(path) if cache is not None else None
+        if saved is None:
+            saved = _file_key(path)
+            if saved == key and cache is not None:
+                cache.record_saved(path, key)
+        if saved == key:
+            return path
+    staging = f"{path}.{os.getpid()}.tmp"
+    with open(staging, "wb") as f:
+        f.write(data)
+    os.replace(staging, path)  # readers never see a half-written upload
+    if cache is not None:
+        cache.record_saved(path, key)
+    return path
+
+def _ingest_one(name, data, save_dir, key=None):
+    try:
+        if save_dir:
+            save_upload(name, data, save_dir, key)
+        return inspect_pdf(name, data)
+    except Exception as e:
+        return {"name": name, "error": str(e)}
+
+def _get_pool():
+    global _POOL
+    if _POOL is None:
+        # spawn keeps workers clear of the Streamlit server threads
+        _POOL = ProcessPoolExecutor(max_workers=_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _POOL
+
+# `uploads` is a sequence of objects with `name` and `getvalue()` (e.g. Streamlit's UploadedFile).
+# Yields (index, result) in completion order; index points back into `uploads`.
+# Files already seen (by content hash, any name) are served from the ingestion cache.
+def iter_ingest(uploads, save_dir=UPLOADS_FOLDER, parallel=None, cache=INGESTION_CACHE):
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+
+    misses = []
+    for index, upload in enumerate(uploads):
+        data = upload.getvalue()
+        key = content_key(data)
+        cached = cache.get(key) if cache is not None else None
+        if cached is None:
+            misses.append((index, key))
+            continue
+        if save_dir:
+            save_upload(upload.name, data, save_dir, key, cache)
+        yield index, dict(cached, name=upload.name)
+
+    def finish(index, key, result):
+        if cache is not None and "error" not in result:
+            cache.put(key, result)
+        return index, result
+
+    if parallel is None:
+        parallel = len(misses) >= PARALLEL_THRESHOLD and _POOL_WORKERS > 1
+
+    if not parallel:
+        for index, key in misses:
+            upload = uploads[index]
+            yield finish(index, key, _ingest_one(upload.name, upload.getvalue(), save_dir, key))
+        return
+
+    pool = _get_pool()
+    queue = iter(misses)
+    pending = {}
+    max_in_flight = 2 * _POOL_WORKERS  # bounds how many file copies are in transit at once
+
+    def submit_next():
+        item = next(queue, None)
+        if item is None:
+            return False
+        index, key = item
+        upload = uploads[index]
+        pending[pool.submit(_ingest_one, upload.name, upload.getvalue(), save_dir, key)] = (index, key)
+        return True
+
+    while len(pending) < max_in_flight and submit_next():
+        pass
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, key = pending.pop(future)
+            yield finish(index, key, future.result())
+            submit_next()
+
+def ingest_pdfs(uploads, save_dir=UPLOADS_FOLDER, parallel=None, cache=INGESTION_CACHE):
+    results = [None] * len(uploads)
+    for index, result in iter_ingest(uploads, save_dir=save_dir, parallel=parallel, cache=cache):
+        results[index] = result
+    return results
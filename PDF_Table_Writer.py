@@ -0,0 +1,257 @@
+import os
+import zlib
+import numpy as np
+import pandas as pd
+
+# Streaming table writer for the large PDF reports. Rows arrive as DataFrame chunks, are formatted a
+# column at a time (no per-cell Python calls), and every finished page is compressed and written
+# straight to the file -- only the current page and an object offset per page stay in memory, so a
+# million-row history costs the same RAM as a thousand-row one. Column widths are measured once on
+# the first chunk and fitted to the page; text longer than its column is clipped, and the header
+# row repeats on every page. The PDF is written by hand with the standard Helvetica fonts, which
+# every viewer has, so nothing is embedded.
+
+PAGE_WIDTH = 595.28  # A4 portrait, points
+PAGE_HEIGHT = 841.89
+MARGIN = 28.35  # 10 mm, as FPDF's default
+TITLE_SIZE = 12
+CHAPTER_SIZE = 11
+FONT_SIZE = 9
+ROW_HEIGHT = 14
+CELL_PADDING = 3
+FORMAT_BATCH_ROWS = 10000
+WIDTH_SAMPLE = 50  # longest values per column measured for its width
+DEFAULT_FLOAT_FORMAT = "%.2f"
+
+# Advance widths (1/1000 em) of Helvetica and Helvetica-Bold for the printable ASCII range 32..126
+_HELVETICA = (
+    "278 278 355 556 556 889 667 191 333 333 389 584 278 333 278 278 556 556 556 556 556 556 556 556 "
+    "556 556 278 278 584 584 584 556 1015 667 667 722 722 667 611 778 722 278 500 667 556 833 722 778 "
+    "667 778 722 667 611 722 667 944 667 667 611 278 278 278 469 556 333 556 556 500 556 556 278 556 "
+    "556 222 222 500 222 833 556 556 556 556 333 500 278 556 500 722 500 500 500 334 260 334 584"
+)
+_HELVETICA_BOLD = (
+    "278 333 474 556 556 889 722 238 333 333 389 584 278 333 278 278 556 556 556 556 556 556 556 556 "
+    "556 556 333 333 584 584 584 611 975 722 722 722 722 667 611 778 722 278 556 722 611 833 722 778 "
+    "667 778 722 667 611 722 667 944 667 667 611 333 278 333 584 556 333 556 611 556 611 556 333 611 "
+    "611 278 278 556 278 889 611 611 611 611 389 556 333 611 556 778 556 556 500 389 280 389 584"
+)
+CHAR_WIDTHS = {
+    "F1": {chr(32 + i): int(w) for i, w in enumerate(_HELVETICA.split())},
+    "F2": {chr(32 + i): int(w) for i, w in enumerate(_HELVETICA_BOLD.split())}
+}
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+
+
+def text_width(text, font="F1", size=FONT_SIZE):
+    widths = CHAR_WIDTHS[font]
+    return sum(widths.get(ch, 556) for ch in text) * size / 1000.0
+
+def _escape(values):
+    # PDF string literals: backslash and parentheses are escaped, line breaks flattened
+    return (values.str.replace("\\", "\\\\", regex=False)
+                  .str.replace("(", "\\(", regex=False)
+                  .str.replace(")", "\\)", regex=False)
+                  .str.replace(r"[\r\n\t]", " ", regex=True))
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "(": "\\(", ")": "\\)", "\r": " ", "\n": " ", "\t": " "})
+
+def _escape_text(text):
+    return str(text).translate(_ESCAPES)
+
+def format_column(series, fmt=None):
+    # One vectorised pass per column -> Series of display strings
+    missing = series.isna()
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        text = series.astype(str)
+    elif pd.api.types.is_integer_dtype(series) and fmt is None:
+        text = series.astype(str)
+    else:
+        values = series.to_numpy(dtype=np.float64, na_value=0.0)
+        text = pd.Series(np.char.mod(fmt or DEFAULT_FLOAT_FORMAT, values), index=series.index)
+    if missing.any():
+        text = text.mask(missing, "")
+    return text
+
+def _pdf_number(value):
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+class TableWriter:
+    def __init__(self, path, title, columns=None, formats=None, report_title="Digitization Report"):
+        self.path = path
+        self.title = title
+        self.report_title = report_title
+        self.columns = list(columns) if columns is not None else None
+        self.formats = formats or {}
+        self.widths = None
+        self.pages = 0
+        self.rows = 0
+        self._pending = None
+        self._frames = {}
+        self._page_ids = []
+        self._offsets = {}
+        self._next_id = 5  # 1 catalog, 2 page tree, 3-4 fonts
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        self._write_raw(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for obj_id, font in ((3, "F1"), (4, "F2")):
+            self._write_object(obj_id, f"<< /Type /Font /Subtype /Type1 /BaseFont /{FONTS[font]} /Encoding /WinAnsiEncoding >>".encode())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self.path)
+
+    # ----------------- Low-level output --------------------
+    def _write_raw(self, data):
+        self._file.write(data)
+
+    def _write_object(self, obj_id, body):
+        self._offsets[obj_id] = self._file.tell()
+        self._write_raw(f"{obj_id} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def _allocate(self):
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    # ----------------- Layout --------------------
+    def _table_top(self, first_page):
+        top = PAGE_HEIGHT - MARGIN - TITLE_SIZE - 12
+        return top - (CHAPTER_SIZE + 12 if first_page else 0)
+
+    def _page_capacity(self):
+        # Rows that fit below the header row on the next page
+        return int((self._table_top(self.pages == 0) - MARGIN - 14) // ROW_HEIGHT) - 1
+
+    def _fit_widths(self, sample):
+        # Natural width = widest header or sampled value; shrunk proportionally if the table is wider than the page
+        natural = []
+        for col, values in zip(self.columns, sample):
+            longest = values.str.len().nlargest(WIDTH_SAMPLE).index if len(values) else []
+            widest = max([text_width(v) for v in values.loc[longest]] + [text_width(str(col), "F2")])
+            natural.append(widest + 2 * CELL_PADDING)
+        available = PAGE_WIDTH - 2 * MARGIN
+        total = sum(natural)
+        scale = min(1.0, available / total) if total else 1.0
+        self.widths = [w * scale for w in natural]
+
+    # ----------------- Rows --------------------
+    def write(self, chunk):
+        # chunk: DataFrame with the report columns; formatted in batches so strings never pile up
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        for start in range(0, len(chunk), FORMAT_BATCH_ROWS):
+            batch = chunk.iloc[start:start + FORMAT_BATCH_ROWS]
+            formatted = [format_column(batch[col], self.formats.get(col)) for col in self.columns]
+            if self.widths is None:
+                self._fit_widths(formatted)
+            # Formatted numbers never contain characters that need escaping
+            self._add_rows([
+                (values if pd.api.types.is_numeric_dtype(batch[col]) else _escape(values)).tolist()
+                for col, values in zip(self.columns, formatted)
+            ])
+            self.rows += len(batch)
+
+    def _add_rows(self, cols):
+        if self._pending:
+            cols = [pending + new for pending, new in zip(self._pending, cols)]
+        count = len(cols[0]) if cols else 0
+        start = 0
+        while count - start >= self._page_capacity():
+            capacity = self._page_capacity()
+            self._emit_page([c[start:start + capacity] for c in cols])
+            start += capacity
+        self._pending = [c[start:] for c in cols]
+
+    def _page_frame(self, first_page, row_count):
+        # Everything on a page except its rows and number; identical for all full pages, so built once
+        key = (first_page, row_count)
+        if key in self._frames:
+            return self._frames[key]
+        n = _pdf_number
+        x0 = MARGIN
+        x1 = MARGIN + sum(self.widths)
+        table_top = self._table_top(first_page)
+        table_bottom = table_top - (row_count + 1) * ROW_HEIGHT
+        baseline_drop = ROW_HEIGHT - (ROW_HEIGHT - FONT_SIZE * 0.7) / 2
+        ops = []
+
+        title_x = (PAGE_WIDTH - text_width(self.report_title, "F2", TITLE_SIZE)) / 2
+        ops.append(f"BT /F2 {TITLE_SIZE} Tf {n(title_x)} {n(PAGE_HEIGHT - MARGIN - TITLE_SIZE)} Td ({_escape_text(self.report_title)}) Tj ET")
+        if first_page:
+            ops.append(f"BT /F2 {CHAPTER_SIZE} Tf {n(MARGIN)} {n(table_top + 10)} Td ({_escape_text(self.title)}) Tj ET")
+
+        # Grid: one path for every rule on the page
+        grid = [f"{n(x0)} {n(table_top - i * ROW_HEIGHT)} m {n(x1)} {n(table_top - i * ROW_HEIGHT)} l"
+                for i in range(row_count + 2)]
+        x = x0
+        for width in [0] + self.widths:
+            x += width
+            grid.append(f"{n(x)} {n(table_top)} m {n(x)} {n(table_bottom)} l")
+        ops.append("0.5 w " + " ".join(grid) + " S")
+
+        # Text: per column, a clip box and one text object (header row first) whose lines advance with T*
+        columns = []
+        x = x0
+        for col, width in zip(self.columns, self.widths):
+            columns.append(
+                f"q {n(x)} {n(table_bottom)} {n(width)} {n(table_top - table_bottom)} re W n "
+                f"BT /F2 {FONT_SIZE} Tf {ROW_HEIGHT} TL {n(x + CELL_PADDING)} {n(table_top - baseline_drop)} Td ({_escape_text(col)}) Tj "
+                f"/F1 {FONT_SIZE} Tf"
+            )
+            x += width
+        self._frames[key] = ("\n".join(ops), columns)
+        return self._frames[key]
+
+    def _emit_page(self, cols):
+        row_count = len(cols[0]) if cols else 0
+        frame, columns = self._page_frame(self.pages == 0, row_count)
+        ops = [frame, f"BT /F1 8 Tf {_pdf_number(PAGE_WIDTH - MARGIN - 40)} {_pdf_number(MARGIN - 14)} Td (Page {self.pages + 1}) Tj ET"]
+        for prefix, values in zip(columns, cols):
+            body = f" T* ({') Tj T* ('.join(values)}) Tj" if row_count else ""
+            ops.append(f"{prefix}{body} ET Q")
+
+        content = zlib.compress("\n".join(ops).encode("cp1252", "replace"), 6)
+        content_id, page_id = self._allocate(), self._allocate()
+        self._write_object(content_id, f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode() + content + b"\nendstream")
+        self._write_object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+        self._page_ids.append(page_id)
+        self.pages += 1
+
+    # ----------------- Finish --------------------
+    def close(self):
+        if self._file.closed:
+            return self.path
+        if self.columns is None:
+            self.columns = []
+        if self.widths is None:
+            self._fit_widths([pd.Series([], dtype=object) for _ in self.columns])
+        if self._pending and self._pending[0] or self.pages == 0:
+            self._emit_page(self._pending or [[] for _ in self.columns])
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>".encode())
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref_offset = self._file.tell()
+        size = self._next_id
+        entries = ["0000000000 65535 f "] + [f"{self._offsets.get(i, 0):010d} 00000 n " for i in range(1, size)]
+        self._write_raw(f"xref\n0 {size}\n".encode() + "\n".join(entries).encode() + b"\n")
+        self._write_raw(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+        self._file.close()
+        return self.path
+
+
+def write_table_pdf(path, title, chunks, formats=None):
+    # chunks: a DataFrame or an iterable of DataFrame chunks -> path
+    with TableWriter(path, title, formats=formats) as writer:
+        for chunk in ([chunks] if isinstance(chunks, pd.DataFrame) else chunks):
+            writer.write(chunk)
+    return path
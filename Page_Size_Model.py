@@ -0,0 +1,138 @@
+import random
+
+# Per-file storage model for scanned archives. Instead of pages x AVG_PAGE_SIZE_KB, a document is
+# judged from a fixed-size random sample of its pages: how much of each page is covered by images,
+# their resolution, colour depth and encoded size (read from the stream's /Length, never decoded),
+# and whether the page already has a text layer. Pages that are images without text need OCR: the OCR
+# step re-renders them at the detected scan profile (DPI and colour) and adds a text layer, so their
+# stored image bytes are swapped for the modelled scan size. Work per document depends on SAMPLE_PAGES,
+# not on page count.
+
+SAMPLE_PAGES = 12
+MIN_TEXT_CHARS = 20  # less than this on a page is treated as no text layer
+SCANNED_COVERAGE = 0.5  # images covering at least this share of the page make it a scan
+OCR_TEXT_LAYER_KB = 4.0  # hidden text + font subset added per OCR'd page
+POINTS_PER_INCH = 72
+
+# Manual entry: modelled size of one A4/Letter page scan per profile
+# (pixels x bits per pixel / 8, divided by the typical compression ratio for that mode)
+SCAN_COLOUR_MODES = {
+    # mode: (bits per pixel, compression ratio) -- CCITT G4 for bilevel, JPEG for the others
+    "Black & White": (1, 15),
+    "Grayscale": (8, 20),
+    "Colour": (24, 25)
+}
+SCAN_DPI_OPTIONS = [150, 200, 300, 400, 600]
+PAGE_AREA_SQ_IN = 8.27 * 11.69
+
+_COLOURSPACE_COMPONENTS = {"DeviceGray": 1, "CalGray": 1, "DeviceRGB": 3, "CalRGB": 3, "Lab": 3, "DeviceCMYK": 4}
+
+
+def scan_page_kb(dpi, colour_mode, area_sq_in=PAGE_AREA_SQ_IN):
+    bits, ratio = SCAN_COLOUR_MODES[colour_mode]
+    return area_sq_in * dpi * dpi * bits / 8 / ratio / 1024
+
+def raw_analysis(file_size_kb):
+    # Fallback when a document can't be sampled: the file as it is, nothing known about its pages
+    return {
+        "sampled_pages": 0, "scanned_share": 0.0, "text_share": 0.0, "ocr_pages": 0, "image_kb": 0.0,
+        "dpi": None, "colour": None, "predicted_kb": file_size_kb
+    }
+
+def sample_page_numbers(page_count, sample_pages=SAMPLE_PAGES, seed=0):
+    # First and last page (covers, blank backs) plus a seeded random spread of the rest
+    if page_count <= sample_pages:
+        return list(range(page_count))
+    rng = random.Random(seed)
+    middle = rng.sample(range(1, page_count - 1), sample_pages - 2)
+    return sorted([0, page_count - 1] + middle)
+
+def _stream_length(doc, xref):
+    kind, value = doc.xref_get_key(xref, "Length")
+    if kind == "int":
+        return int(value)
+    return len(doc.xref_stream_raw(xref))  # indirect /Length: read the raw (still encoded) bytes
+
+def _components(doc, xref, colourspace):
+    # ICC-based images (most scanners) carry their component count as /N on the ICC profile stream
+    if colourspace == "ICCBased":
+        kind, value = doc.xref_get_key(xref, "ColorSpace")
+        if kind == "xref":
+            value = doc.xref_object(int(value.split()[0]), compressed=True)
+        parts = value.strip().strip("[]").split()
+        if len(parts) >= 3 and parts[0] == "/ICCBased" and parts[1].isdigit():
+            kind, n = doc.xref_get_key(int(parts[1]), "N")
+            if kind == "int":
+                return int(n)
+    return _COLOURSPACE_COMPONENTS.get(colourspace, 3)
+
+def _colour_label(bits):
+    if bits <= 1:
+        return "Black & White"
+    return "Grayscale" if bits <= 8 else "Colour"
+
+def analyze_document(doc, file_size_kb, sample_pages=SAMPLE_PAGES, seed=0):
+    # doc: an open fitz.Document -> size/OCR prediction for the whole file from a page sample
+    page_count = len(doc)
+    sampled = sample_page_numbers(page_count, sample_pages, seed)
+    seen_on = {}  # image xref -> sampled pages using it; shared images (logos) are stored once
+    image_bytes = {}
+    ocr_xrefs = []  # image xrefs on each sampled page that needs OCR
+    scanned = needs_ocr = with_text = 0
+    dpis, depths, scan_areas = [], [], []
+
+    for number in sampled:
+        page = doc.load_page(number)
+        page_area = max(page.rect.width * page.rect.height, 1.0)
+        covered = 0.0
+        xrefs = []
+        for xref, smask, width, height, bpc, colourspace, *_ in page.get_images(full=True):
+            xrefs.append(xref)
+            seen_on[xref] = seen_on.get(xref, 0) + 1
+            if xref not in image_bytes:
+                image_bytes[xref] = _stream_length(doc, xref) + (_stream_length(doc, smask) if smask else 0)
+            rects = page.get_image_rects(xref)
+            shown = rects[0] if rects else page.rect
+            area = shown.width * shown.height
+            covered += area
+            if area / page_area >= SCANNED_COVERAGE and shown.width > 0:
+                # Resolution and depth describe the page scans, not logos or figures
+                dpis.append(width / (shown.width / POINTS_PER_INCH))
+                depths.append(bpc * _components(doc, xref, colourspace))
+        has_text = len(page.get_text("text").strip()) >= MIN_TEXT_CHARS
+        is_scan = covered / page_area >= SCANNED_COVERAGE
+        with_text += has_text
+        scanned += is_scan
+        if is_scan:
+            scan_areas.append(page_area / POINTS_PER_INCH ** 2)
+        if is_scan and not has_text:
+            needs_ocr += 1
+            ocr_xrefs.append(xrefs)
+
+    sample_size = max(len(sampled), 1)
+    per_page_bytes = sum(size for xref, size in image_bytes.items() if seen_on[xref] == 1) / sample_size
+    shared_bytes = sum(size for xref, size in image_bytes.items() if seen_on[xref] > 1)
+    ocr_pages = round(page_count * needs_ocr / sample_size)
+    image_kb = min(file_size_kb, (per_page_bytes * page_count + shared_bytes) / 1024)
+    dpi = round(sorted(dpis)[len(dpis) // 2]) if dpis else None
+    colour = _colour_label(max(depths)) if depths else None
+
+    # The file as it is, plus the text layer OCR adds to pages that are still bare images
+    predicted_kb = file_size_kb + ocr_pages * OCR_TEXT_LAYER_KB
+    if ocr_pages and dpi:
+        # ...whose images are re-rendered at the detected profile: swap their stored bytes for the modelled size
+        stored_kb = sum(image_bytes[x] for xrefs in ocr_xrefs for x in set(xrefs) if seen_on[x] == 1) / needs_ocr / 1024
+        area = sorted(scan_areas)[len(scan_areas) // 2]
+        predicted_kb += ocr_pages * (scan_page_kb(dpi, colour, area) - stored_kb)
+    predicted_kb = max(predicted_kb, ocr_pages * OCR_TEXT_LAYER_KB)
+
+    return {
+        "sampled_pages": len(sampled),
+        "scanned_share": scanned / sample_size,
+        "text_share": with_text / sample_size,
+        "ocr_pages": ocr_pages,
+        "image_kb": image_kb,
+        "dpi": dpi,
+        "colour": colour,
+        "predicted_kb": predicted_kb
+    }
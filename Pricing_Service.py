@@ -0,0 +1,195 @@
+import os
+import json
+import asyncio
+import threading
+import aiohttp
+from AWS_Price_Index import AWS_PRICE_INDEX
+
+# Concurrent storage price lookups for all providers/regions. Total latency is bounded by the
+# slowest provider instead of the sum of all of them. Point `endpoints` at a local stand-in server,
+# or `fixtures_dir` (env: DIGICET_PRICING_FIXTURES) at saved responses, to run fully offline.
+
+AWS_S3_OFFER_URL = "https://pricing.us-east-1.amazonaws.com/offers/v1.0/aws/AmazonS3/current/index.json"
+GCP_PRICELIST_URL = "https://cloudpricingcalculator.appspot.com/static/data/pricelist.json"
+AZURE_PRICES_URL = "https://prices.azure.com/api/retail/prices"
+
+PROVIDER_TIMEOUTS = {"Amazon S3": 120.0, "Google Cloud Storage": 5.0, "Microsoft Azure": 10.0}
+MAX_RETRIES = 2
+# While a page waits on the result: one short attempt, and never the multi-hundred-MB AWS offer file
+FOREGROUND_TIMEOUT_SECONDS = 5.0
+RETRY_BACKOFF_SECONDS = 0.5
+# Only these are worth another attempt; a parse or lookup error (e.g. a region missing from the
+# GCP pricelist) fails the same way every time, so it goes straight to the fallback price
+TRANSIENT_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+CONNECTION_LIMIT = 20
+
+
+def parse_gcp_price(data, region_code):
+    return float(data["CP-STORAGE-MULTI-REGIONAL"][region_code]["USD"])
+
+def parse_azure_price(data):
+    items = data.get("Items", [])
+    if items:
+        return float(items[0]["retailPrice"])
+    return None
+
+def parse_azure_tiers(data):
+    # Azure lists one item per volume tier, starting at tierMinimumUnits GB
+    items = sorted(data.get("Items", []), key=lambda item: float(item.get("tierMinimumUnits", 0)))
+    begins = [float(item.get("tierMinimumUnits", 0)) for item in items]
+    ends = begins[1:] + [float("inf")]
+    return [(b, e, float(item["retailPrice"])) for b, e, item in zip(begins, ends, items)]
+
+def standard_price(schedule):
+    # First-tier Standard price, i.e. what the single-rate UI shows
+    if not schedule or not schedule.get("Standard"):
+        return None
+    return schedule["Standard"][0][2]
+
+class PricingService:
+    def __init__(self, endpoints=None, fixtures_dir=None, timeouts=None, retries=MAX_RETRIES, aws_index=None):
+        self.endpoints = {"aws": AWS_S3_OFFER_URL, "gcp": GCP_PRICELIST_URL, "azure": AZURE_PRICES_URL}
+        self.endpoints.update(endpoints or {})
+        self.fixtures_dir = fixtures_dir if fixtures_dir is not None else os.getenv("DIGICET_PRICING_FIXTURES")
+        self.timeouts = dict(PROVIDER_TIMEOUTS, **(timeouts or {}))
+        self.retries = retries
+        self.aws_index = aws_index if aws_index is not None else AWS_PRICE_INDEX
+
+    # ----------------- Transport --------------------
+    def _read_fixture(self, name):
+        with open(os.path.join(self.fixtures_dir, name), "r") as f:
+            return json.load(f)
+
+    async def _get_json(self, session, url, params=None, fixture=None):
+        if self.fixtures_dir:
+            return self._read_fixture(fixture)
+        async with session.get(url, params=params) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def _with_retries(self, provider, fetch, foreground=False):
+        retries = 0 if foreground else self.retries
+        timeout = min(self.timeouts[provider], FOREGROUND_TIMEOUT_SECONDS) if foreground else self.timeouts[provider]
+        for attempt in range(retries + 1):
+            try:
+                return await asyncio.wait_for(fetch(), timeout=timeout)
+            except TRANSIENT_ERRORS:
+                if attempt == retries:
+                    return None
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * (2 ** attempt))
+            except Exception:
+                return None
+
+    # ----------------- Providers --------------------
+    async def _build_aws_index(self, session):
+        # Streams the S3 offer file through the incremental parser; it is never held in memory
+        if self.fixtures_dir:
+            with open(os.path.join(self.fixtures_dir, "aws_s3_index.json"), "rb") as f:
+                return self.aws_index.build_from_file(f)
+        async with session.get(self.endpoints["aws"]) as response:
+            response.raise_for_status()
+            return await self.aws_index.build_from_stream(response.content)
+
+    async def _gcp_pricelist(self, session):
+        return await self._get_json(session, self.endpoints["gcp"], fixture="gcp_pricelist.json")
+
+    async def _azure(self, session, region_code):
+        params = {
+            "$filter": (
+                f"serviceName eq 'Storage' and armRegionName eq '{region_code}'"
+                f" and skuName eq 'Hot LRS' and meterName eq 'Data Stored'"
+            )
+        }
+        data = await self._get_json(session, self.endpoints["azure"], params=params, fixture=f"azure_{region_code}.json")
+        tiers = parse_azure_tiers(data)
+        return {"Standard": tiers} if tiers else None
+
+    async def fetch_schedules(self, targets, foreground=False):
+        # targets: iterable of (provider, region) -> {(provider, region): {storage class: tiers} or None}
+        # foreground=True: short timeouts, no retries, and the AWS index is only read, never downloaded
+        targets = list(dict.fromkeys(targets))
+        connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            downloads = {}
+
+            async def shared(name, factory):
+                # Several regions are served by one download (GCP pricelist, AWS index), so share it
+                future = downloads.get(name)
+                if future is None or (future.done() and (future.cancelled() or future.exception() is not None)):
+                    future = downloads[name] = asyncio.ensure_future(factory())
+                return await asyncio.shield(future)
+
+            async def aws(region_name):
+                if foreground:
+                    return self.aws_index.lookup_schedule(region_name)
+                if not self.aws_index.is_fresh():
+                    try:
+                        await shared("aws", lambda: self._build_aws_index(session))
+                    except Exception:
+                        # A stale index beats no price at all
+                        stale = self.aws_index.lookup_schedule(region_name)
+                        if stale is None:
+                            raise
+                        return stale
+                return self.aws_index.lookup_schedule(region_name)
+
+            async def gcp(region_code):
+                price = parse_gcp_price(await shared("gcp", lambda: self._gcp_pricelist(session)), region_code)
+                return {"Standard": [(0, float("inf"), price)]}
+
+            def fetcher(provider, region):
+                if provider == "Amazon S3":
+                    return lambda: aws(region)
+                if provider == "Google Cloud Storage":
+                    return lambda: gcp(region)
+                if provider == "Microsoft Azure":
+                    return lambda: self._azure(session, region)
+                raise ValueError(f"Unknown provider: {provider}")
+
+            schedules = await asyncio.gather(*[
+                self._with_retries(provider, fetcher(provider, region), foreground) for provider, region in targets
+            ])
+            for future in downloads.values():
+                if not future.done():
+                    future.cancel()
+        return dict(zip(targets, schedules))
+
+    async def fetch_prices(self, targets, foreground=False):
+        # targets: iterable of (provider, region) -> {(provider, region): price or None}
+        schedules = await self.fetch_schedules(targets, foreground)
+        return {target: standard_price(schedule) for target, schedule in schedules.items()}
+
+    def get_schedules(self, targets, foreground=False):
+        return _run(self.fetch_schedules(targets, foreground))
+
+    def get_prices(self, targets, foreground=False):
+        return _run(self.fetch_prices(targets, foreground))
+
+    def get_price(self, provider, region):
+        return self.get_prices([(provider, region)])[(provider, region)]
+
+
+def _run(coro):
+    # Streamlit scripts have no running loop; other hosts (e.g. notebooks) might, so fall back to a thread
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+
+    def target():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+PRICING_SERVICE = PricingService()
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from Pricing_Service import PRICING_SERVICE, FOREGROUND_TIMEOUT_SECONDS, standard_price
+
+try:
+    import fcntl
+except ImportError:  # Windows: SQLite's own locking still keeps writes consistent
+    fcntl = None
+
+# Versioned pricing snapshot shared by every process/replica that mounts the same cache/ directory.
+# Reads never wait on the network once a price exists: stale entries are served immediately and
+# refreshed in the background (stale-while-revalidate). A lock file makes sure only one process
+# refreshes at a time.
+
+SNAPSHOT_PATH = os.path.join("cache", "pricing.db")
+LOCK_PATH = os.path.join("cache", "pricing.lock")
+SCHEMA_VERSION = 2
+PRICE_TTL_SECONDS = 3600
+FAILED_FETCH_BACKOFF_SECONDS = 60  # don't block every rerun on a provider that is down
+
+
+class PricingSnapshotStore:
+    def __init__(self, path=SNAPSHOT_PATH, lock_path=LOCK_PATH, ttl=PRICE_TTL_SECONDS, service=PRICING_SERVICE):
+        self.path = path
+        self.lock_path = lock_path
+        self.ttl = ttl
+        self.service = service
+        self._refreshing = set()
+        self._failed_at = {}
+        self._lock = threading.Lock()  # guards _refreshing and _failed_at (background threads write both)
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _ensure_schema(self):
+        # On first use rather than at import, so importing the pricing code touches no files
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                with conn:
+                    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS prices ("
+                        " provider TEXT, region TEXT, price REAL, fetched_at REAL, snapshot_version INTEGER,"
+                        " schedule TEXT, PRIMARY KEY (provider, region))"
+                    )
+                    # v1 snapshots had no tier schedules
+                    columns = [row[1] for row in conn.execute("PRAGMA table_info(prices)")]
+                    if "schedule" not in columns:
+                        conn.execute("ALTER TABLE prices ADD COLUMN schedule TEXT")
+                    conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', ?)", (SCHEMA_VERSION,))
+                    conn.execute("UPDATE meta SET value = ? WHERE key = 'schema_version'", (SCHEMA_VERSION,))
+                    conn.execute("INSERT OR IGNORE INTO meta VALUES ('snapshot_version', 0)")
+            finally:
+                conn.close()
+            self._initialized = True
+
+    @contextmanager
+    def _connect(self):
+        self._ensure_schema()
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _file_lock(self, blocking, wait_seconds=None):
+        # wait_seconds bounds a blocking wait, e.g. behind a background refresh that is downloading
+        self._ensure_schema()
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                deadline = None if wait_seconds is None else time.monotonic() + wait_seconds
+                while True:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking and deadline is None else fcntl.LOCK_NB))
+                        break
+                    except BlockingIOError:
+                        if not blocking or time.monotonic() >= deadline:
+                            yield False
+                            return
+                        time.sleep(0.1)
+            try:
+                yield True
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self, targets, with_schedule=False):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT provider, region, price, fetched_at, schedule FROM prices").fetchall()
+        wanted = set(targets)
+        snapshot = {}
+        for p, r, price, fetched_at, schedule in rows:
+            if (p, r) not in wanted:
+                continue
+            if with_schedule:
+                snapshot[(p, r)] = (json.loads(schedule) if schedule else None, fetched_at)
+            else:
+                snapshot[(p, r)] = (price, fetched_at)
+        return snapshot
+
+    def _write(self, schedules):
+        # A refresh where every fetch failed is not a new snapshot: existing prices keep their version and age
+        fetched = {t: schedule for t, schedule in schedules.items() if standard_price(schedule) is not None}
+        if not fetched:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'snapshot_version'")
+            version = conn.execute("SELECT value FROM meta WHERE key = 'snapshot_version'").fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?)",
+                [(p, r, standard_price(schedule), now, version, json.dumps(schedule)) for (p, r), schedule in fetched.items()]
+            )
+
+    def refresh(self, targets, blocking=True, foreground=False):
+        wait_seconds = FOREGROUND_TIMEOUT_SECONDS if foreground else None
+        with self._file_lock(blocking, wait_seconds) as acquired:
+            if not acquired:
+                return False  # another process is already refreshing
+            # Another process may have refreshed while we waited for the lock
+            current = self._read(targets)
+            due = [t for t in targets if t not in current or time.time() - current[t][1] >= self.ttl]
+            if due:
+                schedules = self.service.get_schedules(due, foreground=foreground)
+                self._write(schedules)
+                now = time.time()
+                with self._lock:
+                    for t, schedule in schedules.items():
+                        if standard_price(schedule) is None:
+                            self._failed_at[t] = now
+                        else:
+                            self._failed_at.pop(t, None)
+            return True
+
+    def _refresh_in_background(self, targets):
+        with self._lock:
+            targets = [t for t in targets if t not in self._refreshing]
+            if not targets:
+                return
+            self._refreshing.update(targets)
+
+        def run():
+            try:
+                self.refresh(targets, blocking=False)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(targets)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_prices(self, targets, with_schedule=False):
+        # -> {(provider, region): (price or None, fetched_at or None)}
+        # with_schedule=True returns the tier schedule ({storage class: tiers}) instead of the price
+        targets = list(dict.fromkeys(targets))
+        snapshot = self._read(targets, with_schedule)
+
+        now = time.time()
+        with self._lock:
+            missing = [
+                t for t in targets
+                if t not in snapshot and now - self._failed_at.get(t, 0) >= FAILED_FETCH_BACKOFF_SECONDS
+            ]
+        if missing:
+            # Cold start for these keys: nothing to serve yet, so try a quick fetch now and leave
+            # slow sources (the AWS offer file) to a background refresh
+            self.refresh(missing, blocking=True, foreground=True)
+            snapshot = self._read(targets, with_schedule)
+
+        stale = [t for t in targets if t in snapshot and time.time() - snapshot[t][1] >= self.ttl]
+        unfetched = [t for t in missing if t not in snapshot]
+        if stale or unfetched:
+            self._refresh_in_background(stale + unfetched)
+
+        return {t: snapshot.get(t, (None, None)) for t in targets}
+
+    def get_price(self, provider, region):
+        return self.get_prices([(provider, region)])[(provider, region)]
+
+    def get_schedule(self, provider, region):
+        return self.get_prices([(provider, region)], with_schedule=True)[(provider, region)]
+
+    def snapshot_version(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT value FROM meta WHERE key = 'snapshot_version'").fetchone()[0]
+
+
+PRICING_SNAPSHOTS = PricingSnapshotStore()
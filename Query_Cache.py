@@ -0,0 +1,105 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Answer cache for the Project Assistant. Entries are keyed by the normalised question and scoped to
+# a corpus key (uploads + project_info fingerprint); a new corpus key drops every older entry, so
+# answers never outlive the documents they came from. Besides exact matches, a question whose
+# embedding is within SIMILARITY_THRESHOLD of a cached one ("what's the tech stack?" vs "which tech
+# stack is used") reuses that answer.
+
+MAX_ENTRIES = 1024
+SIMILARITY_THRESHOLD = 0.95
+
+_SPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCT_RE = re.compile(r"^[^\w]+|[^\w]+$")
+
+
+def normalize_query(query):
+    return _EDGE_PUNCT_RE.sub("", _SPACE_RE.sub(" ", query.lower())).strip()
+
+def corpus_key(files, project_info=None, params=None):
+    # files: {filename: path}; mtime/size changes are enough to invalidate, no hashing of contents.
+    # params: retrieval settings (top_k, thresholds) -- answers built with other settings don't match
+    digest = hashlib.sha256()
+    for filename in sorted(files):
+        try:
+            st_info = os.stat(files[filename])
+        except OSError:
+            continue
+        digest.update(f"{filename}|{st_info.st_mtime_ns}|{st_info.st_size}\n".encode("utf-8"))
+    digest.update(json.dumps(project_info or {}, sort_keys=True).encode("utf-8"))
+    digest.update(json.dumps(params or {}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+class QueryCache:
+    def __init__(self, max_entries=MAX_ENTRIES, threshold=SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries = OrderedDict()  # normalised query -> (value, vector or None)
+        self._scope = None
+        self._matrix = None  # (keys, stacked vectors), rebuilt lazily after changes
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "exact_hits": 0, "similar_hits": 0, "invalidations": 0}
+
+    def _enter_scope(self, scope):
+        if scope != self._scope:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._matrix = None
+            self._scope = scope
+
+    def get(self, query, scope):
+        with self._lock:
+            self._enter_scope(scope)
+            key = normalize_query(query)
+            self._stats["lookups"] += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self._stats["exact_hits"] += 1
+            return entry[0]
+
+    def get_similar(self, query_vector, scope):
+        # Nearest cached question by cosine similarity (vectors are normalised)
+        with self._lock:
+            self._enter_scope(scope)
+            if self._matrix is None:
+                keyed = [(k, v) for k, (_, v) in self._entries.items() if v is not None]
+                self._matrix = ([k for k, _ in keyed], np.stack([v for _, v in keyed]) if keyed else None)
+            keys, matrix = self._matrix
+            if matrix is None:
+                return None
+            scores = matrix @ np.asarray(query_vector, dtype=np.float32)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold or keys[best] not in self._entries:
+                return None
+            self._entries.move_to_end(keys[best])
+            self._stats["similar_hits"] += 1
+            return self._entries[keys[best]][0]
+
+    def put(self, query, scope, value, query_vector=None):
+        with self._lock:
+            self._enter_scope(scope)
+            key = normalize_query(query)
+            vector = None if query_vector is None else np.asarray(query_vector, dtype=np.float32)
+            self._entries[key] = (value, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+
+QUERY_CACHE = QueryCache()
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Content-addressed store for generated reports. An artifact's file name carries a fingerprint of
+# its kind, parameters (filters) and the history data version, so asking for the same report over
+# unchanged data returns the file that is already there instead of writing another timestamped copy.
+# The directory is kept bounded -- files past MAX_AGE_SECONDS go first, then the least recently
+# used until it is under MAX_BYTES -- and recently served files are kept in memory for
+# st.download_button. File names are the only index, so job workers and the server share a store
+# without coordinating.
+
+MAX_BYTES = 500 * 1024 * 1024
+MAX_AGE_SECONDS = 30 * 24 * 3600
+MEMORY_BYTES = 64 * 1024 * 1024
+ARTIFACT_SUFFIXES = (".pdf", ".csv")
+ARTIFACT_FORMAT_VERSION = 1  # bump when report layouts change so stale files aren't served
+STAGING_PREFIX = ".build-"
+STALE_STAGING_SECONDS = 3600  # no report takes this long; older staging dirs are from crashed builds
+
+
+def fingerprint(kind, params=None, data_version=None):
+    encoded = json.dumps(
+        {"kind": kind, "params": params or {}, "data": data_version, "format": ARTIFACT_FORMAT_VERSION},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:24]
+
+class ArtifactStore:
+    def __init__(self, root, max_bytes=MAX_BYTES, max_age_seconds=MAX_AGE_SECONDS, memory_bytes=MEMORY_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.memory_bytes = memory_bytes
+        self._memory = OrderedDict()  # (path, mtime_ns, size) -> bytes
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "builds": 0, "evicted": 0, "memory_hits": 0}
+
+    def _path(self, kind, key, suffix):
+        return os.path.join(self.root, f"{kind}_{key}{suffix}")
+
+    def find(self, kind, params=None, data_version=None, suffix=".pdf"):
+        # -> path of an existing artifact for these inputs, or None
+        path = self._path(kind, fingerprint(kind, params, data_version), suffix)
+        try:
+            os.utime(path)  # mtime doubles as "last used" for eviction
+        except OSError:
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return path
+
+    def get_or_create(self, kind, build, params=None, data_version=None, suffix=".pdf"):
+        # build(save_path) writes the report into save_path and returns its file path
+        existing = self.find(kind, params, data_version, suffix)
+        if existing is not None:
+            return existing
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(kind, fingerprint(kind, params, data_version), suffix)
+        # Built in a private directory and renamed in, so readers never see a half-written file
+        staging = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=self.root)
+        try:
+            built = build(staging)
+            if built is None:
+                return None
+            os.replace(built, path)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        with self._lock:
+            self._stats["builds"] += 1
+        self.evict()
+        return path
+
+    def read_bytes(self, path):
+        # Contents for st.download_button; small recent files are served from memory
+        st_info = os.stat(path)
+        key = (path, st_info.st_mtime_ns, st_info.st_size)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return data
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) <= self.memory_bytes // 4:
+            with self._lock:
+                self._memory[key] = data
+                self._memory_used += len(data)
+                while self._memory_used > self.memory_bytes:
+                    _, dropped = self._memory.popitem(last=False)
+                    self._memory_used -= len(dropped)
+        return data
+
+    def evict(self):
+        # Age limit first, then least recently used until the directory fits max_bytes
+        if not os.path.isdir(self.root):
+            return 0
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.root):
+            if entry.is_dir() and entry.name.startswith(STAGING_PREFIX):
+                try:
+                    if now - entry.stat().st_mtime > STALE_STAGING_SECONDS:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                except OSError:
+                    pass
+            elif entry.is_file() and entry.name.endswith(ARTIFACT_SUFFIXES):
+                st_info = entry.stat()
+                files.append((st_info.st_mtime, st_info.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            if now - mtime <= self.max_age_seconds and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._stats["evicted"] += removed
+        return removed
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_bytes"] = self._memory_used
+        return stats
+
+
+REPORT_ARTIFACTS = ArtifactStore("reports")
+DOWNLOAD_ARTIFACTS = ArtifactStore("downloads")
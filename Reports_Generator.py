@@ -3,6 +3,11 @@ import os
 import pandas as pd
 from datetime import datetime
 import streamlit as st
+from PDF_Table_Writer import write_table_pdf
+from History_Store import HISTORY_COLUMNS
+
+# Display formats for the table reports; other float columns use two decimals
+REPORT_FORMATS = {"Size (GB)": "%.4f"}
 
 class PDF(FPDF):
     def header(self):
@@ -23,69 +28,77 @@ class PDF(FPDF):
 
 # ----------------- PDF Generators --------------------
 def generate_cost_report_pdf(cost_df, save_path="reports"):
+    # cost_df: a DataFrame or an iterable of chunks (HistoryArchive.iter_cost_breakdown)
     os.makedirs(save_path, exist_ok=True)
     pdf = PDF()
     pdf.add_page()
     pdf.chapter_title("Cost Breakdown")
 
     if cost_df is not None:
-        data = cost_df.to_dict(orient="records")
-        pdf.chapter_body(data, "Cost Component", "Amount ($)")
+        for chunk in _as_chunks(cost_df):
+            pdf.chapter_body(chunk.to_dict(orient="records"), "Cost Component", "Amount ($)")
         filename = f"cost_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         full_path = os.path.join(save_path, filename)
         pdf.output(full_path)
         return full_path
     return None
 
-def generate_history_report_pdf(history_df, save_path="reports"):
+def generate_uncertainty_report_pdf(summary_df, inputs, samples, retention, save_path="reports"):
+    # Monte Carlo results: the input distributions, then P10/P50/P90 of the total per provider
     os.makedirs(save_path, exist_ok=True)
     pdf = PDF()
     pdf.add_page()
-    pdf.chapter_title("Estimate History")
-
-    headers = list(history_df.columns)
+    pdf.chapter_title("Cost Uncertainty (Monte Carlo)")
     pdf.set_font('Arial', '', 10)
-    for h in headers:
-        pdf.cell(40, 8, h, border=1)
-    pdf.ln()
+    pdf.cell(0, 8, f"{samples:,} simulated scenarios, {retention}-month retention", ln=True)
+    for name, description in inputs.items():
+        pdf.cell(0, 8, f"{name}: {description}", ln=True)
+    pdf.ln(4)
 
-    for _, row in history_df.iterrows():
-        for h in headers:
-            pdf.cell(40, 8, str(row[h]), border=1)
+    headers = ["Provider", "Mean ($)", "P10 ($)", "P50 ($)", "P90 ($)"]
+    widths = [55, 30, 30, 30, 30]
+    pdf.set_font('Arial', 'B', 10)
+    for h, w in zip(headers, widths):
+        pdf.cell(w, 8, h, border=1)
+    pdf.ln()
+    pdf.set_font('Arial', '', 10)
+    for row in summary_df[headers].itertuples(index=False):
+        pdf.cell(widths[0], 8, str(row[0]), border=1)
+        for value, w in zip(row[1:], widths[1:]):
+            pdf.cell(w, 8, f"{value:,.2f}", border=1, align='R')
         pdf.ln()
 
-    filename = f"history_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    filename = f"uncertainty_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     full_path = os.path.join(save_path, filename)
     pdf.output(full_path)
     return full_path
 
+def generate_history_report_pdf(history_df, save_path="reports"):
+    # history_df: a DataFrame or an iterable of chunks (HistoryStore.iter_history); streamed to disk page by page
+    filename = f"history_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    return write_table_pdf(os.path.join(save_path, filename), "Estimate History", _as_chunks(history_df), REPORT_FORMATS)
+
 # ----------------- Filtered Export Logic --------------------
-def export_filtered_data_to_csv(filtered_df, *, save_path="downloads"):
+def _as_chunks(data):
+    # Accepts a DataFrame or an iterable of DataFrame chunks (e.g. HistoryStore.iter_history)
+    return [data] if isinstance(data, pd.DataFrame) else data
+
+def export_filtered_data_to_csv(filtered_df, *, save_path="downloads", columns=None):
     os.makedirs(save_path, exist_ok=True)
     filename = f"filtered_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     full_path = os.path.join(save_path, filename)
-    filtered_df.to_csv(full_path, index=False)
+    # Written chunk by chunk, so the full filtered set is never in memory at once
+    header = True
+    with open(full_path, "w", newline="") as f:
+        for chunk in _as_chunks(filtered_df):
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+        if header:
+            # No matching rows: still a valid CSV with the history columns
+            pd.DataFrame(columns=columns or list(HISTORY_COLUMNS.values())).to_csv(f, index=False)
     return full_path
 
 
 def export_filtered_data_to_pdf(filtered_df, *, save_path="reports"):
-    os.makedirs(save_path, exist_ok=True)
-    pdf = PDF()
-    pdf.add_page()
-    pdf.chapter_title("Filtered Estimate Export")
-
-    headers = list(filtered_df.columns)
-    pdf.set_font('Arial', '', 10)
-    for h in headers:
-        pdf.cell(40, 8, h, border=1)
-    pdf.ln()
-
-    for _, row in filtered_df.iterrows():
-        for h in headers:
-            pdf.cell(40, 8, str(row[h]), border=1)
-        pdf.ln()
-
     filename = f"filtered_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    full_path = os.path.join(save_path, filename)
-    pdf.output(full_path)
-    return full_path
\ No newline at end of file
+    return write_table_pdf(os.path.join(save_path, filename), "Filtered Estimate Export", _as_chunks(filtered_df), REPORT_FORMATS)
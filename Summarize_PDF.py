@@ -1,44 +1,57 @@
 import os
-from langchain_huggingface import HuggingFaceEndpoint
-from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
-from dotenv import load_dotenv
-
-load_dotenv()
-token = os.getenv("HUGGINGFACEHUB_API_TOKEN")
-
-llm = HuggingFaceEndpoint(
-    repo_id="mistralai/Mistral-7B-Instruct-v0.3",
-    task="text-generation",
-    temperature=0.5,
-    max_new_tokens=512
-)
-
-def load_and_split_pdf(file_path):
+from Vector_Index import VECTOR_INDEXES, CHUNK_SIZE, CHUNK_OVERLAP
+from Map_Reduce_Summarizer import MapReduceSummarizer
+from Model_Registry import MODEL_REGISTRY
+from Job_Queue import JOB_QUEUE, poll_job
+
+# LangChain and the models are imported/loaded on first use (see Model_Registry), not at import time
+
+# Summaries read every chunk, so use fewer, larger chunks than retrieval does
+SUMMARY_CHUNK_SIZE = 4000
+SUMMARY_CHUNK_OVERLAP = 200
+
+def get_llm():
+    return MODEL_REGISTRY.get("summary_llm")
+
+def get_embeddings():
+    # One embedding model per process instead of one per question
+    return MODEL_REGISTRY.get("hf_embeddings")
+
+def load_and_split_pdf(file_path, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    from langchain_community.document_loaders import PyMuPDFLoader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
     loader = PyMuPDFLoader(file_path)
     docs = loader.load()
     if not docs:
         raise ValueError(f"No pages found in the PDF: {file_path}")
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=200)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     return splitter.split_documents(docs)
 
 def create_vector_store(chunks):
-    embeddings = HuggingFaceEmbeddings()
-    return FAISS.from_documents(chunks, embeddings)
+    from langchain_community.vectorstores import FAISS
+    return FAISS.from_documents(chunks, get_embeddings())
+
+def load_vector_store(file_path):
+    # Persisted per-document index; the PDF is only split and embedded when its content is new
+    return VECTOR_INDEXES.load_or_build(file_path, get_embeddings(), load_and_split_pdf)
 
 def create_qa_chain(vector_store):
-    return RetrievalQA.from_chain_type(llm=llm, retriever=vector_store.as_retriever())
+    from langchain.chains import RetrievalQA
+    return RetrievalQA.from_chain_type(llm=get_llm(), retriever=vector_store.as_retriever())
 
 def answer_from_pdf(filename, question):
     file_path = os.path.join("uploads", filename)
-    chunks = load_and_split_pdf(file_path)
-    vectordb = create_vector_store(chunks)
+    vectordb = load_vector_store(file_path)
     qa_chain = create_qa_chain(vectordb)
     return qa_chain.run(question)
 
+def summarize_pdf(filename, llm_backend=None, progress=None):
+    # Map-reduce over the whole document instead of the few chunks a RetrievalQA question retrieves
+    file_path = os.path.join("uploads", filename)
+    chunks = load_and_split_pdf(file_path, SUMMARY_CHUNK_SIZE, SUMMARY_CHUNK_OVERLAP)
+    summarizer = MapReduceSummarizer(llm_backend if llm_backend is not None else get_llm())
+    return summarizer.summarize([chunk.page_content for chunk in chunks], title=filename, progress=progress)
+
 # 👇 Wrap Streamlit interface in a callable function
 def run():
     import streamlit as st
@@ -47,14 +60,17 @@ def run():
     st.markdown("<div class='section-header'>Select a PDF to Summarize:</div>", unsafe_allow_html=True)
     selected_pdf = st.selectbox("", pdf_files, label_visibility="collapsed")
 
-    if st.button("Summarize Selected PDF"):
-        with st.spinner("Summarizing... Please wait."):
-            try:
-                summary = answer_from_pdf(selected_pdf, f"Summarize the contents of {selected_pdf}.")
-                st.subheader("📘 Summary")
-                if isinstance(summary, dict) and "result" in summary:
-                    st.write(summary["result"])
-                else:
-                    st.write(summary)
-            except Exception as e:
-                st.error(f"An error occurred: {str(e)}")
+    # Summaries run as background jobs: they survive reruns, and one PDF is summarized once however
+    # many sessions ask for it at the same time
+    summary_jobs = st.session_state.setdefault("summary_jobs", {})
+    if st.button("Summarize Selected PDF") and selected_pdf:
+        summary_jobs[selected_pdf] = JOB_QUEUE.submit(
+            "summarize", {"filename": selected_pdf}, session_id=st.session_state.get("session_id")
+        )
+
+    def show_summary(result):
+        st.subheader("📘 Summary")
+        st.write(result["summary"])
+
+    if selected_pdf in summary_jobs:
+        poll_job(summary_jobs[selected_pdf], show_summary)
@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import hashlib
+import threading
+import multiprocessing
+import fitz  # PyMuPDF
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Text extraction for the Project Assistant. Each page is cut into overlapping windows sized in
+# (approximate) tokens, so chunks fit the embedding model's input instead of being truncated.
+# Files are extracted in worker processes and handed back one file at a time through a generator;
+# only a bounded number of files is ever in flight, so memory stays flat however large uploads/ is.
+# Chunks are cached per file content; a file is only re-read when its mtime/size change, and only
+# re-extracted when its content hash changes too.
+
+CHUNK_CACHE_DIR = os.path.join("cache", "text_chunks")
+CHUNK_CACHE_VERSION = 1
+CHUNK_TOKENS = 200  # all-MiniLM-L6-v2 truncates at 256 word pieces; leave room for sub-word splits
+CHUNK_OVERLAP_TOKENS = 50
+PARALLEL_THRESHOLD = 2
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_POOL = None
+_POOL_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+_fingerprints = {}  # path -> (mtime_ns, size, content hash)
+_fingerprints_lock = threading.Lock()
+
+
+def window_spans(text, chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    # (start, end) character offsets of overlapping token windows over `text`
+    tokens = [m.span() for m in _TOKEN_RE.finditer(text)]
+    if not tokens:
+        return []
+    step = max(1, chunk_tokens - overlap_tokens)
+    spans = []
+    for start in range(0, len(tokens), step):
+        window = tokens[start:start + chunk_tokens]
+        spans.append((window[0][0], window[-1][1]))
+        if start + chunk_tokens >= len(tokens):
+            break
+    return spans
+
+def chunk_page(filename, page_number, text, chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    return [
+        {"filename": filename, "page": page_number, "text": text[start:end]}
+        for start, end in window_spans(text, chunk_tokens, overlap_tokens)
+    ]
+
+def _cache_path(content_hash, chunk_tokens, overlap_tokens):
+    key = f"{content_hash}-{chunk_tokens}-{overlap_tokens}-v{CHUNK_CACHE_VERSION}"
+    return os.path.join(CHUNK_CACHE_DIR, content_hash[:2], f"{key}.json")
+
+def _read_cached(content_hash, chunk_tokens, overlap_tokens):
+    try:
+        with open(_cache_path(content_hash, chunk_tokens, overlap_tokens), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_cached(content_hash, chunk_tokens, overlap_tokens, chunks):
+    path = _cache_path(content_hash, chunk_tokens, overlap_tokens)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(chunks, f)
+    os.replace(tmp_path, path)
+
+def extract_file(path, filename, chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    # Runs in a worker: -> (content hash, chunks). Chunks are stored without the filename, which
+    # belongs to the upload rather than the content.
+    with open(path, "rb") as f:
+        data = f.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+    cached = _read_cached(content_hash, chunk_tokens, overlap_tokens)
+    if cached is not None:
+        return content_hash, cached
+
+    chunks = []
+    try:
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            for i, page in enumerate(doc):
+                text = page.get_text().strip()
+                if text:
+                    chunks.extend(
+                        {"page": c["page"], "text": c["text"]}
+                        for c in chunk_page(filename, i + 1, text, chunk_tokens, overlap_tokens)
+                    )
+    except Exception as e:
+        # Not cached, so a repaired file is picked up on the next pass
+        return None, [{"page": 0, "text": f"[ERROR] Could not read file: {e}"}]
+    _write_cached(content_hash, chunk_tokens, overlap_tokens, chunks)
+    return content_hash, chunks
+
+def _with_filename(filename, chunks):
+    return [{"filename": filename, "page": c["page"], "text": c["text"]} for c in chunks]
+
+def _from_cache(path, chunk_tokens, overlap_tokens):
+    # Unchanged mtime/size -> known content hash -> cached chunks, without reading the PDF
+    try:
+        st_info = os.stat(path)
+    except OSError:
+        return None
+    with _fingerprints_lock:
+        known = _fingerprints.get(path)
+    if known is None or known[:2] != (st_info.st_mtime_ns, st_info.st_size):
+        return None
+    return _read_cached(known[2], chunk_tokens, overlap_tokens)
+
+def _remember(path, content_hash):
+    if content_hash is None:
+        return
+    try:
+        st_info = os.stat(path)
+    except OSError:
+        return
+    with _fingerprints_lock:
+        _fingerprints[path] = (st_info.st_mtime_ns, st_info.st_size, content_hash)
+
+def _get_pool():
+    global _POOL
+    if _POOL is None:
+        # spawn keeps workers clear of the Streamlit server threads
+        _POOL = ProcessPoolExecutor(max_workers=_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _POOL
+
+# `files` maps filename -> path. Yields (filename, chunks) per file in completion order, cached files
+# first, so callers can index each file while the rest are still being extracted.
+def iter_file_chunks(files, chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS, parallel=None):
+    misses = []
+    for filename, path in files.items():
+        cached = _from_cache(path, chunk_tokens, overlap_tokens)
+        if cached is None:
+            misses.append((filename, path))
+        else:
+            yield filename, _with_filename(filename, cached)
+
+    if parallel is None:
+        parallel = len(misses) >= PARALLEL_THRESHOLD and _POOL_WORKERS > 1
+
+    if not parallel:
+        for filename, path in misses:
+            content_hash, chunks = extract_file(path, filename, chunk_tokens, overlap_tokens)
+            _remember(path, content_hash)
+            yield filename, _with_filename(filename, chunks)
+        return
+
+    pool = _get_pool()
+    queue = iter(misses)
+    pending = {}
+    max_in_flight = 2 * _POOL_WORKERS  # bounds how many files' chunks are held at once
+
+    def submit_next():
+        item = next(queue, None)
+        if item is None:
+            return False
+        filename, path = item
+        pending[pool.submit(extract_file, path, filename, chunk_tokens, overlap_tokens)] = item
+        return True
+
+    while len(pending) < max_in_flight and submit_next():
+        pass
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            filename, path = pending.pop(future)
+            content_hash, chunks = future.result()
+            _remember(path, content_hash)
+            yield filename, _with_filename(filename, chunks)
+            submit_next()
+
+def iter_chunks(files, **kwargs):
+    # Flat stream of chunk dicts (filename, page, text)
+    for _, chunks in iter_file_chunks(files, **kwargs):
+        yield from chunks
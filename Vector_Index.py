@@ -0,0 +1,143 @@
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from Ingestion_Cache import content_key
+from Model_Registry import EMBEDDING_MODEL_NAME
+
+# Per-document FAISS indexes persisted under cache/vector_index/<key>/. The key covers the file
+# content, the chunking parameters and the embedding model, so a PDF is only split and embedded
+# the first time it is seen (or after it changes); later loads memory-map the saved index.
+# faiss and LangChain are imported on first use so importing this module stays cheap.
+
+INDEX_DIR = os.path.join("cache", "vector_index")
+INDEX_VERSION = 2  # bump when the on-disk layout, chunk metadata or embedding settings change
+DEFAULT_EMBEDDING_MODEL = EMBEDDING_MODEL_NAME
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 200
+MAX_LOADED_INDEXES = 8
+
+
+def file_content_key(file_path):
+    with open(file_path, "rb") as f:
+        return content_key(f.read())
+
+def index_key(file_hash, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, model_name=DEFAULT_EMBEDDING_MODEL):
+    params = f"{INDEX_VERSION}|{file_hash}|{chunk_size}|{chunk_overlap}|{model_name}"
+    return hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+class VectorIndexStore:
+    def __init__(self, index_dir=INDEX_DIR, max_loaded=MAX_LOADED_INDEXES):
+        self.index_dir = index_dir
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()  # key -> FAISS store, most recently used last
+        self._hashes = {}  # path -> (mtime, size, content hash); avoids rehashing unchanged files
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "builds": 0}
+
+    def _path(self, key):
+        return os.path.join(self.index_dir, key)
+
+    def _file_hash(self, file_path):
+        st_info = os.stat(file_path)
+        fingerprint = (st_info.st_mtime_ns, st_info.st_size)
+        cached = self._hashes.get(file_path)
+        if cached is not None and cached[:2] == fingerprint:
+            return cached[2]
+        file_hash = file_content_key(file_path)
+        self._hashes[file_path] = fingerprint + (file_hash,)
+        return file_hash
+
+    def _remember(self, key, store):
+        with self._lock:
+            self._loaded[key] = store
+            self._loaded.move_to_end(key)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def _read(self, key, embeddings):
+        import faiss
+        from langchain_community.vectorstores import FAISS
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, "meta.json"), "r") as f:
+                if json.load(f).get("version") != INDEX_VERSION:
+                    return None
+            with open(os.path.join(path, "docstore.pkl"), "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+        except (OSError, ValueError, EOFError, AttributeError, pickle.UnpicklingError):
+            # Missing, truncated or written by other classes: rebuild it
+            return None
+
+        index_path = os.path.join(path, "index.faiss")
+        try:
+            # Vectors stay in the page cache and are shared between processes
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+        except RuntimeError:
+            # Not every faiss build/index type supports mmap; a plain read still skips re-embedding
+            try:
+                index = faiss.read_index(index_path)
+            except RuntimeError:
+                return None
+        return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+    def _write(self, key, store, source_name, chunk_count):
+        import faiss
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        faiss.write_index(store.index, os.path.join(tmp_path, "index.faiss"))
+        with open(os.path.join(tmp_path, "docstore.pkl"), "wb") as f:
+            pickle.dump((store.docstore, store.index_to_docstore_id), f)
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump({"version": INDEX_VERSION, "source": source_name, "chunks": chunk_count}, f)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Another process finished the same index first; theirs is identical
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def load_or_build(self, file_path, embeddings, split_fn, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+                      model_name=DEFAULT_EMBEDDING_MODEL):
+        # split_fn(file_path) -> LangChain documents; only called when no index exists for this content
+        key = index_key(self._file_hash(file_path), chunk_size, chunk_overlap, model_name)
+        with self._lock:
+            store = self._loaded.get(key)
+            if store is not None:
+                self._loaded.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return store
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                store = self._loaded.get(key)
+            if store is not None:
+                return store
+
+            store = self._read(key, embeddings)
+            if store is not None:
+                self._stats["disk_hits"] += 1
+            else:
+                from langchain_community.vectorstores import FAISS
+                chunks = split_fn(file_path)
+                store = FAISS.from_documents(chunks, embeddings)
+                os.makedirs(self.index_dir, exist_ok=True)
+                self._write(key, store, os.path.basename(file_path), len(chunks))
+                self._stats["builds"] += 1
+            self._remember(key, store)
+        return store
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["loaded_indexes"] = len(self._loaded)
+        return stats
+
+
+VECTOR_INDEXES = VectorIndexStore()
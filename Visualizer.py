@@ -1,23 +1,19 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-import os
+from History_Store import HISTORY_STORE
 
 def render_visualizations():
-    cost_df_path = os.path.join("history", "master_cost_breakdown.csv")
-    history_df_path = os.path.join("history", "master_history.csv")
-
-    # Load cost breakdown
-    if os.path.exists(cost_df_path):
-        cost_df = pd.read_csv(cost_df_path)
+    # Every chart is drawn from the rollup tables, so the payload stays the same size as history grows
+    if HISTORY_STORE.has_cost_breakdown():
+        cost_df = HISTORY_STORE.component_rollup()
         cost_df = cost_df[cost_df["Cost Component"] != "Total Estimated"]
-        cost_df["Amount ($)"] = cost_df["Amount ($)"].astype(float)
     else:
         st.warning("📉 No master cost data available.")
         return
 
-    # Load history
-    history_df = pd.read_csv(history_df_path) if os.path.exists(history_df_path) else pd.DataFrame()
+    provider_df = HISTORY_STORE.provider_rollup()
+    trend_df = HISTORY_STORE.trend_series()
 
     tabs = st.tabs([
         "📊 Bar Chart - Cost Breakdown",
@@ -27,7 +23,8 @@ def render_visualizations():
         "📃 Total Pages Trend",
         "💾 Total Storage Size Trend",
         "📉 Cost Comparison Across Providers",
-        "🌐 Multi-Provider Cost Comparison"
+        "🌐 Multi-Provider Cost Comparison",
+        "🎲 Cost Uncertainty"
     ])
 
     with tabs[0]:
@@ -51,35 +48,35 @@ def render_visualizations():
             tooltip=["Cost Component", "Amount ($)"]
         ).properties(title="Cost Trend"), use_container_width=True)
 
-    if not history_df.empty:
+    if not provider_df.empty:
         with tabs[3]:
-            st.altair_chart(alt.Chart(history_df).mark_bar().encode(
+            st.altair_chart(alt.Chart(provider_df).mark_bar().encode(
                 x="Provider:N",
                 y="Total ($):Q",
                 color="Provider:N",
-                tooltip=["Provider", "Total ($)"]
+                tooltip=["Provider", "Total ($)", "Estimates"]
             ).properties(title="Storage Provider Cost Comparison"), use_container_width=True)
 
         with tabs[4]:
-            st.altair_chart(alt.Chart(history_df.reset_index()).mark_line(point=True).encode(
-                x=alt.X("index:Q", title="Entry"),
+            st.altair_chart(alt.Chart(trend_df).mark_line(point=True).encode(
+                x=alt.X("Date:T", title="Date"),
                 y="Pages:Q",
-                tooltip=["Pages"]
+                tooltip=["Date", "Pages", "Estimates"]
             ).properties(title="Trend of Pages Over Time"), use_container_width=True)
 
         with tabs[5]:
-            st.altair_chart(alt.Chart(history_df.reset_index()).mark_area(opacity=0.3).encode(
-                x=alt.X("index:Q", title="Entry"),
+            st.altair_chart(alt.Chart(trend_df).mark_area(opacity=0.3).encode(
+                x=alt.X("Date:T", title="Date"),
                 y="Size (GB):Q",
-                tooltip=["Size (GB)"]
+                tooltip=["Date", "Size (GB)", "Estimates"]
             ).properties(title="Storage Size Trend"), use_container_width=True)
 
         with tabs[6]:
-            st.altair_chart(alt.Chart(history_df).mark_bar().encode(
+            st.altair_chart(alt.Chart(provider_df).mark_bar().encode(
                 x=alt.X("Provider:N", title="Storage Provider"),
-                y=alt.Y("Total ($):Q", title="Estimated Cost ($)"),
+                y=alt.Y("Average Total ($):Q", title="Average Estimated Cost ($)"),
                 color="Provider:N",
-                tooltip=["Provider", "Total ($)", "Pages", "Retention (mo)"]
+                tooltip=["Provider", "Average Total ($)", "Estimates", "Pages", "Average Retention (mo)"]
             ).properties(title="Estimated Cost Comparison Across Cloud Providers"), use_container_width=True)
 
         with tabs[7]:
@@ -97,4 +94,29 @@ def render_visualizations():
             with tabs[i]:
                 st.info("📌 No master history data available for this chart.")
 
+    with tabs[8]:
+        # Pre-binned in Cost_Engine.simulate_costs, so the chart gets bins rather than every sample
+        monte_carlo = st.session_state.get("monte_carlo")
+        if monte_carlo is None:
+            st.info("📌 Enable the Monte Carlo uncertainty analysis in the Cost Estimator to see cost distributions.")
+        else:
+            summary = monte_carlo["summary"]
+            distribution = alt.Chart(monte_carlo["histogram"]).mark_area(opacity=0.35, interpolate="step").encode(
+                x=alt.X("Total ($):Q", title="Simulated Total Cost ($)"),
+                y=alt.Y("Share:Q", title="Share of Samples", axis=alt.Axis(format="%")),
+                color="Provider:N",
+                tooltip=["Provider", "Bin Start ($)", "Bin End ($)", alt.Tooltip("Share:Q", format=".2%")]
+            )
+            medians = alt.Chart(summary).mark_rule(strokeDash=[4, 4]).encode(
+                x="P50 ($):Q",
+                color="Provider:N",
+                tooltip=["Provider", "P10 ($)", "P50 ($)", "P90 ($)"]
+            )
+            st.altair_chart((distribution + medians).properties(
+                title=f"Distribution of Total Cost ({monte_carlo['samples']:,} samples; dashed = P50)"
+            ), use_container_width=True)
+            display_summary = summary.round(2)
+            display_summary.index = [''] * len(display_summary)
+            st.table(display_summary)
+
     
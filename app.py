@@ -1,5 +1,4 @@
 import os
-import io
 import base64
 import streamlit as st
 st.set_page_config(page_title="Digitization Cost Estimator", layout="wide")
@@ -125,22 +124,18 @@ from Cost_Estimator import(
     OCR_COST_PER_PAGE,
     SCANNING_COST_PER_PAGE,
     SOFTWARE_LICENSE_COSTS,
+    FALLBACK_STORAGE_PRICES,
     manpower_multiplier,
     display_clean_table
 )
-from Summarize_PDF import answer_from_pdf, run
 from Visualizer import render_visualizations
-from Reports_Generator import (
-    generate_cost_report_pdf,
-    generate_history_report_pdf,
-    export_filtered_data_to_csv,
-    export_filtered_data_to_pdf
-)
-from project_knowledge import answer_from_project_and_pdfs
+from Reports_Generator import export_filtered_data_to_csv, generate_uncertainty_report_pdf
+from Report_Artifacts import REPORT_ARTIFACTS, DOWNLOAD_ARTIFACTS
+# Summarize_PDF and project_knowledge pull in LangChain/torch, so they are imported inside their pages
 
-# Load master history/costs
-MASTER_HISTORY_CSV = "history/master_history.csv"
-MASTER_COST_CSV = "history/master_cost_breakdown.csv"
+from History_Store import HISTORY_STORE, PAGE_SIZE, COST_COLUMNS
+from History_Archive import HISTORY_ARCHIVE
+from Job_Queue import JOB_QUEUE, poll_job
 
 #st.set_page_config(page_title="Digitization Cost Estimator", layout="wide")
 st.title("📂 Smart Tool for Data Digitization (Cloud Cost Estimator)")
@@ -150,6 +145,7 @@ st.title("📂 Smart Tool for Data Digitization (Cloud Cost Estimator)")
 selected_feature = st.sidebar.selectbox("Choose Feature", ["Home", "Cost Estimation", "Summarize PDFs", "Visualizations", "Reports", "Project Assistant"])
 
 if selected_feature == "Summarize PDFs":
+    from Summarize_PDF import run
     run()  # from Summarize_PDF
 
 elif selected_feature == "Home":
@@ -190,11 +186,9 @@ elif selected_feature == "Cost Estimation":
         ocr_cost = custom.get("ocr_cost", OCR_COST_PER_PAGE)
         scanning_cost = custom.get("scanning_cost", SCANNING_COST_PER_PAGE)
         multipliers = custom.get("multipliers", manpower_multiplier)
-        fallback_prices = {
-            "Amazon S3": 0.023,
-            "Google Cloud Storage": 0.020,
-            "Microsoft Azure": 0.020
-        }
+        fallback_prices = FALLBACK_STORAGE_PRICES
+        # Storage model of the last estimate (schedules, lifecycle, ingest), so the totals agree with it
+        storage_model = st.session_state.get("storage_model", {})
 
         # 🧠 Perform comparison
         results = calculate_all_provider_costs(
@@ -206,7 +200,10 @@ elif selected_feature == "Cost Estimation":
             scanning_cost=scanning_cost,
             manpower_multiplier=multipliers,
             software_license_costs=SOFTWARE_LICENSE_COSTS,
-            fallback_prices=fallback_prices
+            fallback_prices=fallback_prices,
+            lifecycle=storage_model.get("lifecycle"),
+            monthly_ingest_gb=storage_model.get("monthly_ingest_gb", 0.0),
+            selected=(storage_model["provider"], storage_model["schedules"]) if storage_model else None
         )
 
         comparison_df = pd.DataFrame(results)
@@ -225,83 +222,163 @@ elif selected_feature == "Visualizations":
 elif selected_feature == "Reports":
     st.subheader("📄 Report Generation")
 
-    if os.path.exists(MASTER_COST_CSV) and st.button("📄 Download Cost Breakdown Report PDF"):
-        cost_df = pd.read_csv(MASTER_COST_CSV)
-        path = generate_cost_report_pdf(cost_df)
-        with open(path, "rb") as f:
-            st.download_button("⬇️ Download Cost Report", data=f, file_name=os.path.basename(path), mime="application/pdf")
-        csv_buffer = io.StringIO()
-        cost_df.to_csv(csv_buffer, index=False)
+    # PDF reports are built by background jobs; the page only polls, so reruns don't restart them
+    report_jobs = st.session_state.setdefault("report_jobs", {})
+    session_id = st.session_state.get("session_id")
+
+    data_version = HISTORY_STORE.data_version()
+
+    def download_report(label, mime="application/pdf"):
+        def render(result):
+            try:
+                data = REPORT_ARTIFACTS.read_bytes(result["path"])
+            except OSError:
+                # Evicted (possibly by a job worker) since the report was built
+                st.warning("⚠️ This report has been cleaned up; generate it again.")
+                return
+            st.download_button(label, data=data, file_name=os.path.basename(result["path"]), mime=mime)
+        return render
+
+    def request_report(kind, artifact, params=None):
+        # The same report over unchanged data is served from the artifact store; only new ones run as jobs
+        path = REPORT_ARTIFACTS.find(artifact, params, data_version)
+        if path is not None:
+            report_jobs[kind] = {"path": path}
+        else:
+            job_params = {"filters": params} if params is not None else None
+            report_jobs[kind] = {"job": JOB_QUEUE.submit(kind, job_params, session_id=session_id)}
+
+    def show_report(kind, label):
+        entry = report_jobs.get(kind)
+        if entry is None:
+            return
+        if "path" in entry:
+            download_report(label)(entry)
+        else:
+            poll_job(entry["job"], download_report(label))
+
+    if HISTORY_STORE.has_cost_breakdown() and st.button("📄 Download Cost Breakdown Report PDF"):
+        request_report("cost_report", "cost_report")
+        # Streamed from the archive like the history export, never loaded as one DataFrame
+        cost_csv = DOWNLOAD_ARTIFACTS.get_or_create(
+            "cost_export",
+            lambda save_path: export_filtered_data_to_csv(
+                HISTORY_ARCHIVE.iter_cost_breakdown(), save_path=save_path, columns=list(COST_COLUMNS.values())
+            ),
+            data_version=data_version, suffix=".csv"
+        )
         st.download_button(
             label="⬇️ Download Cost Report as CSV",
-            data=csv_buffer.getvalue(),
+            data=DOWNLOAD_ARTIFACTS.read_bytes(cost_csv),
             file_name="cost_breakdown_report.csv",
             mime="text/csv"
         )
 
-    if os.path.exists(MASTER_HISTORY_CSV) and st.button("📘 Download Full History Report PDF"):
-        history_df = pd.read_csv(MASTER_HISTORY_CSV)
-        path = generate_history_report_pdf(history_df)
-        with open(path, "rb") as f:
-            st.download_button("⬇️ Download Full History Report", data=f, file_name=os.path.basename(path), mime="application/pdf")
-        csv_buffer = io.StringIO()
-        history_df.to_csv(csv_buffer, index=False)
+    stats = HISTORY_STORE.column_stats()
+    has_history = stats["rows"] > 0
+    show_report("cost_report", "⬇️ Download Cost Report")
+
+    if has_history and st.button("📘 Download Full History Report PDF"):
+        request_report("history_report", "history_report")
+        # Streamed to disk in chunks like the filtered export, never loaded as one DataFrame
+        history_csv = DOWNLOAD_ARTIFACTS.get_or_create(
+            "history_export",
+            lambda save_path: export_filtered_data_to_csv(HISTORY_ARCHIVE.iter_history(), save_path=save_path),
+            data_version=data_version, suffix=".csv"
+        )
         st.download_button(
             label="⬇️ Download History Report as CSV",
-            data=csv_buffer.getvalue(),
+            data=DOWNLOAD_ARTIFACTS.read_bytes(history_csv),
             file_name="history_report.csv",
             mime="text/csv"
         )
+    show_report("history_report", "⬇️ Download Full History Report")
+
+    # Monte Carlo results of this session's last estimate; small, so built inline
+    monte_carlo = st.session_state.get("monte_carlo")
+    if monte_carlo is not None and st.button("🎲 Download Cost Uncertainty Report PDF"):
+        uncertainty_path = REPORT_ARTIFACTS.get_or_create(
+            "uncertainty_report",
+            lambda save_path: generate_uncertainty_report_pdf(
+                monte_carlo["summary"], monte_carlo["inputs"], monte_carlo["samples"], monte_carlo["retention"], save_path
+            ),
+            params={"run": monte_carlo["run_id"]}
+        )
+        st.download_button(
+            "⬇️ Download Cost Uncertainty Report", data=REPORT_ARTIFACTS.read_bytes(uncertainty_path),
+            file_name=os.path.basename(uncertainty_path), mime="application/pdf"
+        )
+        st.download_button(
+            label="⬇️ Download Cost Uncertainty as CSV",
+            data=monte_carlo["summary"].round(2).to_csv(index=False),
+            file_name="cost_uncertainty.csv",
+            mime="text/csv"
+        )
 
-    if os.path.exists(MASTER_HISTORY_CSV):
-        history_df = pd.read_csv(MASTER_HISTORY_CSV)
+    if has_history:
         st.markdown("📂 Export Filtered Session History")
-        providers = history_df["Provider"].unique().tolist()
+        providers = stats["providers"]
         selected_providers = st.multiselect("Select Provider(s):", providers, default=providers)
 
-        min_pages = int(history_df["Pages"].min())
-        max_pages = int(history_df["Pages"].max())
+        # Slider bounds come from precomputed stats; filtering, counting and paging run in the history store
+        min_pages, max_pages = int(stats["pages"][0]), int(stats["pages"][1])
         if min_pages == max_pages:
             page_range = (min_pages, max_pages)
             st.info(f"Only one unique page count found: {min_pages} pages")
         else:
             page_range = st.slider("Page Range", min_pages, max_pages, (min_pages, max_pages))
 
-        min_cost = float(history_df["Total ($)"].min())
-        max_cost = float(history_df["Total ($)"].max())
+        min_cost, max_cost = float(stats["total"][0]), float(stats["total"][1])
         if min_cost == max_cost:
             cost_range = (min_cost, max_cost)
             st.info(f"Only one unique estimated cost: ${min_cost}")
         else:
             cost_range = st.slider("Estimated Cost Range ($)", min_cost, max_cost, (min_cost, max_cost), step=0.5)
 
-        filtered_df = history_df[
-            (history_df["Provider"].isin(selected_providers)) &
-            (history_df["Pages"].between(*page_range)) &
-            (history_df["Total ($)"].between(*cost_range))
-        ]
-
-        st.dataframe(filtered_df)
+        filters = {"providers": selected_providers, "page_range": page_range, "cost_range": cost_range}
+        filtered_count = HISTORY_STORE.count_history(**filters)
+        page_count = max(1, -(-filtered_count // PAGE_SIZE))
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1) - 1
+        st.caption(
+            f"Showing rows {min(filtered_count, page * PAGE_SIZE + 1)}–{min(filtered_count, (page + 1) * PAGE_SIZE)}"
+            f" of {filtered_count} matching estimates"
+        )
+        st.dataframe(HISTORY_STORE.query_history_page(page=page, page_size=PAGE_SIZE, **filters))
 
+        job_filters = {k: list(v) for k, v in filters.items()}
         col1, col2 = st.columns(2)
         with col1:
             if st.button("⬇️ Export Filtered History to CSV"):
-                csv_path = export_filtered_data_to_csv(filtered_df)
-                with open(csv_path, "rb") as f:
-                    st.download_button("📄 Download CSV", data=f, file_name=os.path.basename(csv_path), mime="text/csv")
+                csv_path = DOWNLOAD_ARTIFACTS.get_or_create(
+                    "filtered_export",
+                    lambda save_path: export_filtered_data_to_csv(HISTORY_ARCHIVE.iter_history(**filters), save_path=save_path),
+                    params=job_filters, data_version=data_version, suffix=".csv"
+                )
+                st.download_button(
+                    "📄 Download CSV", data=DOWNLOAD_ARTIFACTS.read_bytes(csv_path),
+                    file_name=os.path.basename(csv_path), mime="text/csv"
+                )
         with col2:
             if st.button("📝 Export Filtered History to PDF"):
-                pdf_path = export_filtered_data_to_pdf(filtered_df)
-                with open(pdf_path, "rb") as f:
-                    st.download_button("📄 Download PDF", data=f, file_name=os.path.basename(pdf_path), mime="application/pdf")
+                request_report("filtered_pdf", "filtered_export", job_filters)
+            show_report("filtered_pdf", "📄 Download PDF")
 
     else:
         st.warning("📭 No historical data found in master history to export.")
 
 elif selected_feature == "Project Assistant":
     st.markdown("### 🤖 Ask me anything about the project or uploaded PDFs")
+    # Embed new uploads in the background so the first semantic question doesn't wait for it
+    from Query_Cache import corpus_key
+    uploads_key = corpus_key({f: os.path.join("uploads", f) for f in os.listdir("uploads")} if os.path.exists("uploads") else {})
+    if st.session_state.get("indexed_uploads_key") != uploads_key:
+        st.session_state["index_job"] = JOB_QUEUE.submit("index", session_id=st.session_state.get("session_id"))
+        st.session_state["indexed_uploads_key"] = uploads_key
+    poll_job(st.session_state["index_job"], lambda result: st.caption(f"📚 {result['files']} PDFs indexed"))
+
     user_query = st.text_input("Type your question here:")
     if user_query:
+        from project_knowledge import answer_from_project_and_pdfs
         response = answer_from_project_and_pdfs(user_query)
         st.markdown("**Answer:**")
         st.write(response)
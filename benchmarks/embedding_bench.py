@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Embedding_Service import EmbeddingService, default_workers  # noqa: E402
+from Model_Registry import SENTENCE_MODEL_NAME  # noqa: E402
+
+# Embedding throughput (chunks/s) of the shared service against a plain model.encode baseline.
+#
+#   python benchmarks/embedding_bench.py --chunks 5000 --sessions 4
+#   python benchmarks/embedding_bench.py --workers 0          # in-process, no worker pool
+#
+# Chunks have mixed lengths and a share of exact duplicates, like boilerplate pages across reports.
+
+WORDS = ("storage archive invoice retention provider digitization scanning ocr page budget cloud "
+         "estimate report region tier lifecycle compliance record metadata index").split()
+
+
+def make_chunks(count, duplicate_share, seed=7):
+    rng = random.Random(seed)
+    unique = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 220))) for _ in range(count)]
+    for i in range(int(count * duplicate_share)):
+        unique[rng.randrange(count)] = unique[i]
+    return unique
+
+def run_baseline(chunks, model_name):
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    model.encode(chunks[:32])  # warm-up
+    started = time.perf_counter()
+    model.encode(chunks)
+    return len(chunks) / (time.perf_counter() - started)
+
+def run_service(chunks, model_name, sessions, workers):
+    service = EmbeddingService(model_name, workers=workers)
+    service.embed(chunks[:32])  # warm-up: starts workers and loads models
+    parts = [chunks[i::sessions] for i in range(sessions)]
+    started = time.perf_counter()
+    threads = [threading.Thread(target=service.embed, args=(part,)) for part in parts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(chunks) / (time.perf_counter() - started), service.get_stats()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure embedding throughput in chunks per second.")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent callers sharing the service")
+    parser.add_argument("--workers", type=int, default=None, help=f"Worker processes (default here: {default_workers()})")
+    parser.add_argument("--duplicates", type=float, default=0.2, help="Share of chunks that repeat another chunk")
+    parser.add_argument("--model", default=SENTENCE_MODEL_NAME)
+    parser.add_argument("--skip-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    chunks = make_chunks(args.chunks, args.duplicates)
+    if not args.skip_baseline:
+        print(f"baseline model.encode: {run_baseline(chunks, args.model):8.1f} chunks/s")
+    throughput, stats = run_service(chunks, args.model, args.sessions, args.workers)
+    print(f"embedding service:     {throughput:8.1f} chunks/s "
+          f"({stats['batches']} batches, {stats['deduplicated']} deduplicated, {stats['embedded']} embedded)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Time, peak memory and file size of the streaming history report for growing row counts.
+#
+#   python benchmarks/report_bench.py                          # 10k, 100k, 1M rows
+#   python benchmarks/report_bench.py --rows 10000 --baseline  # also the old FPDF iterrows writer
+#
+# Each run is its own interpreter so peak RSS belongs to that row count alone. Rows come from a
+# generator in HistoryStore.iter_history-sized chunks, as the report job feeds them.
+
+CHUNK_ROWS = 50000
+PROVIDERS = ["AWS", "Azure", "Google Cloud", "Wasabi", "Backblaze B2"]
+
+
+def make_chunks(rows, chunk_rows=CHUNK_ROWS, seed=7):
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-01-01")
+    for offset in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - offset)
+        pages = rng.integers(1, 50000, n)
+        yield pd.DataFrame({
+            "Timestamp": (start + pd.to_timedelta(rng.integers(0, 3e7, n), unit="s")).strftime("%Y-%m-%d %H:%M:%S"),
+            "Pages": pages,
+            "Size (GB)": pages * 0.0005,
+            "Provider": rng.choice(PROVIDERS, n),
+            "Retention (mo)": rng.integers(1, 120, n),
+            "Total ($)": pages * rng.uniform(0.01, 0.2, n)
+        })
+
+def run_streaming(rows, out_dir):
+    from Reports_Generator import generate_history_report_pdf
+    return generate_history_report_pdf(make_chunks(rows), save_path=out_dir)
+
+def run_baseline(rows, out_dir):
+    # The previous writer: one FPDF document in memory, iterrows and a cell per field
+    from fpdf import FPDF
+    import pandas as pd
+    df = pd.concat(make_chunks(rows))
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "", 10)
+    for h in df.columns:
+        pdf.cell(40, 8, h, border=1)
+    pdf.ln()
+    for _, row in df.iterrows():
+        for h in df.columns:
+            pdf.cell(40, 8, str(row[h]), border=1)
+        pdf.ln()
+    path = os.path.join(out_dir, "baseline.pdf")
+    pdf.output(path)
+    return path
+
+def measure(mode, rows):
+    # Runs in the child interpreter; prints one JSON line
+    out_dir = tempfile.mkdtemp(prefix="report_bench_")
+    started = time.perf_counter()
+    path = (run_baseline if mode == "baseline" else run_streaming)(rows, out_dir)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "seconds": elapsed,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "size_mb": os.path.getsize(path) / 1e6
+    }))
+    os.remove(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time and peak memory of the streaming PDF reports.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--baseline", action="store_true", help="also time the FPDF iterrows writer")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure(args.child[0], int(args.child[1]))
+        return
+
+    modes = ["streaming"] + (["baseline"] if args.baseline else [])
+    print(f"{'mode':<10} {'rows':>9} {'seconds':>9} {'rows/s':>10} {'peak MB':>9} {'file MB':>9}")
+    for rows in args.rows:
+        for mode in modes:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, str(rows)],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(output)
+            print(f"{mode:<10} {rows:>9} {result['seconds']:>9.2f} {rows / result['seconds']:>10.0f} "
+                  f"{result['peak_mb']:>9.1f} {result['size_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import ast
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Cold-start cost of the app's import path, each sample in a fresh interpreter.
+#
+#   python benchmarks/startup_bench.py --runs 5
+#   python benchmarks/startup_bench.py --runs 3 --with-models   # also time the first model load
+#
+# "streamlit" is the floor (a bare Streamlit script); "app pages" imports everything app.py imports
+# up front, read from app.py itself so the list can't drift; "ml pages" adds Summarize_PDF and
+# project_knowledge, which must stay cheap until a model is used.
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers", "langchain", "langchain_community", "faiss", "sklearn"]
+
+ML_MODULES = ["Summarize_PDF", "project_knowledge"]
+
+
+def app_imports(path=os.path.join(REPO_DIR, "app.py")):
+    # Modules app.py imports at module level, in order; imports inside functions are left out
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules)
+    return modules
+
+def build_scenarios():
+    app_modules = app_imports()
+    return {
+        "streamlit": ["streamlit"],
+        "app pages": app_modules,
+        "ml pages": app_modules + [m for m in ML_MODULES if m not in app_modules]
+    }
+
+PROBE = """
+import sys, time, json, importlib
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+imported = time.perf_counter() - start
+loaded = 0.0
+if {with_models!r}:
+    from Model_Registry import MODEL_REGISTRY
+    start = time.perf_counter()
+    MODEL_REGISTRY.get("sentence_model")
+    loaded = time.perf_counter() - start
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"import_s": imported, "model_s": loaded, "heavy": heavy}}))
+"""
+
+
+def run_once(modules, with_models):
+    code = PROBE.format(modules=modules, with_models=with_models, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the app's pages.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--with-models", action="store_true", help="Also load the sentence model once per run")
+    args = parser.parse_args(argv)
+
+    print(f"{'scenario':<12} {'median import (s)':>18} {'min (s)':>9} {'model load (s)':>15}  heavy modules imported")
+    for name, modules in build_scenarios().items():
+        with_models = args.with_models and name == "ml pages"
+        samples = [run_once(modules, with_models) for _ in range(args.runs)]
+        imports = [s["import_s"] for s in samples]
+        model = statistics.median(s["model_s"] for s in samples) if with_models else float("nan")
+        print(f"{name:<12} {statistics.median(imports):>18.3f} {min(imports):>9.3f} {model:>15.3f}  "
+              f"{', '.join(samples[-1]['heavy']) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
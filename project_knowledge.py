@@ -1,14 +1,31 @@
 import os
 import json
-import fitz  # PyMuPDF
 import streamlit as st
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
+from Model_Registry import MODEL_REGISTRY
+from Embedding_Store import EMBEDDING_STORE
+from Text_Extraction import iter_file_chunks, iter_chunks
+from Hybrid_Retriever import HybridRetriever, PROJECT_INFO_SOURCE
+from Query_Cache import QUERY_CACHE, corpus_key
 
 PROJECT_INFO_PATH = "project_info.json"
 UPLOADS_FOLDER = "uploads"
-MODEL = SentenceTransformer("all-MiniLM-L6-v2")
+RETRIEVER = HybridRetriever(EMBEDDING_STORE)
+
+# project_info field -> heading used when the Assistant answers from that section
+PROJECT_SECTIONS = {
+    "features": "🔧 Key Features:",
+    "description": "📘 **About the Project**:",
+    "tech_stack": "🛠️ Tech Stack:",
+    "target_users": "🎯 Target Users:",
+    "future_scope": "🚀 Future Scope:",
+    "working": "⚙️ How It Works:",
+    "modules": "🧩 Modules:"
+}
+
+def get_embedder():
+    # Started on the first semantic search, then shared (and batched across) every session in the process
+    return MODEL_REGISTRY.get("assistant_embedder")
 
 @st.cache_data
 def load_project_info():
@@ -17,70 +34,80 @@ def load_project_info():
             return json.load(f)
     return {}
 
-@st.cache_data
-def extract_text_chunks_from_pdfs():
-    text_chunks = []
-    if os.path.exists(UPLOADS_FOLDER):
-        for filename in os.listdir(UPLOADS_FOLDER):
-            if filename.lower().endswith(".pdf"):
-                path = os.path.join(UPLOADS_FOLDER, filename)
-                try:
-                    with fitz.open(path) as doc:
-                        for i, page in enumerate(doc):
-                            text = page.get_text().strip()
-                            if text:
-                                text_chunks.append({
-                                    "filename": filename,
-                                    "page": i + 1,
-                                    "text": text
-                                })
-                except Exception as e:
-                    text_chunks.append({
-                        "filename": filename,
-                        "page": 0,
-                        "text": f"[ERROR] Could not read file: {e}"
-                    })
-    return text_chunks
+def list_pdf_files():
+    if not os.path.exists(UPLOADS_FOLDER):
+        return {}
+    return {
+        filename: os.path.join(UPLOADS_FOLDER, filename)
+        for filename in sorted(os.listdir(UPLOADS_FOLDER)) if filename.lower().endswith(".pdf")
+    }
 
-def semantic_pdf_search(query, top_k=3):
-    chunks = extract_text_chunks_from_pdfs()
-    if not chunks:
-        return []
+def extract_text_chunks_from_pdfs():
+    # Generator of overlapping, token-sized chunks; cached per file and re-extracted only when a PDF changes
+    return iter_chunks(list_pdf_files())
 
-    chunk_texts = [chunk["text"] for chunk in chunks]
-    chunk_embeddings = MODEL.encode(chunk_texts)
-    query_embedding = MODEL.encode([query])
+def embed_texts(texts):
+    return get_embedder().embed(texts)
 
-    similarities = cosine_similarity(query_embedding, chunk_embeddings)[0]
-    top_indices = similarities.argsort()[-top_k:][::-1]
+def semantic_pdf_search(query, top_k=3):
+    # Only new/changed PDFs are embedded (EMBEDDING_STORE.sync); the query is the only text embedded per search
+    EMBEDDING_STORE.sync(list_pdf_files(), iter_file_chunks, embed_texts)
+    hits = EMBEDDING_STORE.search(embed_texts([query])[0], top_k)
 
     results = []
-    for idx in top_indices:
-        chunk = chunks[idx]
-        score = similarities[idx]
+    for chunk, score in hits:
         snippet = chunk["text"][:500].replace("\n", " ")
         results.append(f"📄 **{chunk['filename']}** (Page {chunk['page']}):\n\"{snippet}...\" \n(Similarity Score: {score:.2f})")
     return results
 
+def index_uploads(progress=None):
+    # Background indexing (Job_Queue "index" jobs): embeds new/changed uploads ahead of the first question
+    files = list_pdf_files()
+
+    def chunk_source(todo):
+        for done, item in enumerate(iter_file_chunks(todo), start=1):
+            if progress is not None:
+                progress(done / max(1, len(todo)), f"Indexed {done}/{len(todo)} new PDFs")
+            yield item
+
+    EMBEDDING_STORE.sync(files, chunk_source, embed_texts)
+    return len(files)
+
+def format_project_section(field, project_info):
+    value = project_info.get(field)
+    if isinstance(value, dict):
+        value = [f"**{name}**: {text}" for name, text in value.items()]
+    if isinstance(value, list):
+        return f"{PROJECT_SECTIONS[field]}\n- " + "\n- ".join(value)
+    return f"{PROJECT_SECTIONS[field]}\n{value or 'No description found.'}"
+
 def answer_from_project_and_pdfs(user_query):
-    user_query = user_query.lower()
     project_info = load_project_info()
+    files = list_pdf_files()
+
+    # One ranked search over project_info sections and PDF chunks; exact terms resolve lexically,
+    # and the embedding model (plus any pending PDF embedding) only runs for low-confidence queries
+    # Repeated questions come straight from QUERY_CACHE until uploads or settings change; the scope
+    # only stats the uploads, so a hit skips the index sync entirely
+    top_k = 3
+    scope = corpus_key(files, project_info, RETRIEVER.params(top_k))
+    hits = QUERY_CACHE.get(user_query, scope)
+    if hits is None:
+        RETRIEVER.sync(files, iter_file_chunks, project_info)
+        hits = RETRIEVER.search(
+            user_query, embed_texts, top_k=top_k,
+            sync_embeddings=lambda: EMBEDDING_STORE.sync(files, iter_file_chunks, embed_texts),
+            cache=QUERY_CACHE, cache_scope=scope
+        )
+    if hits and hits[0]["source"] == PROJECT_INFO_SOURCE:
+        return format_project_section(hits[0]["field"], project_info)
 
-    # Check project info first
-    if "feature" in user_query or "functionality" in user_query:
-        return "🔧 Key Features:\n- " + "\n- ".join(project_info.get("features", []))
-    elif "about project" in user_query or "what is this project" in user_query:
-        return f"📘 **About the Project**:\n{project_info.get('description', 'No description found.')}"
-    elif "tech stack" in user_query or "technologies" in user_query:
-        return "🛠️ Tech Stack:\n- " + "\n- ".join(project_info.get("tech_stack", []))
-    elif "target users" in user_query or "who is this for" in user_query:
-        return "🎯 Target Users:\n- " + "\n- ".join(project_info.get("target_users", []))
-    elif "future" in user_query or "next" in user_query:
-        return "🚀 Future Scope:\n- " + "\n- ".join(project_info.get("future_scope", []))
-
-    # Otherwise perform semantic PDF search
-    matches = semantic_pdf_search(user_query)
+    matches = []
+    for hit in hits:
+        if hit["source"] == PROJECT_INFO_SOURCE:
+            continue
+        snippet = hit["text"][:500].replace("\n", " ")
+        matches.append(f"📄 **{hit['filename']}** (Page {hit['page']}):\n\"{snippet}...\" \n(Match Score: {hit['score']:.2f}, {hit['via']})")
     if matches:
-        #with st.spinner("Analyzing... Please wait."):
         return "\n\n".join(matches)
     return "🤖 I couldn't find a direct match. Try rephrasing or ask about the project details."
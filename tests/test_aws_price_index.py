@@ -0,0 +1,67 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from AWS_Price_Index import INDEX_VERSION, AwsPriceIndex
+
+OFFER_FILE = os.path.join(os.path.dirname(__file__), "fixtures", "pricing", "aws_s3_index.json")
+US_EAST = "US East (N. Virginia)"
+STANDARD_TIERS = [(0.0, 51200.0, 0.023), (51200.0, 512000.0, 0.022), (512000.0, float("inf"), 0.021)]
+
+
+class _AsyncReader:
+    # Stands in for aiohttp's response.content
+    def __init__(self, data, block=64):
+        self.data = data
+        self.block = block
+
+    async def read(self, n=-1):
+        size = self.block if n < 0 else min(n, self.block)
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+@pytest.fixture
+def index(tmp_path):
+    return AwsPriceIndex(str(tmp_path / "aws_index.json"))
+
+def test_build_from_file_keeps_only_storage_classes(index):
+    with open(OFFER_FILE, "rb") as f:
+        prices = index.build_from_file(f)
+    assert set(prices) == {
+        f"{US_EAST}|Standard", f"{US_EAST}|Standard - Infrequent Access", f"{US_EAST}|Amazon Glacier", "EU (Ireland)|Standard"
+    }
+    assert [tuple(t) for t in prices[f"{US_EAST}|Standard"]] == STANDARD_TIERS  # sorted by beginRange
+
+def test_lookup_schedule_maps_engine_classes(index):
+    with open(OFFER_FILE, "rb") as f:
+        index.build_from_file(f)
+    schedule = index.lookup_schedule(US_EAST)
+    assert schedule["Standard"] == STANDARD_TIERS
+    assert schedule["Infrequent Access"] == [(0.0, float("inf"), 0.0125)]
+    assert schedule["Archive"] == [(0.0, float("inf"), 0.0036)]
+    assert index.lookup_schedule("EU (Ireland)") == {"Standard": [(0.0, float("inf"), 0.024)]}
+    assert index.lookup_schedule("Nowhere") is None
+    assert index.lookup("EU (Ireland)") == 0.024
+
+def test_saved_index_is_reused_by_a_new_instance(index):
+    assert not index.is_fresh()
+    with open(OFFER_FILE, "rb") as f:
+        index.build_from_file(f)
+    reloaded = AwsPriceIndex(index.path)
+    assert reloaded.is_fresh()
+    assert reloaded.lookup(US_EAST) == 0.023
+    assert not AwsPriceIndex(index.path, max_age=0).is_fresh()
+
+def test_index_from_an_older_version_is_ignored(index):
+    with open(index.path, "w") as f:
+        json.dump({"version": INDEX_VERSION - 1, "built_at": 0, "prices": {f"{US_EAST}|Standard": [[0, 1, 9.9]]}}, f)
+    assert index.lookup(US_EAST) is None
+
+def test_build_from_stream_matches_build_from_file(index, tmp_path):
+    with open(OFFER_FILE, "rb") as f:
+        data = f.read()
+    streamed = asyncio.run(AwsPriceIndex(str(tmp_path / "streamed.json")).build_from_stream(_AsyncReader(data)))
+    with open(OFFER_FILE, "rb") as f:
+        assert streamed == index.build_from_file(f)
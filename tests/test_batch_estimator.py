@@ -0,0 +1,50 @@
+import json
+
+import pandas as pd
+import pytest
+
+from Batch_Estimator import main
+
+OUTPUT_COLUMNS = [
+    "Document", "Pages", "Size (GB)", "Provider", "Retention (mo)", "Effort", "Storage ($)", "OCR ($)",
+    "Scanning ($)", "Manpower ($)", "License ($)", "Subtotal ($)", "Total ($)"
+]
+
+
+def _run(tmp_path, capsys, manifest, output="out.csv"):
+    path = tmp_path / "manifest.csv"
+    path.write_text(manifest)
+    out = tmp_path / output
+    assert main([str(path), "-o", str(out), "--chunk-rows", "2"]) == 0
+    captured = capsys.readouterr()
+    return out, json.loads(captured.out.strip().splitlines()[-1]), captured.err
+
+def test_bad_rows_are_skipped_with_a_warning(tmp_path, capsys):
+    manifest = "id,pages,effort\na,10,medium\nb,,Low\nc,-3,Low\nd,20,bogus\ne,30, high \n"
+    out, summary, err = _run(tmp_path, capsys, manifest)
+    result = pd.read_csv(out)
+    assert sorted(result["Document"].unique()) == ["a", "e"]
+    assert sorted(result["Effort"].unique()) == ["High", "Medium"]
+    assert summary["documents"] == 2
+    assert summary["rows_written"] == len(result) == 6
+    assert "skipping b: missing or invalid pages" in err
+    assert "skipping c: missing or invalid pages" in err
+    assert "skipping d: unknown effort 'bogus'" in err
+
+def test_empty_manifest_writes_a_header_only_csv(tmp_path, capsys):
+    out, summary, _ = _run(tmp_path, capsys, "id,pages,effort\n")
+    assert list(pd.read_csv(out).columns) == OUTPUT_COLUMNS
+    assert summary == {"documents": 0, "rows_written": 0, "output": str(out)}
+
+def test_all_rows_skipped_still_writes_the_output(tmp_path, capsys):
+    out, summary, _ = _run(tmp_path, capsys, "id,pages,effort\na,,Low\nb,5,bogus\n")
+    assert pd.read_csv(out).empty
+    assert summary["rows_written"] == 0
+
+def test_empty_manifest_writes_a_parquet_schema(tmp_path, capsys):
+    pq = pytest.importorskip("pyarrow.parquet")
+    out, _, _ = _run(tmp_path, capsys, "id,pages,effort\n", output="out.parquet")
+    schema = pq.read_schema(out)
+    assert schema.names == OUTPUT_COLUMNS
+    assert str(schema.field("Document").type) == "string"
+    assert str(schema.field("Total ($)").type) == "double"
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from Cost_Engine import (
+    DEFAULT_PRICE_SCHEDULES,
+    build_lifecycle,
+    distribution_spec,
+    estimate_costs,
+    flat_schedule,
+    pages_to_size_gb,
+    project_storage_costs,
+    resolve_schedules,
+    simulate_costs,
+    tiered_monthly_cost
+)
+
+
+DISTRIBUTIONS = {
+    "pages": distribution_spec("triangular", 8000, 10000, 13000),
+    "page_size_kb": distribution_spec("lognormal", 200, 350, 600),
+    "manpower_rate": distribution_spec("normal", 0.03, 0.05, 0.07)
+}
+
+
+# ----------------- Tiers --------------------
+def test_tiered_cost_within_first_tier():
+    tiers = DEFAULT_PRICE_SCHEDULES["Amazon S3"]["Standard"]
+    assert tiered_monthly_cost(100, tiers) == pytest.approx(100 * 0.023)
+
+def test_tiered_cost_spans_tiers():
+    tiers = DEFAULT_PRICE_SCHEDULES["Amazon S3"]["Standard"]
+    expected = 51200 * 0.023 + (512000 - 51200) * 0.022 + 88000 * 0.021
+    assert tiered_monthly_cost(600000, tiers) == pytest.approx(expected)
+
+def test_tiered_cost_is_vectorized():
+    costs = tiered_monthly_cost(np.array([[0, 10], [20, 30]]), flat_schedule(0.5))
+    np.testing.assert_allclose(costs, [[0, 5], [10, 15]])
+
+
+# ----------------- Lifecycle --------------------
+def test_build_lifecycle_orders_transitions():
+    assert build_lifecycle() == [(0, "Standard")]
+    assert build_lifecycle(3, 12) == [(0, "Standard"), (3, "Infrequent Access"), (12, "Archive")]
+    assert build_lifecycle(0, 6) == [(0, "Standard"), (6, "Archive")]
+
+def test_build_lifecycle_rejects_archive_before_infrequent():
+    with pytest.raises(ValueError):
+        build_lifecycle(12, 6)
+    with pytest.raises(ValueError):
+        build_lifecycle(6, 6)
+
+def test_lifecycle_moves_data_between_classes():
+    schedules = {"Standard": flat_schedule(1.0), "Infrequent Access": flat_schedule(0.5), "Archive": flat_schedule(0.1)}
+    total = project_storage_costs(100, 12, schedules, build_lifecycle(3, 6))[0]
+    assert total == pytest.approx(100 * (3 * 1.0 + 3 * 0.5 + 6 * 0.1))
+
+def test_monthly_ingest_ages_per_cohort():
+    schedules = {"Standard": flat_schedule(1.0), "Infrequent Access": flat_schedule(0.5)}
+    lifecycle = build_lifecycle(2)
+    _, monthly = project_storage_costs(10, 5, schedules, lifecycle, monthly_ingest_gb=1.0, return_monthly=True)
+    # Month m holds the initial 10 GB plus one cohort per month since; each is Standard for its first 2 months
+    expected = []
+    for month in range(5):
+        cohorts = [(0, 10.0)] + [(k, 1.0) for k in range(1, month + 1)]
+        expected.append(sum(gb * (1.0 if month - start < 2 else 0.5) for start, gb in cohorts))
+    np.testing.assert_allclose(monthly[0], expected)
+
+def test_retention_cuts_off_each_scenario():
+    totals = project_storage_costs([10, 10], [3, 6], {"Standard": flat_schedule(1.0)})
+    np.testing.assert_allclose(totals, [30, 60])
+
+
+# ----------------- Monte Carlo --------------------
+def test_simulate_costs_is_deterministic_for_a_seed():
+    first, first_hist = simulate_costs(DISTRIBUTIONS, 24, samples=20000, seed=7)
+    second, second_hist = simulate_costs(DISTRIBUTIONS, 24, samples=20000, seed=7)
+    assert first.equals(second)
+    assert first_hist.equals(second_hist)
+
+def test_simulate_costs_ignores_chunk_size():
+    base = simulate_costs(DISTRIBUTIONS, 24, samples=30000, seed=3)[0]
+    for chunk_samples in (7000, 10000, 30000):
+        other = simulate_costs(DISTRIBUTIONS, 24, samples=30000, seed=3, chunk_samples=chunk_samples)[0]
+        np.testing.assert_array_equal(other.iloc[:, 1:].to_numpy(), base.iloc[:, 1:].to_numpy())
+
+def test_simulate_costs_percentiles_are_ordered():
+    summary = simulate_costs(DISTRIBUTIONS, 24, samples=20000, seed=1)[0]
+    assert (summary["P10 ($)"] <= summary["P50 ($)"]).all()
+    assert (summary["P50 ($)"] <= summary["P90 ($)"]).all()
+
+def test_lognormal_rejects_non_positive_low():
+    with pytest.raises(ValueError):
+        distribution_spec("lognormal", 0, 350, 600)
+
+def test_fixed_inputs_match_the_estimate_with_overrides():
+    fixed = {"pages": 10000, "page_size_kb": 350, "manpower_rate": 0.05}
+    schedules = resolve_schedules("Amazon S3", standard_price=0.05)
+    lifecycle = build_lifecycle(6)
+    summary = simulate_costs(
+        fixed, 24, providers=["Amazon S3"], samples=5000, seed=0, price_schedules={"Amazon S3": schedules},
+        license_costs={"Amazon S3": 750.0}, lifecycle=lifecycle, monthly_ingest_gb=0.5
+    )[0]
+    size_gb = pages_to_size_gb(10000, 350)
+    expected = estimate_costs(
+        pages=10000, size_gb=size_gb, storage_price=0.0, retention_period=24, manpower_rate=0.05, license_cost=750.0,
+        storage_total=project_storage_costs(size_gb, 24, schedules, lifecycle, 0.5)[0]
+    )["Total ($)"].iloc[0]
+    assert summary["P50 ($)"].iloc[0] == pytest.approx(expected)
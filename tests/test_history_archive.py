@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from History_Archive import HistoryArchive
+from History_Store import COST_COLUMNS, HISTORY_COLUMNS, HistoryStore
+from Reports_Generator import export_filtered_data_to_csv, generate_cost_report_pdf
+
+PROVIDERS = ["Amazon S3", "Microsoft Azure", "Google Cloud Storage"]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # no legacy CSVs here
+    store = HistoryStore(str(tmp_path / "history.db"))
+    # Interleaved providers across two months, so every partition holds ids from all over the range
+    for n in range(30):
+        month = "2024-01" if n < 15 else "2024-02"
+        entry = {
+            "Timestamp": f"{month}-{n % 15 + 1:02d} 10:00:00", "Pages": n + 1, "Size (GB)": 1.0,
+            "Provider": PROVIDERS[n % 3], "Retention (mo)": 12, "Total ($)": float(n)
+        }
+        store.record_estimate(entry, [("Storage", n / 2), ("OCR", n / 2)])
+    return store
+
+@pytest.fixture
+def archive(tmp_path, store):
+    return HistoryArchive(str(tmp_path / "parquet"), store)
+
+def test_iter_history_is_chronological(archive, store):
+    archive.sync(chunk_rows=7)
+    streamed = pd.concat(archive.iter_history(batch_rows=2))
+    assert streamed["Pages"].tolist() == list(range(1, 31))
+    pd.testing.assert_frame_equal(streamed.reset_index(drop=True), pd.concat(store.iter_history()).reset_index(drop=True),
+                                  check_dtype=False)
+
+def test_iter_history_filters_keep_order(archive):
+    streamed = pd.concat(archive.iter_history(providers=["Amazon S3", "Microsoft Azure"], start="2024-02-01", batch_rows=3))
+    assert streamed["Pages"].tolist() == [n + 1 for n in range(15, 30) if n % 3 != 2]
+    assert list(streamed.columns) == list(HISTORY_COLUMNS.values())
+
+def test_iter_cost_breakdown_streams_the_cost_table(archive, store):
+    costs = pd.concat(archive.iter_cost_breakdown(batch_rows=4))
+    expected = store.query_cost_breakdown()
+    assert list(costs.columns) == list(COST_COLUMNS.values())
+    assert costs["Amount ($)"].tolist() == expected["Amount ($)"].tolist()
+    assert costs["Timestamp"].tolist() == expected["Timestamp"].tolist()
+
+def test_empty_archive_streams_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    archive = HistoryArchive(str(tmp_path / "parquet"), HistoryStore(str(tmp_path / "empty.db")))
+    assert list(archive.iter_cost_breakdown()) == []
+    path = export_filtered_data_to_csv(archive.iter_cost_breakdown(), save_path=str(tmp_path), columns=list(COST_COLUMNS.values()))
+    assert pd.read_csv(path).columns.tolist() == list(COST_COLUMNS.values())
+
+def test_cost_report_from_chunks(archive, tmp_path):
+    path = generate_cost_report_pdf(archive.iter_cost_breakdown(batch_rows=5), str(tmp_path / "reports"))
+    assert path.endswith(".pdf")
@@ -0,0 +1,118 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from History_Store import COST_COLUMNS, HISTORY_COLUMNS, HistoryStore
+
+
+def _entry(timestamp, pages, provider, total, size_gb=1.0, retention=12):
+    return {
+        "Timestamp": timestamp, "Pages": pages, "Size (GB)": size_gb,
+        "Provider": provider, "Retention (mo)": retention, "Total ($)": total
+    }
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # no legacy CSVs here
+    store = HistoryStore(str(tmp_path / "history.db"))
+    rows = [
+        (_entry("2024-01-01 10:00:00", 100, "Amazon S3", 50.0), "s1"),
+        (_entry("2024-01-02 10:00:00", 5000, "Microsoft Azure", 400.0), "s1"),
+        (_entry("2024-01-03 10:00:00", 20000, "Amazon S3", 1500.0), "s2"),
+        (_entry("2024-01-03 11:00:00", 800, "Google Cloud Storage", 90.0), None)
+    ]
+    for entry, session_id in rows:
+        store.record_estimate(entry, [("Storage", entry["Total ($)"] / 2), ("OCR", entry["Total ($)"] / 2)], session_id=session_id)
+    return store
+
+def _rows(store, **filters):
+    # Every filtered row; the store only hands them out a page or a chunk at a time
+    return store.query_history_page(0, page_size=1000, **filters)
+
+
+# ----------------- Migration --------------------
+def test_legacy_csvs_are_imported_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "history").mkdir()
+    pd.DataFrame([
+        _entry("2023-05-01 09:00:00", 120, "Amazon S3", 10.5),
+        _entry("2023-05-02 09:00:00", 340, "Microsoft Azure", 22.0)
+    ]).to_csv(tmp_path / "history" / "master_history.csv", index=False)
+    pd.DataFrame({
+        "Cost Component": ["Storage", "OCR"], "Amount ($)": [4.5, 6.0],
+        "Provider": ["Amazon S3", "Amazon S3"], "Timestamp": ["2023-05-01 09:00:00"] * 2
+    }).to_csv(tmp_path / "history" / "master_cost_breakdown.csv", index=False)
+
+    path = str(tmp_path / "history" / "history.db")
+    history = _rows(HistoryStore(path))
+    assert list(history.columns) == list(HISTORY_COLUMNS.values())
+    assert history["Pages"].tolist() == [120, 340]
+
+    costs = HistoryStore(path).query_cost_breakdown()
+    assert list(costs.columns) == list(COST_COLUMNS.values())
+    assert costs["Amount ($)"].tolist() == [4.5, 6.0]
+    with sqlite3.connect(path) as conn:
+        linked = conn.execute("SELECT COUNT(*) FROM cost_breakdown WHERE estimate_id = 1").fetchone()[0]
+    assert linked == 2
+
+    # A second store on the same database (another process, a restart) doesn't import again
+    assert HistoryStore(path).count_history() == 2
+
+def test_migration_builds_stats_and_rollups(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "history").mkdir()
+    pd.DataFrame([
+        _entry("2023-05-01 09:00:00", 120, "Amazon S3", 10.5),
+        _entry("2023-05-02 09:00:00", 340, "Amazon S3", 22.0)
+    ]).to_csv(tmp_path / "history" / "master_history.csv", index=False)
+    store = HistoryStore(str(tmp_path / "history" / "history.db"))
+    stats = store.column_stats()
+    assert stats["rows"] == 2
+    assert stats["pages"] == (120, 340)
+    assert stats["providers"] == ["Amazon S3"]
+    rollup = store.provider_rollup()
+    assert rollup["Estimates"].tolist() == [2]
+    assert rollup["Total ($)"].tolist() == [pytest.approx(32.5)]
+
+def test_fresh_database_without_csvs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = HistoryStore(str(tmp_path / "fresh.db"))
+    assert store.count_history() == 0
+    assert store.column_stats()["rows"] == 0
+
+
+# ----------------- Filters --------------------
+def test_filter_by_provider(store):
+    result = _rows(store, providers=["Amazon S3"])
+    assert result["Pages"].tolist() == [100, 20000]
+
+def test_empty_provider_list_matches_nothing(store):
+    assert _rows(store, providers=[]).empty
+    assert store.count_history(providers=[]) == 0
+
+def test_filter_by_page_and_cost_range(store):
+    result = _rows(store, page_range=(500, 10000), cost_range=(0, 500))
+    assert result["Pages"].tolist() == [5000, 800]
+
+def test_filter_by_session(store):
+    assert store.count_history(session_id="s1") == 2
+    assert store.count_history(session_id="s2") == 1
+
+def test_page_and_iter_match_query(store):
+    full = _rows(store, providers=["Amazon S3", "Microsoft Azure"])
+    paged = pd.concat([store.query_history_page(page, page_size=1, providers=["Amazon S3", "Microsoft Azure"]) for page in range(3)])
+    streamed = pd.concat(store.iter_history(chunk_rows=2, providers=["Amazon S3", "Microsoft Azure"]))
+    pd.testing.assert_frame_equal(paged.reset_index(drop=True), full)
+    pd.testing.assert_frame_equal(streamed.reset_index(drop=True), full)
+
+def test_stats_follow_inserts(store):
+    stats = store.column_stats()
+    assert stats["rows"] == 4
+    assert stats["pages"] == (100, 20000)
+    assert stats["total"] == (50.0, 1500.0)
+    assert stats["providers"] == ["Amazon S3", "Google Cloud Storage", "Microsoft Azure"]
+
+def test_cost_breakdown_filter(store):
+    costs = store.query_cost_breakdown(providers=["Microsoft Azure"])
+    assert costs["Amount ($)"].sum() == pytest.approx(400.0)
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+import pytest
+
+import Job_Queue
+from Job_Queue import JobQueue
+
+JOB_TIMEOUT_SECONDS = 60
+
+
+# Handlers run in spawned workers, which import them from this module by name
+def _ok_job(value, progress):
+    progress(0.5, "halfway")
+    return {"value": value}
+
+def _raising_job(progress):
+    raise ValueError("bad input")
+
+def _crashing_job(progress):
+    os._exit(3)  # a worker dying outright breaks the whole pool
+
+def _unserialisable_job(progress):
+    return {"value": object()}
+
+def _slow_job(progress):
+    time.sleep(2)
+    return {"done": True}
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    for kind in ("ok", "raising", "crashing", "unserialisable", "slow"):
+        monkeypatch.setitem(Job_Queue.JOB_HANDLERS, kind, f"{__name__}:_{kind}_job")
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=1)
+    yield queue
+    if queue._pool is not None:
+        queue._pool.shutdown(wait=True, cancel_futures=True)
+
+def _wait(queue, job_id):
+    deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] not in Job_Queue.ACTIVE_STATUSES:
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+def _dedupe_key(kind, params):
+    encoded = json.dumps(params, sort_keys=True)
+    return hashlib.sha256(f"{kind}|{encoded}".encode("utf-8")).hexdigest()
+
+
+def test_successful_job_stores_its_result(queue):
+    job = _wait(queue, queue.submit("ok", {"value": 42}))
+    assert job["status"] == "done"
+    assert job["result"] == {"value": 42}
+    assert job["progress"] == 1
+
+def test_unknown_kind_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.submit("no_such_job")
+
+def test_handler_exception_marks_the_job_failed(queue):
+    job = _wait(queue, queue.submit("raising"))
+    assert job["status"] == "failed"
+    assert job["error"] == "ValueError: bad input"
+
+def test_unserialisable_result_marks_the_job_failed(queue):
+    job = _wait(queue, queue.submit("unserialisable"))
+    assert job["status"] == "failed"
+    assert "TypeError" in job["error"]
+
+def test_crashed_worker_fails_the_job_and_the_pool_is_replaced(queue):
+    crashed = _wait(queue, queue.submit("crashing"))
+    assert crashed["status"] == "failed"
+    assert "BrokenProcessPool" in crashed["error"]
+    job = _wait(queue, queue.submit("ok", {"value": 1}))
+    assert job["status"] == "done"
+    assert job["pool_id"] != crashed["pool_id"]
+
+def test_identical_active_jobs_are_shared(queue):
+    first = queue.submit("slow")
+    assert queue.submit("slow") == first
+    assert _wait(queue, first)["status"] == "done"
+    assert queue.submit("slow") != first  # finished jobs aren't reused
+
+def test_active_job_on_a_dead_pool_is_failed_not_reused(queue):
+    queue._ensure_ready()
+    with sqlite3.connect(queue.path) as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, params, dedupe_key, status, owner_pid, pool_id, created_at)"
+            " VALUES ('stale', 'ok', ?, ?, 'running', ?, 'gone', ?)",
+            (json.dumps({"value": 5}), _dedupe_key("ok", {"value": 5}), os.getpid(), time.time())
+        )
+    job_id = queue.submit("ok", {"value": 5})
+    assert job_id != "stale"
+    stale = queue.get("stale")
+    assert stale["status"] == "failed"
+    assert stale["error"].startswith("Abandoned")
+    assert _wait(queue, job_id)["result"] == {"value": 5}
+
+def test_orphaned_jobs_are_restarted(tmp_path, monkeypatch):
+    monkeypatch.setitem(Job_Queue.JOB_HANDLERS, "ok", f"{__name__}:_ok_job")
+    path = str(tmp_path / "jobs.db")
+    JobQueue(path)._ensure_ready()
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, params, dedupe_key, status, owner_pid, created_at)"
+            " VALUES ('orphan', 'ok', ?, 'x', 'queued', NULL, ?)",
+            (json.dumps({"value": 9}), time.time())
+        )
+    queue = JobQueue(path, workers=1)
+    try:
+        assert _wait(queue, "orphan")["result"] == {"value": 9}
+    finally:
+        queue._pool.shutdown(wait=True)
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+pytest.importorskip("fitz")
+
+import PDF_Ingestion
+from Ingestion_Cache import IngestionCache, content_key
+from PDF_Ingestion import save_upload
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return IngestionCache(str(tmp_path / "cache"))
+
+def test_unchanged_copy_is_not_reread(tmp_path, cache, monkeypatch):
+    path = save_upload("a.pdf", b"%PDF-one", str(tmp_path), cache=cache)
+    mtime = os.stat(path).st_mtime_ns
+    monkeypatch.setattr(PDF_Ingestion, "_file_key", lambda path: pytest.fail("copy was re-read"))
+    assert save_upload("a.pdf", b"%PDF-one", str(tmp_path), key=content_key(b"%PDF-one"), cache=cache) == path
+    assert os.stat(path).st_mtime_ns == mtime
+
+def test_recorded_key_survives_a_restart(tmp_path, cache, monkeypatch):
+    save_upload("a.pdf", b"%PDF-one", str(tmp_path), cache=cache)
+    monkeypatch.setattr(PDF_Ingestion, "_file_key", lambda path: pytest.fail("copy was re-read"))
+    save_upload("a.pdf", b"%PDF-one", str(tmp_path), cache=IngestionCache(cache.cache_dir))
+
+def test_revised_file_of_the_same_size_is_rewritten(tmp_path, cache):
+    path = save_upload("a.pdf", b"%PDF-one", str(tmp_path), cache=cache)
+    save_upload("a.pdf", b"%PDF-two", str(tmp_path), cache=cache)
+    with open(path, "rb") as f:
+        assert f.read() == b"%PDF-two"
+    assert cache.saved_key(path) == content_key(b"%PDF-two")
+
+def test_copy_changed_outside_the_app_is_hashed_again(tmp_path, cache):
+    path = save_upload("a.pdf", b"%PDF-one", str(tmp_path), cache=cache)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-xyz")
+    os.utime(path, ns=(0, 0))
+    assert cache.saved_key(path) is None
+    save_upload("a.pdf", b"%PDF-one", str(tmp_path), cache=cache)
+    with open(path, "rb") as f:
+        assert f.read() == b"%PDF-one"
+
+def test_copy_without_a_record_is_hashed_once(tmp_path, cache):
+    path = tmp_path / "legacy.pdf"
+    path.write_bytes(b"%PDF-old")
+    save_upload("legacy.pdf", b"%PDF-old", str(tmp_path), cache=cache)
+    assert cache.saved_key(str(path)) == content_key(b"%PDF-old")
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from PDF_Table_Writer import TableWriter, write_table_pdf
+
+fitz = pytest.importorskip("fitz")
+
+
+def _pages_text(path):
+    with fitz.open(path) as doc:
+        return [page.get_text() for page in doc]
+
+def _first_page_capacity(path):
+    writer = TableWriter(path, "Capacity")
+    try:
+        return writer._page_capacity()
+    finally:
+        writer._file.close()
+
+def test_rows_fill_the_first_page_exactly(tmp_path):
+    capacity = _first_page_capacity(str(tmp_path / "probe.pdf"))
+    path = write_table_pdf(str(tmp_path / "full.pdf"), "Full", pd.DataFrame({"n": range(capacity)}))
+    pages = _pages_text(path)
+    assert len(pages) == 1
+    assert str(capacity - 1) in pages[0].split()
+
+def test_rows_overflow_to_the_next_page(tmp_path):
+    capacity = _first_page_capacity(str(tmp_path / "probe.pdf"))
+    path = write_table_pdf(str(tmp_path / "over.pdf"), "Over", pd.DataFrame({"n": range(capacity + 1)}))
+    pages = _pages_text(path)
+    assert len(pages) == 2
+    assert str(capacity) in pages[1].split()
+    assert "n" in pages[1].split()  # the header repeats on every page
+
+def test_rows_split_across_chunks_keep_order(tmp_path):
+    chunks = [pd.DataFrame({"id": [f"row{n}" for n in range(start, start + 70)]}) for start in range(0, 210, 70)]
+    path = write_table_pdf(str(tmp_path / "chunks.pdf"), "Chunks", iter(chunks))
+    rows = [v for text in _pages_text(path) for v in text.split() if v.startswith("row")]
+    assert rows == [f"row{n}" for n in range(210)]
+
+def test_empty_input_writes_a_header_page(tmp_path):
+    path = write_table_pdf(str(tmp_path / "empty.pdf"), "Empty", pd.DataFrame({"Provider": [], "Total ($)": []}))
+    pages = _pages_text(path)
+    assert len(pages) == 1
+    assert "Provider" in pages[0] and "Total ($)" in pages[0]
+
+def test_no_chunks_still_writes_a_valid_pdf(tmp_path):
+    path = write_table_pdf(str(tmp_path / "none.pdf"), "Nothing", iter([]))
+    assert len(_pages_text(path)) == 1
+
+def test_special_characters_are_escaped(tmp_path):
+    frame = pd.DataFrame({"Name": ["a (b) c", "back\\slash", "two\nlines"], "Total ($)": [1.0, 2.0, 3.0]})
+    path = write_table_pdf(str(tmp_path / "escape.pdf"), "Title (draft)", frame)
+    text = _pages_text(path)[0]
+    assert "a (b) c" in text
+    assert "back\\slash" in text
+    assert "two lines" in text
+    assert "Title (draft)" in text
+
+def test_failed_write_removes_the_partial_file(tmp_path):
+    path = tmp_path / "broken.pdf"
+    with pytest.raises(RuntimeError):
+        with TableWriter(str(path), "Broken") as writer:
+            writer.write(pd.DataFrame({"n": [1]}))
+            raise RuntimeError("boom")
+    assert not path.exists()
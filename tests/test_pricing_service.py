@@ -0,0 +1,136 @@
+import asyncio
+import os
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import Pricing_Service
+from AWS_Price_Index import AwsPriceIndex
+from Pricing_Service import PricingService
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "pricing")
+US_EAST = ("Amazon S3", "US East (N. Virginia)")
+INF = float("inf")
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(Pricing_Service, "RETRY_BACKOFF_SECONDS", 0.0)
+
+@pytest.fixture
+def service(tmp_path):
+    return PricingService(fixtures_dir=FIXTURES_DIR, aws_index=AwsPriceIndex(str(tmp_path / "aws_index.json")))
+
+def _count_fixture_reads(service, monkeypatch):
+    reads = []
+    read = service._read_fixture
+
+    def counting(name):
+        reads.append(name)
+        return read(name)
+    monkeypatch.setattr(service, "_read_fixture", counting)
+    return reads
+
+
+# ----------------- Fixtures --------------------
+def test_aws_schedule_is_built_from_the_offer_file(service):
+    schedules = service.get_schedules([US_EAST])
+    assert schedules[US_EAST] == {
+        "Standard": [(0.0, 51200.0, 0.023), (51200.0, 512000.0, 0.022), (512000.0, INF, 0.021)],
+        "Infrequent Access": [(0.0, INF, 0.0125)],
+        "Archive": [(0.0, INF, 0.0036)]
+    }
+    assert service.aws_index.is_fresh()
+
+def test_foreground_aws_reads_only_an_existing_index(service):
+    assert service.get_schedules([US_EAST], foreground=True)[US_EAST] is None
+    assert not service.aws_index.is_fresh()  # nothing was downloaded
+    service.get_schedules([US_EAST])
+    assert service.get_prices([US_EAST], foreground=True)[US_EAST] == 0.023
+
+def test_gcp_pricelist_is_downloaded_once_for_all_regions(service, monkeypatch):
+    reads = _count_fixture_reads(service, monkeypatch)
+    targets = [("Google Cloud Storage", region) for region in ("us", "eu", "asia")]
+    schedules = service.get_schedules(targets)
+    assert all(schedules[t] == {"Standard": [(0, INF, 0.026)]} for t in targets)
+    assert reads == ["gcp_pricelist.json"]
+
+def test_azure_tiers_are_ordered_by_minimum_units(service):
+    schedule = service.get_schedules([("Microsoft Azure", "eastus")])[("Microsoft Azure", "eastus")]
+    assert schedule == {"Standard": [(0.0, 51200.0, 0.0208), (51200.0, 512000.0, 0.0200), (512000.0, INF, 0.0192)]}
+
+def test_failed_provider_does_not_sink_the_others(service, monkeypatch):
+    reads = _count_fixture_reads(service, monkeypatch)
+    targets = [("Google Cloud Storage", "mars"), ("Microsoft Azure", "westeurope"), ("Microsoft Azure", "eastus")]
+    prices = service.get_prices(targets)
+    assert prices == {("Google Cloud Storage", "mars"): None, ("Microsoft Azure", "westeurope"): None, ("Microsoft Azure", "eastus"): 0.0208}
+    # A missing region or fixture fails the same way every time, so it is not retried
+    assert reads.count("gcp_pricelist.json") == 1
+    assert reads.count("azure_westeurope.json") == 1
+
+
+# ----------------- Retries --------------------
+def test_only_transport_errors_are_retried(service):
+    attempts = {"transport": 0, "parse": 0}
+
+    async def transport():
+        attempts["transport"] += 1
+        raise aiohttp.ClientConnectionError("reset")
+
+    async def parse():
+        attempts["parse"] += 1
+        raise KeyError("mars")
+
+    assert asyncio.run(service._with_retries("Google Cloud Storage", transport)) is None
+    assert asyncio.run(service._with_retries("Google Cloud Storage", parse)) is None
+    assert attempts == {"transport": service.retries + 1, "parse": 1}
+
+def test_foreground_makes_a_single_attempt(service):
+    attempts = []
+
+    async def transport():
+        attempts.append(1)
+        raise asyncio.TimeoutError()
+
+    assert asyncio.run(service._with_retries("Amazon S3", transport, foreground=True)) is None
+    assert len(attempts) == 1
+
+
+# ----------------- Stand-in server --------------------
+def test_stand_in_server(tmp_path):
+    hits = {"gcp": 0, "azure": 0}
+
+    async def gcp(request):
+        hits["gcp"] += 1
+        if hits["gcp"] == 1:
+            raise web.HTTPServiceUnavailable()  # first attempt fails, the retry succeeds
+        return web.json_response({"CP-STORAGE-MULTI-REGIONAL": {"eu": {"USD": 0.025}}})
+
+    async def azure(request):
+        hits["azure"] += 1
+        assert "armRegionName eq 'westeurope'" in request.query["$filter"]
+        return web.json_response({"Items": [{"tierMinimumUnits": 0, "retailPrice": 0.0184}]})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/gcp", gcp)
+        app.router.add_get("/azure", azure)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        base = f"http://127.0.0.1:{port}"
+        try:
+            service = PricingService(
+                endpoints={"gcp": f"{base}/gcp", "azure": f"{base}/azure"}, fixtures_dir="",
+                aws_index=AwsPriceIndex(str(tmp_path / "aws_index.json"))
+            )
+            return await service.fetch_prices([("Google Cloud Storage", "eu"), ("Microsoft Azure", "westeurope")])
+        finally:
+            await runner.cleanup()
+
+    prices = asyncio.run(scenario())
+    assert prices == {("Google Cloud Storage", "eu"): 0.025, ("Microsoft Azure", "westeurope"): 0.0184}
+    assert hits == {"gcp": 2, "azure": 1}
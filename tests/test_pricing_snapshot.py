@@ -0,0 +1,50 @@
+import os
+
+from Pricing_Snapshot import PricingSnapshotStore
+
+TARGET = ("Amazon S3", "US East (N. Virginia)")
+SCHEDULE = {"Standard": [[0, 51200, 0.023], [51200, None, 0.022]]}
+
+
+class FakeService:
+    def __init__(self, schedules):
+        self.schedules = schedules
+        self.calls = []
+
+    def get_schedules(self, targets, foreground=False):
+        self.calls.append((list(targets), foreground))
+        return {t: self.schedules.get(t) for t in targets}
+
+def _store(tmp_path, service):
+    cache = tmp_path / "cache"
+    return PricingSnapshotStore(str(cache / "pricing.db"), str(cache / "pricing.lock"), service=service)
+
+def test_store_touches_no_files_until_used(tmp_path):
+    store = _store(tmp_path, FakeService({}))
+    assert not os.path.exists(tmp_path / "cache")
+    assert store.snapshot_version() == 0
+    assert os.path.exists(tmp_path / "cache" / "pricing.db")
+
+def test_cold_start_fetches_in_foreground(tmp_path):
+    service = FakeService({TARGET: SCHEDULE})
+    store = _store(tmp_path, service)
+    price, fetched_at = store.get_price(*TARGET)
+    assert price == 0.023 and fetched_at is not None
+    assert service.calls[0] == ([TARGET], True)
+    assert store.get_schedule(*TARGET)[0] == SCHEDULE
+    assert store.snapshot_version() == 1
+
+def test_failed_refresh_keeps_the_snapshot_version(tmp_path):
+    store = _store(tmp_path, FakeService({}))
+    assert store.get_price(*TARGET) == (None, None)
+    assert store.snapshot_version() == 0
+
+def test_failed_refresh_keeps_existing_prices(tmp_path):
+    service = FakeService({TARGET: SCHEDULE})
+    store = _store(tmp_path, service)
+    _, fetched_at = store.get_price(*TARGET)
+    service.schedules = {}
+    store.ttl = 0
+    assert store.refresh([TARGET])
+    assert store.get_prices([TARGET])[TARGET] == (0.023, fetched_at)
+    assert store.snapshot_version() == 1
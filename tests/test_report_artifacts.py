@@ -0,0 +1,71 @@
+import os
+import time
+
+from Report_Artifacts import STAGING_PREFIX, STALE_STAGING_SECONDS, ArtifactStore
+
+
+def _artifact(root, name, size, age):
+    path = root / name
+    path.write_bytes(b"x" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+def test_evict_removes_files_past_max_age(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_age_seconds=100)
+    old = _artifact(tmp_path, "old.pdf", 10, 500)
+    fresh = _artifact(tmp_path, "fresh.pdf", 10, 10)
+    assert store.evict() == 1
+    assert not old.exists() and fresh.exists()
+
+def test_evict_drops_least_recently_used_until_under_budget(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=250)
+    oldest = _artifact(tmp_path, "a.pdf", 100, 30)
+    middle = _artifact(tmp_path, "b.csv", 100, 20)
+    newest = _artifact(tmp_path, "c.pdf", 100, 10)
+    assert store.evict() == 1
+    assert not oldest.exists()
+    assert middle.exists() and newest.exists()
+    assert store.get_stats()["evicted"] == 1
+
+def test_evict_leaves_other_files_alone(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=0, max_age_seconds=0)
+    other = _artifact(tmp_path, "notes.txt", 100, 1000)
+    assert store.evict() == 0
+    assert other.exists()
+
+def test_evict_sweeps_only_stale_staging_dirs(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    stale = tmp_path / f"{STAGING_PREFIX}stale"
+    active = tmp_path / f"{STAGING_PREFIX}active"
+    for directory in (stale, active):
+        directory.mkdir()
+        (directory / "partial.pdf").write_bytes(b"x")
+    stamp = time.time() - STALE_STAGING_SECONDS - 60
+    os.utime(stale, (stamp, stamp))
+    store.evict()
+    assert not stale.exists()
+    assert active.exists()
+
+def test_evict_on_missing_root(tmp_path):
+    assert ArtifactStore(str(tmp_path / "missing")).evict() == 0
+
+def test_get_or_create_reuses_and_evicts(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=15)
+    builds = []
+
+    def build(name):
+        def write(staging):
+            builds.append(name)
+            path = os.path.join(staging, "out.pdf")
+            with open(path, "wb") as f:
+                f.write(b"y" * 10)
+            return path
+        return write
+
+    first = store.get_or_create("report", build("first"), params={"p": 1})
+    assert store.get_or_create("report", build("again"), params={"p": 1}) == first
+    second = store.get_or_create("report", build("second"), params={"p": 2})
+    assert builds == ["first", "second"]
+    assert os.path.exists(second) and not os.path.exists(first)
+    assert not [n for n in os.listdir(tmp_path) if n.startswith(STAGING_PREFIX)]